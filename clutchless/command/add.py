@@ -1,13 +1,26 @@
+import asyncio
 import logging
+import signal
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import MutableMapping, MutableSequence, Set, Sequence, Iterable
+from typing import (
+    MutableMapping,
+    MutableSequence,
+    Set,
+    Sequence,
+    Iterable,
+    Callable,
+    Awaitable,
+    Union,
+    cast,
+)
 
 from clutchless.command.command import Command, CommandOutput
 from clutchless.domain.torrent import MetainfoFile
 from clutchless.external.filesystem import Filesystem
 from clutchless.external.metainfo import TorrentData
-from clutchless.service.torrent import AddService, FindService
+from clutchless.service.pipeline import AddPipeline
+from clutchless.service.torrent import AddService, FindService, AsyncAddService
 
 logger = logging.getLogger(__name__)
 
@@ -180,7 +193,7 @@ class LinkingAddCommand(Command):
         for result in sorted(self.torrent_data):
             file, location = result.metainfo_file, result.location
             if location is not None and file.path is not None:
-                self.add_service.add_with_data(file, location)
+                self.add_service.add_with_data(file, location, result.name)
             else:
                 self.add_service.add(file)
         for success in self.add_service.success:
@@ -203,3 +216,101 @@ class LinkingAddCommand(Command):
         for rest_file in sorted(self._get_rest()):
             output.added_torrents.append(rest_file)
         return output
+
+
+class StreamingAddCommand(Command):
+    """Adds each torrent as soon as its data was looked for, while the rest are
+    still being found (see AddPipeline).
+    """
+
+    def __init__(
+        self,
+        pipeline: AddPipeline,
+        add_service: Union[AddService, AsyncAddService],
+        fs: Filesystem,
+        paths: Iterable[Path],
+        consumers: int = 1,
+    ):
+        self.pipeline = pipeline
+        self.add_service = add_service
+        self.fs = fs
+        self.paths = set(paths)
+        # torrents added at the same time, with an AsyncAddService
+        self.consumers = consumers
+
+    def _add(self, data: TorrentData):
+        add_service = cast(AddService, self.add_service)
+        file, location = data.metainfo_file, data.location
+        success_count = len(add_service.success)
+        if location is not None and file.path is not None:
+            add_service.add_with_data(file, location, data.name)
+        else:
+            add_service.add(file)
+        self._report(data, success_count)
+
+    async def _add_async(self, data: TorrentData):
+        add_service = cast(AsyncAddService, self.add_service)
+        file, location = data.metainfo_file, data.location
+        success_count = len(add_service.success)
+        if location is not None and file.path is not None:
+            await add_service.add_with_data(file, location, data.name)
+        else:
+            await add_service.add(file)
+        self._report(data, success_count)
+
+    def _report(self, data: TorrentData, success_count: int):
+        """Reports a torrent that was just added, if it was ('success_count' is how
+        many were added before it).
+        """
+        file, location = data.metainfo_file, data.location
+        if file in self.add_service.success[success_count:]:
+            if location is not None:
+                renamed = f" as {data.name}" if data.name else ""
+                print(f"Linked {file.name} at {location}{renamed}")
+            else:
+                print(f"Added {file.name}")
+            if file.path:
+                self.fs.remove(file.path)
+
+    def _stream(self, stream: Callable[[], Awaitable[None]]):
+        async def _main():
+            task = asyncio.create_task(stream())
+            loop = asyncio.get_running_loop()
+            loop.add_signal_handler(signal.SIGINT, task.cancel)
+            try:
+                await task
+            except asyncio.CancelledError:
+                print("Cancelled, stopping after the torrents added so far")
+
+        asyncio.run(_main())
+
+    async def _add_all(self):
+        if isinstance(self.add_service, AsyncAddService):
+            try:
+                await self.pipeline.run_async(
+                    self.paths, self._add_async, self.consumers
+                )
+            finally:
+                await self.add_service.close()
+        else:
+            await self.pipeline.run(self.paths, self._add)
+
+    def run(self) -> LinkingAddOutput:
+        self._stream(self._add_all)
+        output = LinkingAddOutput()
+        output.add_failed(self.add_service.fail, self.add_service.error)
+        output.add_no_link_succeses(self.add_service.added_without_data)
+        output.add_linked_successes(self.add_service.found, self.add_service.link)
+        return output
+
+    def dry_run(self) -> LinkingAddOutput:
+        output = LinkingAddOutput()
+
+        def _record(data: TorrentData):
+            if data.location is not None:
+                output.linked_torrents[data.metainfo_file] = data.location
+            else:
+                output.added_torrents.append(data.metainfo_file)
+
+        self._stream(lambda: self.pipeline.run(self.paths, _record))
+        return output
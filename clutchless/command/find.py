@@ -20,7 +20,8 @@ class FindOutput(CommandOutput):
     def print_found(found: TorrentData):
         name = found.metainfo_file.name
         path = found.location
-        print(Fore.GREEN + f"\N{check mark} {name} at {path}")
+        renamed = f" as {found.name}" if found.name else ""
+        print(Fore.GREEN + f"\N{check mark} {name} at {path}{renamed}")
 
     @staticmethod
     def print_missing(torrent: MetainfoFile):
@@ -0,0 +1,91 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Set
+
+from clutchless.command.command import Command, CommandOutput
+from clutchless.external.index import DataIndex, IndexStats, RefreshResult
+
+
+@dataclass
+class IndexBuildOutput(CommandOutput):
+    roots: Set[Path]
+    entry_count: int
+
+    def display(self):
+        print(f"Indexed {self.entry_count} entries below:")
+        for root in sorted(self.roots):
+            print(f"{root}")
+
+    def dry_run_display(self):
+        raise NotImplementedError
+
+
+class IndexBuildCommand(Command):
+    def __init__(self, data_index: DataIndex, roots: Set[Path]):
+        self.data_index = data_index
+        self.roots = roots
+
+    def run(self) -> IndexBuildOutput:
+        entry_count = self.data_index.build(self.roots)
+        return IndexBuildOutput(self.roots, entry_count)
+
+    def dry_run(self) -> CommandOutput:
+        raise NotImplementedError
+
+
+@dataclass
+class IndexRefreshOutput(CommandOutput):
+    result: RefreshResult
+
+    def display(self):
+        result = self.result
+        print(
+            f"Checked {result.checked} directories and listed {result.relisted} again."
+        )
+        print(f"{result.added} entries were added and {result.removed} were removed.")
+
+    def dry_run_display(self):
+        raise NotImplementedError
+
+
+class IndexRefreshCommand(Command):
+    def __init__(self, data_index: DataIndex):
+        self.data_index = data_index
+
+    def run(self) -> IndexRefreshOutput:
+        return IndexRefreshOutput(self.data_index.refresh())
+
+    def dry_run(self) -> CommandOutput:
+        raise NotImplementedError
+
+
+@dataclass
+class IndexStatsOutput(CommandOutput):
+    path: Path
+    stats: IndexStats
+
+    def display(self):
+        stats = self.stats
+        if len(stats.roots) > 0:
+            print(f"Index at {self.path} contains:")
+            for root in stats.roots:
+                print(f"{root}")
+            print(
+                f"{stats.directories} directories and {stats.files} files ({stats.size} bytes)"
+            )
+        else:
+            print(f"Index at {self.path} is empty.")
+
+    def dry_run_display(self):
+        raise NotImplementedError
+
+
+class IndexStatsCommand(Command):
+    def __init__(self, data_index: DataIndex):
+        self.data_index = data_index
+
+    def run(self) -> IndexStatsOutput:
+        return IndexStatsOutput(self.data_index.path, self.data_index.stats())
+
+    def dry_run(self) -> CommandOutput:
+        raise NotImplementedError
@@ -31,7 +31,8 @@ class LinkCommandOutput(CommandOutput):
             print(f"Linked the following torrents:")
             for linked in self.success:
                 name = linked.metainfo_file.name
-                print(f"{name} at {linked.location}")
+                renamed = f" as {linked.name}" if linked.name else ""
+                print(f"{name} at {linked.location}{renamed}")
         if no_matching_data_count > 0:
             print(f"Couldn't find the data for the following torrents:")
             for unmatched in self.no_matching_data:
@@ -49,7 +50,8 @@ class LinkCommandOutput(CommandOutput):
             print(f"Found the following torrents:")
             for linked in self.success:
                 name = linked.metainfo_file.name
-                print(f"{name} at {linked.location}")
+                renamed = f" as {linked.name}" if linked.name else ""
+                print(f"{name} at {linked.location}{renamed}")
         if no_matching_data_count > 0:
             print(f"Couldn't find data for the following torrents:")
             for unmatched in self.no_matching_data:
@@ -61,30 +63,23 @@ class LinkCommand(Command):
         self.link_service = link_service
         self.find_service = find_service
 
-    def change_location(
-        self,
-        torrent_id_by_metainfo_file: Mapping[MetainfoFile, int],
-        torrent_data: TorrentData,
-    ):
-        torrent_id = torrent_id_by_metainfo_file[torrent_data.metainfo_file]
-        new_path = torrent_data.location
-        self.link_service.change_location(
-            torrent_id, torrent_data.metainfo_file.path, new_path
-        )
-
     def handle_found(
         self,
         found: Set[TorrentData],
         torrent_id_by_metainfo_file: Mapping[MetainfoFile, int],
     ) -> Tuple[Sequence[TorrentData], Sequence[LinkFailure]]:
+        data_by_id = {
+            torrent_id_by_metainfo_file[torrent_data.metainfo_file]: torrent_data
+            for torrent_data in found
+        }
+        failures = self.link_service.change_locations(data_by_id)
         success: MutableSequence[TorrentData] = []
         error: MutableSequence[LinkFailure] = []
-        for torrent_data in found:
+        for (torrent_id, torrent_data) in data_by_id.items():
             try:
-                self.change_location(torrent_id_by_metainfo_file, torrent_data)
+                error.append(LinkFailure(torrent_data, failures[torrent_id]))
+            except KeyError:
                 success.append(torrent_data)
-            except RuntimeError as e:
-                error.append(LinkFailure(torrent_data, str(e)))
         return success, error
 
     def _separate(
@@ -6,7 +6,7 @@ from typing import Set, Sequence, Mapping, Iterable, Tuple, MutableMapping
 from texttable import Texttable
 
 from clutchless.command.command import Command, CommandOutput
-from clutchless.domain.torrent import MetainfoFile
+from clutchless.external.transmission import TorrentSummary
 from clutchless.service.torrent import OrganizeService
 from clutchless.spec.organize import TrackerSpec
 
@@ -14,7 +14,7 @@ from clutchless.spec.organize import TrackerSpec
 @dataclass
 class OrganizeSuccess:
     torrent_id: int
-    metainfo_file: MetainfoFile
+    name: str
     new_path: Path
     old_path: Path
 
@@ -22,7 +22,7 @@ class OrganizeSuccess:
 @dataclass
 class OrganizeFailure:
     torrent_id: int
-    metainfo_file: MetainfoFile
+    name: str
     failure: str
 
 
@@ -34,7 +34,7 @@ class OrganizeAction:
 
 @dataclass
 class OrganizeCommandOutput(CommandOutput):
-    files: Mapping[int, MetainfoFile] = field(default_factory=dict)
+    names: Mapping[int, str] = field(default_factory=dict)
     actions: Sequence[OrganizeAction] = field(default_factory=list)
     success: Sequence[OrganizeSuccess] = field(default_factory=list)
     failure: Sequence[OrganizeFailure] = field(default_factory=list)
@@ -45,22 +45,20 @@ class OrganizeCommandOutput(CommandOutput):
         if success_count > 0:
             print("Organized these torrents:")
             for success in self.success:
-                metainfo = success.metainfo_file
                 print(
-                    f"{metainfo.name} moved from {success.old_path} to {success.new_path}"
+                    f"{success.name} moved from {success.old_path} to {success.new_path}"
                 )
         if failure_count > 0:
             print("Failed to organize these torrents:")
             for failure in self.failure:
-                metainfo = failure.metainfo_file
-                print(f"{metainfo.name} because of: {failure.failure}")
+                print(f"{failure.name} because of: {failure.failure}")
 
     def dry_run_display(self):
         if len(self.actions) > 0:
             print(f"Would organize the following torrents:")
             for action in self.actions:
-                file = self.files[action.torrent_id]
-                print(f"{file.name} to {action.new_path}")
+                name = self.names[action.torrent_id]
+                print(f"{name} to {action.new_path}")
         else:
             print("Nothing to do.")
 
@@ -73,12 +71,6 @@ class OrganizeCommand(Command):
         self.new_path = new_path
         self.organize_service = organize_service
 
-    def _get_files(self, ids: Set[int]) -> Mapping[int, MetainfoFile]:
-        result = dict()
-        for torrent_id in ids:
-            result[torrent_id] = self.organize_service.get_metainfo_file(torrent_id)
-        return result
-
     @staticmethod
     def _override_folder_names(
         announce_urls_by_folder_name: "OrderedDict[str, Sequence[str]]",
@@ -104,13 +96,11 @@ class OrganizeCommand(Command):
         overridden_announce_url_to_folder_name = self._override_folder_names(
             announce_url_to_folder_name, overrides
         )
-        announce_urls_by_torrent_id = (
-            self.organize_service.get_announce_urls_by_torrent_id()
-        )
+        torrents = self.organize_service.get_torrents()
         actions = self._make_actions(
-            overridden_announce_url_to_folder_name, announce_urls_by_torrent_id
+            overridden_announce_url_to_folder_name, self._announce_urls(torrents)
         )
-        success, fail = self._handle(actions)
+        success, fail = self._handle(actions, torrents)
         return OrganizeCommandOutput(success=success, failure=fail)
 
     def dry_run(self) -> CommandOutput:
@@ -121,16 +111,23 @@ class OrganizeCommand(Command):
         overridden_announce_url_to_folder_name = self._override_folder_names(
             announce_url_to_folder_name, overrides
         )
-        announce_urls_by_torrent_id = (
-            self.organize_service.get_announce_urls_by_torrent_id()
-        )
+        torrents = self.organize_service.get_torrents()
         actions = list(
             self._make_actions(
-                overridden_announce_url_to_folder_name, announce_urls_by_torrent_id
+                overridden_announce_url_to_folder_name, self._announce_urls(torrents)
             )
         )
-        files = self._get_files({action.torrent_id for action in actions})
-        return OrganizeCommandOutput(files, actions)
+        names = {torrent_id: torrent.name for (torrent_id, torrent) in torrents.items()}
+        return OrganizeCommandOutput(names, actions)
+
+    @staticmethod
+    def _announce_urls(
+        torrents: Mapping[int, TorrentSummary]
+    ) -> Mapping[int, Set[str]]:
+        return {
+            torrent_id: set(torrent.announce_urls)
+            for (torrent_id, torrent) in torrents.items()
+        }
 
     def _make_actions(
         self,
@@ -156,22 +153,28 @@ class OrganizeCommand(Command):
         return "other_torrents"
 
     def _handle(
-        self, actions: Iterable[OrganizeAction]
+        self, actions: Iterable[OrganizeAction], torrents: Mapping[int, TorrentSummary]
     ) -> Tuple[Sequence[OrganizeSuccess], Sequence[OrganizeFailure]]:
+        ids_by_path: MutableMapping[Path, Set[int]] = {}
+        actions = list(actions)
+        for action in actions:
+            ids_by_path.setdefault(action.new_path, set()).add(action.torrent_id)
+        failures = self.organize_service.move_locations(ids_by_path)
         success = []
         failure = []
         for action in actions:
             torrent_id = action.torrent_id
-            new_path = action.new_path
-            metainfo_file = self.organize_service.get_metainfo_file(torrent_id)
+            torrent = torrents[torrent_id]
             try:
-                old_path = self.organize_service.get_torrent_location(torrent_id)
-                self.organize_service.move_location(torrent_id, new_path)
+                failure.append(
+                    OrganizeFailure(torrent_id, torrent.name, failures[torrent_id])
+                )
+            except KeyError:
                 success.append(
-                    OrganizeSuccess(torrent_id, metainfo_file, new_path, old_path)
+                    OrganizeSuccess(
+                        torrent_id, torrent.name, action.new_path, torrent.location
+                    )
                 )
-            except RuntimeError as e:
-                failure.append(OrganizeFailure(torrent_id, metainfo_file, str(e)))
         return success, failure
 
 
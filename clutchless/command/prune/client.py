@@ -34,8 +34,8 @@ class PruneClientCommand(Command):
         missing_torrent_names_by_id: Mapping[
             int, str
         ] = self.service.get_torrent_name_by_id_with_missing_data()
-        for torrent_id in missing_torrent_names_by_id.keys():
-            self.service.remove_torrent(torrent_id)
+        if missing_torrent_names_by_id:
+            self.service.remove_torrents(set(missing_torrent_names_by_id.keys()))
         return PruneClientResult(set(missing_torrent_names_by_id.values()))
 
     def dry_run(self) -> PruneClientResult:
@@ -0,0 +1,120 @@
+import logging
+from typing import Set, Sequence, Optional
+
+from colorama import Fore
+
+from clutchless.command.command import Command, CommandOutput
+from clutchless.domain.torrent import MetainfoFile
+from clutchless.external.verify import (
+    PieceVerifier,
+    VerifyResult,
+    Sample,
+    SampleResult,
+)
+from clutchless.service.torrent import FindService
+
+logger = logging.getLogger(__name__)
+
+
+class VerifyOutput(CommandOutput):
+    def __init__(
+        self,
+        results: Sequence[VerifyResult],
+        missing: Set[MetainfoFile],
+        sampled: Sequence[SampleResult] = (),
+    ):
+        self.results = results
+        self.missing = missing
+        # samples without a bad piece, the ones with one were hashed in full
+        self.sampled = sampled
+
+    @staticmethod
+    def print_complete(result: VerifyResult):
+        name = result.metainfo_file.name
+        renamed = f" as {result.name}" if result.name else ""
+        print(Fore.GREEN + f"\N{check mark} {name} at {result.location}{renamed}")
+
+    @staticmethod
+    def print_sampled(result: SampleResult):
+        name = result.metainfo_file.name
+        renamed = f" as {result.name}" if result.name else ""
+        bound = result.bad_fraction_bound()
+        print(
+            Fore.GREEN
+            + f"\N{check mark} {name} at {result.location}{renamed}"
+            + f" (hashed {result.hashed} pieces, at most {bound:.2%} of the rest"
+            + " are bad with 95% confidence)"
+        )
+
+    @staticmethod
+    def print_incomplete(result: VerifyResult):
+        name = result.metainfo_file.name
+        renamed = f" as {result.name}" if result.name else ""
+        pieces = f"{result.valid_pieces}/{len(result.pieces)} pieces"
+        print(
+            Fore.RED + f"\N{ballot x} {name} at {result.location}{renamed} ({pieces})"
+        )
+        for file in result.files:
+            color = Fore.GREEN if file.is_complete else Fore.RED
+            print(color + f"    {file.fraction:7.2%} {file.path}")
+
+    def display(self):
+        complete = [result for result in self.results if result.is_complete]
+        incomplete = [result for result in self.results if not result.is_complete]
+        if len(complete) > 0:
+            print(f"{len(complete)} torrents are complete:")
+            for result in complete:
+                self.print_complete(result)
+        if len(self.sampled) > 0:
+            print(f"{len(self.sampled)} torrents had no bad pieces in the sample:")
+            for result in self.sampled:
+                self.print_sampled(result)
+        if len(incomplete) > 0:
+            print(f"{len(incomplete)} torrents are incomplete:")
+            for result in incomplete:
+                self.print_incomplete(result)
+        if len(self.missing) > 0:
+            print(f"Did not find data of {len(self.missing)} torrents:")
+            for file in self.missing:
+                print(Fore.RED + f"\N{ballot x} {file.name}")
+
+    def dry_run_display(self):
+        raise NotImplementedError
+
+
+class VerifyCommand(Command):
+    def __init__(
+        self,
+        find_service: FindService,
+        verifier: PieceVerifier,
+        metainfo_files: Set[MetainfoFile],
+        sample: Optional[Sample] = None,
+    ):
+        self.find_service = find_service
+        self.verifier = verifier
+        self.metainfo_files = metainfo_files
+        self.sample = sample
+
+    def run(self) -> VerifyOutput:
+        found = self.find_service.find(self.metainfo_files)
+        results = []
+        sampled = []
+        missing = set()
+        for data in found:
+            if data.location is None:
+                missing.add(data.metainfo_file)
+                continue
+            logger.info(f"hashing {data.metainfo_file.name} at {data.location}")
+            file, location, name = data.metainfo_file, data.location, data.name
+            if self.sample is None:
+                results.append(self.verifier.verify(file, location, name))
+                continue
+            result = self.verifier.sample(file, location, name, self.sample)
+            if result.full is None:
+                sampled.append(result)
+            else:
+                results.append(result.full)
+        return VerifyOutput(results, missing, sampled)
+
+    def dry_run(self) -> CommandOutput:
+        raise NotImplementedError
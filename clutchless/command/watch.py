@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import signal
+from dataclasses import dataclass, field
+from typing import MutableSequence
+
+from clutchless.command.command import Command, CommandOutput
+from clutchless.domain.torrent import MetainfoFile
+from clutchless.external.metainfo import TorrentData
+from clutchless.external.watch import Watcher, next_batch
+from clutchless.service.watch import WatchService, WatchBatch
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WatchOutput(CommandOutput):
+    added: MutableSequence[MetainfoFile] = field(default_factory=list)
+    linked: MutableSequence[TorrentData] = field(default_factory=list)
+    failed_count: int = 0
+
+    def display(self):
+        print(
+            f"Stopped watching after adding {len(self.added)} torrents without data"
+            f" and {len(self.linked)} with data ({self.failed_count} failed)."
+        )
+
+    def dry_run_display(self):
+        raise NotImplementedError
+
+
+def print_batch(batch: WatchBatch):
+    for file in batch.added:
+        print(f"Added {file.name}")
+    for data in batch.linked:
+        renamed = f" as {data.name}" if data.name else ""
+        print(f"Linked {data.metainfo_file.name} at {data.location}{renamed}")
+    for (file, error) in batch.failed:
+        print(f"Failed {file.name} because: {error}")
+
+
+class WatchCommand(Command):
+    def __init__(self, service: WatchService, watcher: Watcher, debounce: float):
+        self.service = service
+        self.watcher = watcher
+        self.debounce = debounce
+
+    async def _watch(self, output: WatchOutput):
+        queue: asyncio.Queue = asyncio.Queue()
+        roots = self.service.metainfo_roots | self.service.data_roots
+        watch_task = asyncio.create_task(self.watcher.run(roots, queue))
+        try:
+            await self.service.file_locator.index()
+            print(f"Watching {len(roots)} folders - press Ctrl+C to stop")
+            while True:
+                paths = await next_batch(queue, self.debounce)
+                logger.info(f"handling {len(paths)} changed paths")
+                batch = await self.service.handle(paths)
+                print_batch(batch)
+                output.added.extend(batch.added)
+                output.linked.extend(batch.linked)
+                output.failed_count += len(batch.failed)
+        finally:
+            watch_task.cancel()
+            await asyncio.gather(watch_task, return_exceptions=True)
+
+    def run(self) -> WatchOutput:
+        output = WatchOutput()
+
+        async def _main():
+            task = asyncio.create_task(self._watch(output))
+            loop = asyncio.get_running_loop()
+            loop.add_signal_handler(signal.SIGINT, task.cancel)
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        asyncio.run(_main())
+        return output
+
+    def dry_run(self) -> CommandOutput:
+        raise NotImplementedError
@@ -1,11 +1,20 @@
 import logging
 from collections import defaultdict
 from pathlib import Path
-from typing import Sequence, Set, Mapping, Any, DefaultDict, Callable, Iterable
+from typing import (
+    Sequence,
+    Set,
+    Mapping,
+    Any,
+    DefaultDict,
+    Callable,
+    Iterable,
+    Optional,
+)
 
 from docopt import docopt
 
-from clutchless.command.add import AddCommand, LinkingAddCommand
+from clutchless.command.add import AddCommand, LinkingAddCommand, StreamingAddCommand
 from clutchless.command.archive import ArchiveCommand, ErrorArchiveCommand
 from clutchless.command.command import (
     CommandFactory,
@@ -14,6 +23,11 @@ from clutchless.command.command import (
 )
 from clutchless.command.dedupe import DedupeCommand
 from clutchless.command.find import FindCommand
+from clutchless.command.index import (
+    IndexBuildCommand,
+    IndexRefreshCommand,
+    IndexStatsCommand,
+)
 from clutchless.command.link import LinkCommand, ListLinkCommand
 from clutchless.command.organize import (
     ListOrganizeCommand,
@@ -23,19 +37,32 @@ from clutchless.command.other import MissingCommand, InvalidCommand
 from clutchless.command.prune.client import PruneClientCommand
 from clutchless.command.prune.folder import PruneFolderCommand
 from clutchless.command.rename import RenameCommand
+from clutchless.command.verify import VerifyCommand
+from clutchless.command.watch import WatchCommand
 from clutchless.domain.torrent import MetainfoFile
 from clutchless.external.filesystem import (
     Filesystem,
     FileLocator,
     DryRunFilesystem,
-    MultipleDirectoryFileLocator,
+    IndexedFileLocator,
+    DirectoryScanner,
+    ScanRules,
 )
+from clutchless.external.index import DataIndexFileLocator, open_data_index
+from clutchless.external.verify import PieceVerifier, Sample
+from clutchless.external.watch import get_watcher
 from clutchless.external.metainfo import (
     MetainfoIO,
-    CustomTorrentDataLocator,
+    IndexedTorrentDataLocator,
     DefaultTorrentDataReader,
     TorrentData,
+    TorrentDataLocator,
+    SizeMatchingTorrentDataLocator,
+    ContentMatchingTorrentDataLocator,
+    Verification,
+    VerificationStore,
 )
+from clutchless.external.transmission import BATCH_SIZE
 from clutchless.service.file import (
     get_valid_directories,
     collect_metainfo_files,
@@ -49,13 +76,70 @@ from clutchless.service.torrent import (
     OrganizeService,
     PruneService,
     LinkOnlyAddService,
+    AsyncAddService,
 )
+from clutchless.service.pipeline import AddPipeline
+from clutchless.service.watch import WatchService
 from clutchless.spec.find import FindArgs
+from clutchless.spec.shared import (
+    OptionError,
+    parse_scan_rules,
+    parse_verification,
+    parse_sample,
+)
 
 
 logger = logging.getLogger(__name__)
 
 
+def get_scanner(dependencies: Mapping, args: Mapping) -> DirectoryScanner:
+    """Returns the shared scanner, limited by the command's scan rule options."""
+    scanner: DirectoryScanner = dependencies["scanner"]
+    return scanner.with_rules(parse_scan_rules(args))
+
+
+def get_file_locator(
+    fs: Filesystem,
+    directories: Set[Path],
+    scanner: DirectoryScanner,
+    raw_index_path: Optional[str] = None,
+    index_sizes: bool = False,
+) -> IndexedFileLocator:
+    """Returns a locator that scans directories, or queries the data index when given."""
+    if raw_index_path is None:
+        return IndexedFileLocator(directories, fs, scanner, index_sizes)
+    if scanner.rules != ScanRules():
+        # the index holds everything below its roots, however it was asked for
+        raise RuntimeError(
+            "--index can't be combined with --exclude, --max-depth, "
+            "--one-file-system, --skip-symlinks or --unique-inodes"
+        )
+    data_index = open_data_index(fs, raw_index_path)
+    for directory in directories:
+        if not data_index.covers(directory):
+            raise RuntimeError(
+                f"{directory} is not indexed (see 'clutchless index build')"
+            )
+    return DataIndexFileLocator(directories, fs, data_index)
+
+
+def get_data_locator(
+    fs: Filesystem,
+    file_locator: IndexedFileLocator,
+    match_size: bool,
+    by_content: bool = False,
+    verification: Verification = Verification.EXISTS,
+    sample: Sample = None,
+    store: VerificationStore = None,
+) -> TorrentDataLocator:
+    data_reader = DefaultTorrentDataReader(fs, verification, sample=sample, store=store)
+    if by_content:
+        return ContentMatchingTorrentDataLocator(file_locator, data_reader, fs)
+    if match_size:
+        return SizeMatchingTorrentDataLocator(file_locator, data_reader)
+    return IndexedTorrentDataLocator(file_locator, data_reader)
+
+
 def rename_factory(argv: Sequence[str], dependencies: Mapping) -> CommandFactoryResult:
     fs: Filesystem = dependencies["fs"]
     reader: MetainfoIO = dependencies["metainfo_reader"]
@@ -63,9 +147,12 @@ def rename_factory(argv: Sequence[str], dependencies: Mapping) -> CommandFactory
     from clutchless.spec import rename as rename_command
 
     args = docopt(doc=rename_command.__doc__, argv=argv)
+    scanner = get_scanner(dependencies, args)
 
     raw_paths = args.get("<path>")
-    files: Iterable[MetainfoFile] = collect_metainfo_files(reader, fs, raw_paths)
+    files: Iterable[MetainfoFile] = collect_metainfo_files(
+        reader, fs, raw_paths, scanner
+    )
 
     command = RenameCommand(fs, files)
     return command, args
@@ -79,20 +166,43 @@ def add_factory(argv: Sequence[str], dependencies: Mapping) -> CommandFactoryRes
     from clutchless.spec import add as add_command
 
     args = docopt(doc=add_command.__doc__, argv=argv)
+    scanner = get_scanner(dependencies, args)
     fs: Filesystem = dependencies["fs"]
     if not args["--delete"]:
         fs = DryRunFilesystem()
 
-    metainfo_file_paths = collect_metainfo_paths(fs, args["<metainfo>"])
-    metainfo_files = {reader.from_path(path) for path in metainfo_file_paths}
-
     data_directories = get_valid_directories(fs, args["-d"])
-    file_locator = MultipleDirectoryFileLocator(data_directories, fs)
-    data_reader = DefaultTorrentDataReader(fs)
-    data_locator = CustomTorrentDataLocator(file_locator, data_reader)
+    match_size = args.get("--match-size")
+    file_locator = get_file_locator(fs, data_directories, scanner, None, match_size)
+    data_locator = get_data_locator(
+        fs,
+        file_locator,
+        match_size,
+        verification=parse_verification(args),
+        sample=parse_sample(args),
+        store=dependencies.get("verification_store"),
+    )
 
     add_service = AddService(client)
 
+    if args["--yes"]:
+        # nothing to confirm, so torrents are added while the rest are still found
+        link_only = len(data_directories) > 0 and not args["--force"]
+        if link_only:
+            add_service = LinkOnlyAddService(client)
+        async_api = dependencies.get("async_api")
+        if async_api is not None:
+            add_service = AsyncAddService(async_api, link_only)
+        pipeline = AddPipeline(
+            fs, reader, scanner, data_locator if len(data_directories) > 0 else None
+        )
+        paths = {Path(path) for path in args["<metainfo>"]}
+        consumers = dependencies.get("rpc_connections", 1)
+        return StreamingAddCommand(pipeline, add_service, fs, paths, consumers), args
+
+    metainfo_file_paths = collect_metainfo_paths(fs, args["<metainfo>"], scanner)
+    metainfo_files = set(reader.from_paths(metainfo_file_paths))
+
     # action
     command: Command = AddCommand(add_service, fs, metainfo_files)
     if len(data_directories) > 0:
@@ -115,17 +225,29 @@ def link_factory(argv: Sequence[str], dependencies: Mapping) -> CommandFactoryRe
     fs = dependencies["fs"]
 
     data_service = LinkDataService(client, reader)
-    link_service = LinkService(reader, data_service)
+    link_service = LinkService(
+        reader, data_service, dependencies.get("batch_size", BATCH_SIZE)
+    )
 
     # parse
     from clutchless.spec import link as link_command
 
     link_args = docopt(doc=link_command.__doc__, argv=argv)
+    scanner = get_scanner(dependencies, link_args)
 
     data_dirs: Set[Path] = get_valid_directories(fs, link_args.get("<data>"))
-    file_locator = MultipleDirectoryFileLocator(data_dirs, fs)
-    data_reader = DefaultTorrentDataReader(fs)
-    data_locator = CustomTorrentDataLocator(file_locator, data_reader)
+    match_size = link_args.get("--match-size")
+    file_locator = get_file_locator(
+        fs, data_dirs, scanner, link_args.get("--index"), match_size
+    )
+    data_locator = get_data_locator(
+        fs,
+        file_locator,
+        match_size,
+        verification=parse_verification(link_args),
+        sample=parse_sample(link_args),
+        store=dependencies.get("verification_store"),
+    )
     find_service = FindService(data_locator)
 
     if link_args.get("--list"):
@@ -142,12 +264,24 @@ def find_factory(argv: Sequence[str], dependencies: Mapping) -> CommandFactoryRe
     from clutchless.spec import find as find_command
 
     args = docopt(doc=find_command.__doc__, argv=argv)
-    find_args = FindArgs(args, reader, fs, locator)
+    scanner = get_scanner(dependencies, args)
+    find_args = FindArgs(args, reader, fs, locator, scanner)
 
     data_directories = find_args.get_data_dirs()
-    file_locator = MultipleDirectoryFileLocator(data_directories, fs)
-    data_reader = DefaultTorrentDataReader(fs)
-    data_locator = CustomTorrentDataLocator(file_locator, data_reader)
+    match_size = args.get("--match-size")
+    by_content = args.get("--by-content")
+    file_locator = get_file_locator(
+        fs, data_directories, scanner, args.get("--index"), match_size or by_content
+    )
+    data_locator = get_data_locator(
+        fs,
+        file_locator,
+        match_size,
+        by_content,
+        parse_verification(args),
+        parse_sample(args),
+        dependencies.get("verification_store"),
+    )
     service = FindService(data_locator)
 
     metainfo_files = find_args.get_torrent_files()
@@ -160,12 +294,49 @@ def find_factory(argv: Sequence[str], dependencies: Mapping) -> CommandFactoryRe
     return FindCommand(service, metainfo_files), args
 
 
+def verify_factory(argv: Sequence[str], dependencies: Mapping) -> CommandFactoryResult:
+    reader: MetainfoIO = dependencies["metainfo_reader"]
+    fs: Filesystem = dependencies["fs"]
+    locator: FileLocator = dependencies["locator"]
+
+    from clutchless.spec import verify as verify_command
+
+    args = docopt(doc=verify_command.__doc__, argv=argv)
+    scanner = get_scanner(dependencies, args)
+    find_args = FindArgs(args, reader, fs, locator, scanner)
+
+    raw_threads = args.get("--threads")
+    threads = None
+    if raw_threads is not None:
+        try:
+            threads = int(raw_threads)
+        except ValueError:
+            raise OptionError(
+                f"--threads must be a number, not {raw_threads}"
+            ) from None
+        if threads < 1:
+            raise OptionError("--threads must be at least 1")
+    sample = parse_sample(args) if args.get("--sample") else None
+    verifier = PieceVerifier(threads)
+
+    data_directories = find_args.get_data_dirs()
+    match_size = args.get("--match-size")
+    file_locator = get_file_locator(fs, data_directories, scanner, None, match_size)
+    # incomplete data is found too, it's hashed to see how much of it is there
+    data_locator = get_data_locator(fs, file_locator, match_size)
+    service = FindService(data_locator)
+
+    metainfo_files = find_args.get_torrent_files()
+    if not metainfo_files:
+        raise RuntimeError("Did not find any metainfo files")
+    return VerifyCommand(service, verifier, metainfo_files, sample), args
+
+
 def organize_factory(
     argv: Sequence[str], dependencies: Mapping
 ) -> CommandFactoryResult:
     client = dependencies["client"]
-    reader = dependencies["metainfo_reader"]
-    service = OrganizeService(client, reader)
+    service = OrganizeService(client)
     # parse
     from clutchless.spec import organize as organize_command
 
@@ -206,9 +377,10 @@ def dedupe_factory(argv: Sequence[str], dependencies: Mapping) -> CommandFactory
     from clutchless.spec import dedupe as dedupe_command
 
     dedupe_args = docopt(doc=dedupe_command.__doc__, argv=argv)
+    scanner = get_scanner(dependencies, dedupe_args)
     raw_folders = dedupe_args.get("<metainfo>")
     files: Sequence[MetainfoFile] = list(
-        collect_metainfo_files(reader, fs, raw_folders)
+        collect_metainfo_files(reader, fs, raw_folders, scanner)
     )
     if files:
         logger.debug(f"dedupe factory files passed to command {files}")
@@ -226,14 +398,73 @@ def prune_folder_factory(
     from clutchless.spec.prune import folder as prune_folder_command
 
     prune_args = docopt(doc=prune_folder_command.__doc__, argv=argv)
+    scanner = get_scanner(dependencies, prune_args)
     raw_folders: Sequence[str] = prune_args.get("<metainfo>")
 
     metainfo_files: Set[MetainfoFile] = set(
-        collect_metainfo_files(reader, fs, raw_folders)
+        collect_metainfo_files(reader, fs, raw_folders, scanner)
     )
     return PruneFolderCommand(service, fs, metainfo_files), prune_args
 
 
+def index_factory(argv: Sequence[str], dependencies: Mapping) -> CommandFactoryResult:
+    fs: Filesystem = dependencies["fs"]
+    from clutchless.spec import index as index_command
+
+    args = docopt(doc=index_command.__doc__, argv=argv)
+    data_index = open_data_index(fs, args.get("--index"))
+    if args.get("build"):
+        roots = get_valid_directories(fs, args.get("<data>"))
+        return IndexBuildCommand(data_index, roots), args
+    elif args.get("refresh"):
+        return IndexRefreshCommand(data_index), args
+    return IndexStatsCommand(data_index), args
+
+
+def watch_factory(argv: Sequence[str], dependencies: Mapping) -> CommandFactoryResult:
+    client = dependencies["client"]
+    fs: Filesystem = dependencies["fs"]
+    reader: MetainfoIO = dependencies["metainfo_reader"]
+    scanner: DirectoryScanner = dependencies["scanner"]
+    from clutchless.spec import watch as watch_command
+
+    args = docopt(doc=watch_command.__doc__, argv=argv)
+    metainfo_directories = get_valid_directories(fs, args.get("<metainfo>"))
+    data_directories = get_valid_directories(fs, args.get("-d"))
+    raw_interval = args.get("--poll")
+    interval = float(raw_interval) if raw_interval is not None else None
+    debounce = float(args.get("--debounce") or 2)
+
+    match_size = args.get("--match-size")
+    file_locator = IndexedFileLocator(data_directories, fs, scanner, match_size)
+    data_locator = get_data_locator(
+        fs,
+        file_locator,
+        match_size,
+        verification=parse_verification(args),
+        sample=parse_sample(args),
+        store=dependencies.get("verification_store"),
+    )
+    link_service = LinkService(
+        reader,
+        LinkDataService(client, reader),
+        dependencies.get("batch_size", BATCH_SIZE),
+    )
+    service = WatchService(
+        fs,
+        scanner,
+        reader,
+        file_locator,
+        data_locator,
+        AddService(client),
+        link_service,
+        metainfo_directories,
+        args.get("--force"),
+    )
+    watcher = get_watcher(fs, scanner, interval)
+    return WatchCommand(service, watcher, debounce), args
+
+
 def prune_client_factory(
     argv: Sequence[str], dependencies: Mapping
 ) -> CommandFactoryResult:
@@ -274,11 +505,14 @@ command_factories: DefaultDict[Any, CommandFactory] = defaultdict(
         "add": add_factory,
         "link": link_factory,
         "find": find_factory,
+        "verify": verify_factory,
         "organize": organize_factory,
         "archive": archive_factory,
         "prune": prune_factory,
         "dedupe": dedupe_factory,
         "rename": rename_factory,
+        "index": index_factory,
+        "watch": watch_factory,
     },
 )
 
@@ -0,0 +1,123 @@
+import hashlib
+from collections import defaultdict
+from pathlib import PurePath
+from typing import (
+    DefaultDict,
+    List,
+    Dict,
+    Optional,
+    Iterable,
+    Set,
+    Tuple,
+    Mapping,
+)
+
+
+def _digest(lines: List[str]) -> str:
+    value = "\n".join(sorted(lines)).encode("utf-8", "surrogateescape")
+    return hashlib.sha1(value).hexdigest()
+
+
+def directory_signature(
+    files: Iterable[Tuple[str, int]], subdirectories: Iterable[Tuple[str, str]]
+) -> Optional[str]:
+    """Hashes the names and sizes of a directory's files with the names and
+    signatures of its subdirectories, None when there's nothing to hash.
+    """
+    lines = [f"f {name} {size}" for (name, size) in files]
+    lines.extend(f"d {name} {signature}" for (name, signature) in subdirectories)
+    if len(lines) == 0:
+        return None
+    return _digest(lines)
+
+
+class TreeSignatures:
+    """Computes a signature for every directory above a set of files.
+
+    A directory's signature hashes the sorted names and sizes of its files
+    together with the names and signatures of its subdirectories, so it only
+    depends on the relative paths and sizes below it, not on its own name.
+    Directories without any files below them get no signature.
+
+    Signatures are kept between computations, and only the directories above
+    files that were added or removed since the last one are hashed again.
+    """
+
+    def __init__(self):
+        self._sizes: DefaultDict[PurePath, Dict[str, int]] = defaultdict(dict)
+        # directories with files below them, by parent
+        self._subdirectories: DefaultDict[PurePath, Set[PurePath]] = defaultdict(set)
+        self._signatures: Dict[PurePath, str] = {}
+        self._by_signature: DefaultDict[str, Set[PurePath]] = defaultdict(set)
+        # always holds the parents of a directory it holds
+        self._changed: Set[PurePath] = set()
+
+    def add_file(self, path: PurePath, size: int):
+        self._sizes[path.parent][path.name] = size
+        self._mark(path.parent)
+
+    def remove_file(self, path: PurePath) -> Optional[int]:
+        """Forgets a file, returns its size if it was known."""
+        sizes = self._sizes.get(path.parent)
+        if sizes is None:
+            return None
+        size = sizes.pop(path.name, None)
+        if len(sizes) == 0:
+            del self._sizes[path.parent]
+        self._mark(path.parent)
+        return size
+
+    def files_in(self, directory: PurePath) -> Iterable[PurePath]:
+        return [directory / name for name in self._sizes.get(directory, ())]
+
+    def files_below(self, directory: PurePath) -> Iterable[PurePath]:
+        pending = [directory]
+        while len(pending) > 0:
+            path = pending.pop()
+            yield from self.files_in(path)
+            pending.extend(self._subdirectories.get(path, ()))
+
+    def _mark(self, directory: PurePath):
+        path = directory
+        while path not in self._changed:
+            self._changed.add(path)
+            parent = path.parent
+            if parent == path:
+                break
+            self._subdirectories[parent].add(path)
+            path = parent
+
+    def _update(self):
+        # deepest directories first, so children are done before their parents
+        for path in sorted(self._changed, key=lambda p: len(p.parts), reverse=True):
+            subdirectories = self._subdirectories.get(path, set())
+            signature = directory_signature(
+                self._sizes.get(path, {}).items(),
+                (
+                    (child.name, self._signatures[child])
+                    for child in subdirectories
+                    if child in self._signatures
+                ),
+            )
+            previous = self._signatures.pop(path, None)
+            if previous is not None:
+                self._by_signature[previous].discard(path)
+                if len(self._by_signature[previous]) == 0:
+                    del self._by_signature[previous]
+            if signature is None:
+                if path.parent != path:
+                    self._subdirectories[path.parent].discard(path)
+                self._subdirectories.pop(path, None)
+            else:
+                self._signatures[path] = signature
+                self._by_signature[signature].add(path)
+        self._changed.clear()
+
+    def compute(self) -> Mapping[PurePath, str]:
+        self._update()
+        return self._signatures
+
+    def with_signature(self, signature: str) -> Set[PurePath]:
+        """Returns every directory whose signature equals 'signature'."""
+        self._update()
+        return self._by_signature.get(signature, set())
@@ -1,10 +1,27 @@
+import functools
+import sys
+from array import array
 from dataclasses import dataclass
-from pathlib import Path
-from typing import Sequence, Mapping, MutableMapping, Iterable
+from pathlib import Path, PurePath
+from typing import (
+    Sequence,
+    Mapping,
+    MutableMapping,
+    Iterable,
+    Iterator,
+    Optional,
+    Tuple,
+    Callable,
+    TypeVar,
+)
+
+from clutchless.domain.signature import TreeSignatures
 
 
 @dataclass
 class TorrentFile:
+    __slots__ = ("path", "length")
+
     path: Path
     length: int
 
@@ -14,12 +31,84 @@ def convert_file(file: Mapping) -> TorrentFile:
     return TorrentFile(Path(*file["path"]), file["length"])
 
 
+def _intern(part):
+    return sys.intern(part) if isinstance(part, str) else part
+
+
+class FileColumns:
+    """The files of a multi-file torrent, stored compactly: path components are
+    interned (the same directory names repeat across files and torrents) and
+    lengths are kept in an array.
+    """
+
+    __slots__ = ("parts", "lengths")
+
+    def __init__(self, files: Iterable[Mapping]):
+        parts = []
+        self.lengths = array("q")
+        for file in files:
+            parts.append(tuple(_intern(part) for part in file["path"]))
+            self.lengths.append(file["length"])
+        self.parts: Tuple[Tuple[str, ...], ...] = tuple(parts)
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def __iter__(self) -> Iterator[Tuple[Tuple[str, ...], int]]:
+        return zip(self.parts, self.lengths)
+
+
+T = TypeVar("T")
+
+
+def memoized(method: Callable[..., T]) -> property:
+    """Makes a read-only property that's computed on first access and then kept
+    (in an attribute named with a leading underscore, which slotted classes declare).
+    """
+    attribute = f"_{method.__name__}"
+
+    @functools.wraps(method)
+    def getter(self) -> T:
+        try:
+            return getattr(self, attribute)
+        except AttributeError:
+            value = method(self)
+            setattr(self, attribute, value)
+            return value
+
+    return property(getter)
+
+
 class MetainfoFile:
+    """A metainfo file, holding only what's needed to find and check its data.
+
+    'info' may leave out 'pieces' when 'load_pieces' is given, and then piece
+    hashes are only loaded (and kept) once something asks for them.
+    """
+
     PROPERTIES = ["name", "info_hash"]
 
-    def __init__(self, properties: MutableMapping, path: Path = None):
+    __slots__ = (
+        "path",
+        "_properties",
+        "_load_pieces",
+        "_pieces",
+        "_columns",
+        "_files",
+        "_length",
+        "_signature",
+        "_is_single_file",
+    )
+
+    def __init__(
+        self,
+        properties: MutableMapping,
+        path: Path = None,
+        load_pieces: Callable[[], bytes] = None,
+    ):
         self.path = path
         self._properties = properties
+        self._load_pieces = load_pieces
 
     @property
     def name(self) -> str:
@@ -29,17 +118,86 @@ class MetainfoFile:
     def info_hash(self) -> str:
         return self._properties["info_hash"]
 
-    @property
+    @memoized
+    def columns(self) -> FileColumns:
+        """The compact file list, see 'files'."""
+        return FileColumns(self.info.get("files", list()))
+
+    @memoized
     def files(self) -> Sequence[TorrentFile]:
-        """These are defined relative a directory named by 'name' property, i.e. data_location/torrent_name/{file...}"""
-        files = self.info.get("files", list())
-        return [convert_file(file) for file in files]
+        """These are defined relative a directory named by 'name' property, i.e. data_location/torrent_name/{file...}
+        They're built from 'columns' on first access.
+        """
+        return [TorrentFile(Path(*parts), length) for parts, length in self.columns]
+
+    @memoized
+    def length(self) -> int:
+        """Total size in bytes of the torrent's data."""
+        if self.is_single_file:
+            return self.info["length"]
+        return sum(self.columns.lengths)
+
+    @property
+    def piece_length(self) -> int:
+        return self.info["piece length"]
+
+    @memoized
+    def pieces(self) -> bytes:
+        """The concatenated SHA-1 digests of all pieces, info['pieces']."""
+        if "pieces" not in self.info and self._load_pieces is not None:
+            return self._load_pieces()
+        return bytes(self.info["pieces"])
+
+    def piece_hash(self, index: int) -> bytes:
+        """Returns the SHA-1 digest of a piece."""
+        return self.pieces[index * 20 : (index + 1) * 20]
+
+    def piece_span(self, index: int) -> Tuple[int, int]:
+        """Returns the start and end offsets of a piece in the torrent's data."""
+        start = index * self.piece_length
+        return start, min(start + self.piece_length, self.length)
+
+    def spans(self, name: str = None) -> Iterable[Tuple[Path, int, int]]:
+        """Yields every file's path (below its location), offset and length.
+        'name' overrides the torrent name.
+        """
+        name = name or self.name
+        if self.is_single_file:
+            yield Path(name), 0, self.length
+            return
+        offset = 0
+        for (parts, length) in self.columns:
+            yield Path(name, *parts), offset, length
+            offset += length
+
+    def whole_pieces(self, offset: int, length: int) -> range:
+        """Returns the indices of the pieces that lie entirely within a span of data."""
+        end = offset + length
+        first = -(-offset // self.piece_length)
+        last = end // self.piece_length
+        if end == self.length and end % self.piece_length > 0:
+            # the final piece is shorter and ends with the data
+            last += 1
+        return range(first, max(first, last))
+
+    @memoized
+    def signature(self) -> Optional[str]:
+        """Signature of the torrent's top directory, as scanned data directories get.
+        Single-file torrents have none.
+        """
+        if self.is_single_file:
+            return None
+        root = PurePath(self.name)
+        signatures = TreeSignatures()
+        for (parts, length) in self.columns:
+            signatures.add_file(root.joinpath(*parts), length)
+        return signatures.compute().get(root)
 
     @property
     def info(self) -> Mapping:
         return self._properties["info"]
 
-    @property
+    @memoized
     def is_single_file(self) -> bool:
         """Returns whether a torrent is a single-file (flat file structure) torrent.
         reference: https://www.bittorrent.org/beps/bep_0003.html
@@ -69,12 +227,13 @@ class MetainfoFile:
         """
         return path / self.name
 
-    def needed_files(self, path: Path) -> Iterable[Path]:
-        filepath = path / self.name
+    def needed_files(self, path: Path, name: str = None) -> Iterable[Path]:
+        """Returns data paths below 'path', where 'name' overrides the torrent name."""
+        filepath = path / (name or self.name)
         if self.is_single_file:
             yield filepath
         else:
-            yield from (filepath / file.path for file in self.files)
+            yield from (filepath.joinpath(*parts) for parts in self.columns.parts)
 
     def __str__(self):
         return f"{self.name}"
@@ -7,16 +7,26 @@ Options:
     -a <address>, --address <address>   Address for Transmission (default is http://localhost:9091/transmission/rpc).
     -h, --help  Show this screen.
     -v, --verbose   Verbose terminal output (multiple -v increase verbosity).
+    --scan-threads <count>  Threads that list directories while searching for files [default: 8].
+    --device-scans <count>  Directories listed at the same time on each disk or mount [default: 2].
+    --cache-metainfo    Remember parsed metainfo files (until they change) in ~/.cache/clutchless/metainfo.sqlite.
+    --cache-verification    Remember data that hashed correctly (until its files change) in ~/.cache/clutchless/verified.sqlite.
+    -j <count>, --jobs <count>  Processes that parse metainfo files [default: 1].
+    --batch-size <count>    Most torrents changed with one request to Transmission [default: 500].
+    --rpc-connections <count>   Torrents added at the same time by `add --yes`, over connections kept open [default: 1].
 
 The available clutchless commands are:
     add         Add metainfo files to Transmission (with or without data).
     find        Locate data that belongs to metainfo files.
+    verify      Hash the data of metainfo files and report how much of it is complete.
     link        For torrents with missing data in Transmission, find the data and set the location.
     archive     Copy metainfo files from Transmission for backup.
     organize    Migrate torrents to a new location, sorting them into separate folders for each tracker.
     prune       Clean up things in different contexts (files, torrents, etc.).
     dedupe      Delete duplicate metainfo files from paths.
     rename      Changes the name of metainfo files based on metainfo (torrent name and info hash).
+    index       Manage a persistent index of data directories for find and link.
+    watch       Keep adding new metainfo files and linking torrents to new data as they appear.
 
 See 'clutchless help <command>' for more information on a specific command.
 
@@ -26,16 +36,39 @@ import logging
 import os
 import sys
 from pathlib import Path
-from typing import Mapping, Any
+from typing import Mapping, Any, Optional
 
 from colorama import init, deinit
 from docopt import docopt
 
 from clutchless.command.command import CommandOutput
 from clutchless.configuration import CommandCreator, command_factories
-from clutchless.external.filesystem import DefaultFilesystem, SingleDirectoryFileLocator
-from clutchless.external.metainfo import DefaultMetainfoIO
-from clutchless.external.transmission import clutch_factory, ClutchApi
+from clutchless.external.filesystem import (
+    DefaultFilesystem,
+    SingleDirectoryFileLocator,
+    DirectoryScanner,
+)
+from clutchless.external.cache import (
+    CachingMetainfoIO,
+    VerificationCache,
+    default_cache_path,
+    default_verification_cache_path,
+)
+from clutchless.external.metainfo import (
+    DefaultMetainfoIO,
+    MetainfoIO,
+    ParallelMetainfoIO,
+    VerificationStore,
+)
+from clutchless.external.rpc import AsyncRpcClient, DEFAULT_ADDRESS
+from clutchless.spec.shared import OptionError
+from clutchless.external.transmission import (
+    clutch_factory,
+    ClutchApi,
+    AsyncTransmissionApi,
+    AsyncRpcApi,
+    BATCH_SIZE,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -52,12 +85,19 @@ class Application:
         except asyncio.CancelledError:
             print("Cancelled task")
             return
+        except OptionError as e:
+            print(e)
+            return
         except ValueError as e:
             found_does_not_exist = next(
-                value for value in e.args if "does not exist" in value
+                (
+                    value
+                    for value in e.args
+                    if isinstance(value, str) and "does not exist" in value
+                ),
+                None,
             )
-            if found_does_not_exist:
-                print(found_does_not_exist)
+            print(found_does_not_exist or e)
             return
         except Exception as e:
             logger.warning(e, exc_info=True)
@@ -102,14 +142,71 @@ def get_file_handler() -> logging.FileHandler:
     return file_handler
 
 
+def get_scanner(fs: DefaultFilesystem, args: Mapping) -> DirectoryScanner:
+    workers = int(args.get("--scan-threads") or 8)
+    per_device = int(args.get("--device-scans") or 2)
+    if workers < 1 or per_device < 1:
+        raise ValueError("--scan-threads and --device-scans must be at least 1")
+    return DirectoryScanner(fs, workers, per_device)
+
+
+def get_metainfo_reader(fs: DefaultFilesystem, args: Mapping) -> MetainfoIO:
+    jobs = int(args.get("--jobs") or 1)
+    if jobs < 1:
+        raise ValueError("--jobs must be at least 1")
+    reader: MetainfoIO = DefaultMetainfoIO()
+    if jobs > 1:
+        reader = ParallelMetainfoIO(reader, jobs)
+    if args.get("--cache-metainfo"):
+        return CachingMetainfoIO(reader, fs, default_cache_path())
+    return reader
+
+
+def get_verification_store(args: Mapping) -> Optional[VerificationStore]:
+    if args.get("--cache-verification"):
+        return VerificationCache(default_verification_cache_path())
+    return None
+
+
+def get_batch_size(args: Mapping) -> int:
+    batch_size = int(args.get("--batch-size") or BATCH_SIZE)
+    if batch_size < 1:
+        raise ValueError("--batch-size must be at least 1")
+    return batch_size
+
+
+def get_client(args: Mapping) -> ClutchApi:
+    return ClutchApi(clutch_factory(args), batch_size=get_batch_size(args))
+
+
+def get_rpc_connections(args: Mapping) -> int:
+    connections = int(args.get("--rpc-connections") or 1)
+    if connections < 1:
+        raise ValueError("--rpc-connections must be at least 1")
+    return connections
+
+
+def get_async_api(args: Mapping) -> Optional[AsyncTransmissionApi]:
+    connections = get_rpc_connections(args)
+    if connections == 1:
+        return None
+    address = args.get("--address") or DEFAULT_ADDRESS
+    return AsyncRpcApi(AsyncRpcClient(address, connections))
+
+
 def get_dependencies(args: Mapping) -> Mapping[str, Any]:
-    clutch_client = clutch_factory(args)
     fs = DefaultFilesystem()
+    scanner = get_scanner(fs, args)
     return {
-        "client": ClutchApi(clutch_client),
+        "client": get_client(args),
         "fs": fs,
-        "locator": SingleDirectoryFileLocator(fs),
-        "metainfo_reader": DefaultMetainfoIO(),
+        "locator": SingleDirectoryFileLocator(fs, scanner=scanner),
+        "metainfo_reader": get_metainfo_reader(fs, args),
+        "scanner": scanner,
+        "verification_store": get_verification_store(args),
+        "async_api": get_async_api(args),
+        "rpc_connections": get_rpc_connections(args),
+        "batch_size": get_batch_size(args),
     }
 
 
@@ -0,0 +1,196 @@
+"""Bencode decoding over the original bytes, as metainfo files are stored.
+reference: https://www.bittorrent.org/beps/bep_0003.html#bencoding
+"""
+from collections.abc import Mapping
+from typing import Any, Tuple, FrozenSet, Optional, Iterator, MutableMapping
+
+# values of these keys are binary, they're returned as views of the data
+RAW_KEYS = frozenset({"pieces"})
+
+
+class BencodeError(ValueError):
+    pass
+
+
+class _Encoded:
+    """A value that's left encoded until it's looked up."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+class LazyDict(Mapping):
+    """A decoded dictionary whose values for some keys stay encoded, and are
+    decoded each time they're looked up. Encoded values are copies, so they
+    don't keep the rest of the file in memory.
+    """
+
+    def __init__(
+        self, values: MutableMapping[str, Any], raw_keys: FrozenSet[str] = RAW_KEYS
+    ):
+        self._values = values
+        self._raw_keys = raw_keys
+
+    @classmethod
+    def with_encoded(
+        cls, values: Mapping, encoded: Mapping[str, bytes], raw_keys=RAW_KEYS
+    ) -> "LazyDict":
+        """Makes a LazyDict from decoded values and still encoded ones."""
+        merged = dict(values)
+        merged.update((key, _Encoded(data)) for (key, data) in encoded.items())
+        return cls(merged, raw_keys)
+
+    def encoded(self, key: str) -> Optional[bytes]:
+        """Returns a value as it was encoded, if it wasn't decoded."""
+        value = self._values.get(key)
+        return value.data if isinstance(value, _Encoded) else None
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._values[key]
+        if isinstance(value, _Encoded):
+            return decode(value.data, self._raw_keys)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __repr__(self):
+        return f"LazyDict({dict(self)!r})"
+
+
+class _Decoder:
+    def __init__(
+        self,
+        data: bytes,
+        raw_keys: FrozenSet[str],
+        lazy_keys: FrozenSet[str] = frozenset(),
+        skip_keys: FrozenSet[str] = frozenset(),
+    ):
+        self.data = data
+        self.view = memoryview(data)
+        self.raw_keys = raw_keys
+        self.lazy_keys = lazy_keys
+        self.skip_keys = skip_keys
+
+    def _integer(self, start: int, end_char: bytes) -> Tuple[int, int]:
+        end = self.data.find(end_char, start)
+        if end < 0:
+            raise BencodeError(f"unterminated integer at {start}")
+        try:
+            return int(self.data[start:end]), end + 1
+        except ValueError:
+            raise BencodeError(f"invalid integer at {start}") from None
+
+    def string(self, offset: int) -> Tuple[memoryview, int]:
+        length, start = self._integer(offset, b":")
+        end = start + length
+        if length < 0 or end > len(self.data):
+            raise BencodeError(f"string at {offset} runs past the end")
+        return self.view[start:end], end
+
+    def value(self, offset: int, raw: bool = False) -> Tuple[Any, int]:
+        try:
+            kind = self.data[offset]
+        except IndexError:
+            raise BencodeError("unexpected end of data") from None
+        if kind == 0x64:  # d
+            result = {}
+            is_lazy = False
+            offset += 1
+            while self.data[offset : offset + 1] != b"e":
+                key, offset = self.string(offset)
+                key = self.text(key)
+                if key in self.skip_keys:
+                    offset = self.skip(offset)
+                elif key in self.lazy_keys:
+                    end = self.skip(offset)
+                    result[key] = _Encoded(self.data[offset:end])
+                    is_lazy = True
+                    offset = end
+                else:
+                    result[key], offset = self.value(offset, key in self.raw_keys)
+            if is_lazy:
+                return LazyDict(result, self.raw_keys), offset + 1
+            return result, offset + 1
+        if kind == 0x6C:  # l
+            items = []
+            offset += 1
+            while self.data[offset : offset + 1] != b"e":
+                item, offset = self.value(offset)
+                items.append(item)
+            return items, offset + 1
+        if kind == 0x69:  # i
+            return self._integer(offset + 1, b"e")
+        if 0x30 <= kind <= 0x39:  # 0-9
+            string, offset = self.string(offset)
+            return (string if raw else self.text(string)), offset
+        raise BencodeError(f"unexpected {chr(kind)!r} at {offset}")
+
+    def skip(self, offset: int) -> int:
+        """Returns where the value at 'offset' ends, without decoding it."""
+        try:
+            kind = self.data[offset]
+        except IndexError:
+            raise BencodeError("unexpected end of data") from None
+        if kind == 0x64 or kind == 0x6C:  # d or l
+            offset += 1
+            while self.data[offset : offset + 1] != b"e":
+                offset = self.skip(offset)
+            return offset + 1
+        if kind == 0x69:  # i
+            return self._integer(offset + 1, b"e")[1]
+        if 0x30 <= kind <= 0x39:  # 0-9
+            return self.string(offset)[1]
+        raise BencodeError(f"unexpected {chr(kind)!r} at {offset}")
+
+    @staticmethod
+    def text(string: memoryview):
+        """Strings are decoded as UTF-8 where they can be, otherwise kept as bytes."""
+        try:
+            return str(string, "utf-8")
+        except UnicodeDecodeError:
+            return bytes(string)
+
+
+def decode(data: bytes, raw_keys: FrozenSet[str] = RAW_KEYS) -> Any:
+    """Decodes a bencoded value.
+    The values of 'raw_keys' are memoryviews of 'data' rather than copies.
+    """
+    value, end = _Decoder(data, raw_keys).value(0)
+    if end != len(data):
+        raise BencodeError(f"trailing data at {end}")
+    return value
+
+
+def decode_metainfo(
+    data: bytes,
+    raw_keys: FrozenSet[str] = RAW_KEYS,
+    lazy_keys: FrozenSet[str] = frozenset(),
+    skip_keys: FrozenSet[str] = frozenset(),
+) -> Tuple[dict, Optional[memoryview]]:
+    """Decodes a metainfo file's top-level dictionary, and returns it with the
+    encoded 'info' value (as it was in the file, for hashing).
+    Values of 'lazy_keys' are only decoded once they're looked up (see LazyDict),
+    values of 'skip_keys' are left out.
+    """
+    decoder = _Decoder(data, raw_keys, lazy_keys, skip_keys)
+    if data[:1] != b"d":
+        raise BencodeError("metainfo must be a dictionary")
+    result = {}
+    info = None
+    offset = 1
+    while data[offset : offset + 1] != b"e":
+        key, offset = decoder.string(offset)
+        key = decoder.text(key)
+        start = offset
+        result[key], offset = decoder.value(offset, key in raw_keys)
+        if key == "info":
+            info = decoder.view[start:offset]
+    if offset + 1 != len(data):
+        raise BencodeError(f"trailing data at {offset + 1}")
+    return result, info
@@ -0,0 +1,233 @@
+import functools
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional, Tuple, Iterable, Sequence, MutableMapping, Set
+
+from clutchless.domain.torrent import MetainfoFile
+from clutchless.external.bencode import LazyDict
+from clutchless.external.filesystem import Filesystem, FileEntry
+from clutchless.external.index import default_index_path
+from clutchless.external.metainfo import MetainfoIO, VerificationStore, Verification
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metainfo (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    name,
+    info_hash TEXT,
+    piece_length INTEGER,
+    length INTEGER,
+    files BLOB
+);
+"""
+
+# bumped when what's stored changes, older caches are emptied
+VERSION = 1
+
+VERIFIED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS verified (
+    info_hash TEXT NOT NULL,
+    path TEXT NOT NULL,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    PRIMARY KEY (info_hash, path)
+);
+"""
+
+VERIFIED_VERSION = 1
+
+MetainfoRow = Tuple[str, int, int, object, str, Optional[int], Optional[int], bytes]
+
+
+def default_cache_path() -> Path:
+    return default_index_path().with_name("metainfo.sqlite")
+
+
+def default_verification_cache_path() -> Path:
+    return default_index_path().with_name("verified.sqlite")
+
+
+def _connect(path: Path, schema: str, version: int, table: str) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # every entry is committed on its own, WAL keeps that from syncing each time;
+    # worker threads use the connection too (see AddPipeline), behind a lock
+    connection = sqlite3.connect(
+        str(path), isolation_level=None, check_same_thread=False
+    )
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA synchronous = NORMAL")
+    (current,) = connection.execute("PRAGMA user_version").fetchone()
+    if current != version:
+        connection.execute(f"DROP TABLE IF EXISTS {table}")
+        connection.execute(f"PRAGMA user_version = {version}")
+    connection.executescript(schema)
+    return connection
+
+
+class CachingMetainfoIO(MetainfoIO):
+    """Remembers what was parsed from metainfo files in a local SQLite database.
+
+    Entries are keyed by path and only used while the file's size and mtime are
+    unchanged. They hold the name, info hash, piece length and either the length
+    of a single-file torrent or the (still encoded) file list of a multi-file one;
+    piece hashes are read from the file when they're needed.
+    """
+
+    def __init__(self, reader: MetainfoIO, fs: Filesystem, path: Path):
+        self.reader = reader
+        self.fs = fs
+        self.path = path
+        self.connection = _connect(path, SCHEMA, VERSION, "metainfo")
+        self.lock = threading.Lock()
+
+    def close(self):
+        self.connection.close()
+
+    def from_path(self, path: Path) -> MetainfoFile:
+        entry = self.fs.stat(path)
+        row = self._lookup(path, entry)
+        if row is not None:
+            return self._to_file(path, row)
+        file = self.reader.from_path(path)
+        self._store(file, entry)
+        return file
+
+    def from_paths(self, paths: Iterable[Path]) -> Sequence[MetainfoFile]:
+        """Looks up every path, and reads the files that missed all at once."""
+        results: MutableMapping[Path, MetainfoFile] = {}
+        stale: MutableMapping[Path, FileEntry] = {}
+        paths = list(paths)
+        for path in paths:
+            entry = self.fs.stat(path)
+            row = self._lookup(path, entry)
+            if row is None:
+                stale[path] = entry
+            else:
+                results[path] = self._to_file(path, row)
+        for file in self.reader.from_paths(stale.keys()):
+            self._store(file, stale[file.path])
+            results[file.path] = file
+        return [results[path] for path in paths]
+
+    def _lookup(self, path: Path, entry: FileEntry) -> Optional[MetainfoRow]:
+        with self.lock:
+            return self.connection.execute(
+                "SELECT * FROM metainfo WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (str(path), entry.size, entry.mtime_ns),
+            ).fetchone()
+
+    def _store(self, file: MetainfoFile, entry: FileEntry):
+        row = self._to_row(file, entry.size, entry.mtime_ns)
+        if row is not None:
+            with self.lock:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO metainfo VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    row,
+                )
+
+    def _to_file(self, path: Path, row: MetainfoRow) -> MetainfoFile:
+        (_, _, _, name, info_hash, piece_length, length, files) = row
+        values = {"name": name, "piece length": piece_length}
+        if files is None:
+            values["length"] = length
+            info = values
+        else:
+            info = LazyDict.with_encoded(values, {"files": files})
+        properties = {"name": name, "info_hash": info_hash, "info": info}
+        load_pieces = functools.partial(self.reader.read_pieces, path, info_hash)
+        return MetainfoFile(properties, path, load_pieces)
+
+    @staticmethod
+    def _to_row(file: MetainfoFile, size: int, mtime_ns: int) -> Optional[MetainfoRow]:
+        info = file.info
+        files = info.encoded("files") if isinstance(info, LazyDict) else None
+        if file.info_hash is None or files is None and "length" not in info:
+            # file lists are stored as DefaultMetainfoIO leaves them, still encoded
+            return None
+        return (
+            str(file.path),
+            size,
+            mtime_ns,
+            file.name,
+            file.info_hash,
+            info.get("piece length"),
+            info.get("length"),
+            files,
+        )
+
+    def read_pieces(self, path: Path, info_hash: str) -> bytes:
+        return self.reader.read_pieces(path, info_hash)
+
+    def get_bytes(self, path: Path) -> bytes:
+        return self.reader.get_bytes(path)
+
+    def write_bytes(self, value: bytes, path: Path):
+        self.reader.write_bytes(value, path)
+
+
+class VerificationCache(VerificationStore):
+    """Remembers the files of torrent data that hashed correctly, in a local SQLite
+    database.
+
+    Entries are keyed by info hash and path, and only used while the file's inode,
+    size and mtime are unchanged, so data that's checked again only has the pieces
+    of new or modified files hashed. Each entry keeps the level the file reached,
+    and only answers checks at that level or a less thorough one.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.connection = _connect(path, VERIFIED_SCHEMA, VERIFIED_VERSION, "verified")
+        self.lock = threading.Lock()
+
+    def close(self):
+        self.connection.close()
+
+    def verified(
+        self, info_hash: str, entries: Sequence[FileEntry], verification: Verification
+    ) -> Set[int]:
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT path, inode, size, mtime_ns FROM verified"
+                " WHERE info_hash = ? AND level >= ?",
+                (info_hash, int(verification)),
+            ).fetchall()
+        identities = {path: identity for (path, *identity) in rows}
+        return {
+            index
+            for (index, entry) in enumerate(entries)
+            if identities.get(str(entry.path))
+            == [entry.inode, entry.size, entry.mtime_ns]
+        }
+
+    def store(
+        self, info_hash: str, entries: Sequence[FileEntry], verification: Verification
+    ):
+        rows = [
+            (
+                info_hash,
+                str(entry.path),
+                entry.inode,
+                entry.size,
+                entry.mtime_ns,
+                int(verification),
+            )
+            for entry in entries
+        ]
+        with self.lock:
+            self.connection.execute("BEGIN")
+            try:
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO verified VALUES (?, ?, ?, ?, ?, ?)", rows
+                )
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
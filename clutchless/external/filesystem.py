@@ -1,25 +1,53 @@
 import asyncio
+import errno
 import logging
 import os
 from asyncio import Task
-from collections import deque
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from fnmatch import fnmatch
 from itertools import chain
 from pathlib import Path
 from shutil import copy, SameFileError
+from stat import S_ISDIR, S_ISREG
 from typing import (
     Protocol,
     Iterable,
     Optional,
     Tuple,
-    Deque,
     AsyncGenerator,
+    Set,
+    DefaultDict,
+    cast,
+    Sequence,
+    MutableMapping,
+    Dict,
 )
+from weakref import WeakKeyDictionary
 
+from clutchless.domain.signature import TreeSignatures
 from clutchless.stream import combine
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class FileEntry:
+    """A directory entry with the type and stat information gathered while listing it."""
+
+    path: Path
+    is_dir: bool
+    is_file: bool
+    size: int = 0
+    mtime_ns: int = 0
+    device: int = 0
+    # 0 where the filesystem doesn't report inode numbers
+    inode: int = 0
+    links: int = 1
+    is_symlink: bool = False
+
+
 class Filesystem(Protocol):
     def rename(self, path: Path, name: str):
         raise NotImplementedError
@@ -48,6 +76,24 @@ class Filesystem(Protocol):
     def children(self, path: Path) -> Iterable[Path]:
         raise NotImplementedError
 
+    def scan(self, path: Path) -> Iterable[FileEntry]:
+        """Lists the entries directly below a directory, empty if it can't be listed."""
+        raise NotImplementedError
+
+    def stat(self, path: Path) -> FileEntry:
+        """Raises FileNotFoundError when nothing exists at path."""
+        raise NotImplementedError
+
+    def read_bytes(self, path: Path, offset: int, size: int) -> bytes:
+        """Reads at most 'size' bytes of a file, starting at 'offset'."""
+        raise NotImplementedError
+
+    def unfilled_size(self, path: Path) -> int:
+        """Returns how many bytes of a file were never written: holes in sparse
+        files and preallocated space, where the filesystem can tell.
+        """
+        raise NotImplementedError
+
     def remove(self, path: Path):
         raise NotImplementedError
 
@@ -95,15 +141,89 @@ class DefaultFilesystem(Filesystem):
         return path.is_file()
 
     def children(self, path: Path) -> Iterable[Path]:
+        return (entry.path for entry in self.scan(path))
+
+    def scan(self, path: Path) -> Iterable[FileEntry]:
         try:
-            if self.is_directory(path):
-                entries = os.listdir(path)
+            with os.scandir(path) as entries:
                 for entry in entries:
-                    full_entry = path / entry
-                    if self.exists(full_entry):
-                        yield full_entry
-        except PermissionError:
-            pass
+                    try:
+                        yield self._to_file_entry(path, entry)
+                    except OSError as e:
+                        # vanished since listing, a dangling or looping symlink
+                        # (ELOOP) or unreadable, it can't be used either way
+                        logger.debug(f"skipping {path / entry.name}: {e}")
+        except OSError as e:
+            logger.debug(f"can't list {path}: {e}")
+
+    def stat(self, path: Path) -> FileEntry:
+        result = os.stat(path)
+        return FileEntry(
+            path,
+            S_ISDIR(result.st_mode),
+            S_ISREG(result.st_mode),
+            result.st_size,
+            result.st_mtime_ns,
+            result.st_dev,
+            result.st_ino,
+            result.st_nlink,
+            os.path.islink(path),
+        )
+
+    def read_bytes(self, path: Path, offset: int, size: int) -> bytes:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            return f.read(size)
+
+    def unfilled_size(self, path: Path) -> int:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            size = os.fstat(fd).st_size
+            if hasattr(os, "SEEK_DATA"):
+                try:
+                    return self._seek_holes(fd, size)
+                except OSError as e:
+                    if e.errno != errno.EINVAL:
+                        raise
+                    # the filesystem doesn't support seeking holes
+            # less exact: compressed data also takes fewer blocks than its size
+            blocks = getattr(os.fstat(fd), "st_blocks", None)
+            return 0 if blocks is None else max(0, size - blocks * 512)
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _seek_holes(fd: int, size: int) -> int:
+        # unwritten (preallocated) extents are holes to SEEK_DATA on ext4, xfs and btrfs
+        unfilled, offset = 0, 0
+        while offset < size:
+            try:
+                data = os.lseek(fd, offset, os.SEEK_DATA)
+            except OSError as e:
+                if e.errno == errno.ENXIO:
+                    # nothing but a hole up to the end
+                    return unfilled + size - offset
+                raise
+            unfilled += data - offset
+            offset = os.lseek(fd, data, os.SEEK_HOLE)
+        return unfilled
+
+    @staticmethod
+    def _to_file_entry(parent: Path, entry: os.DirEntry) -> FileEntry:
+        # is_dir and is_file are answered from d_type, stat is cached on the entry
+        # both follow symlinks, so a link is described by what it points to
+        stat = entry.stat()
+        return FileEntry(
+            parent / entry.name,
+            entry.is_dir(),
+            entry.is_file(),
+            stat.st_size,
+            stat.st_mtime_ns,
+            stat.st_dev,
+            stat.st_ino,
+            stat.st_nlink,
+            entry.is_symlink(),
+        )
 
     def remove(self, path: Path):
         path.unlink()
@@ -117,6 +237,159 @@ class DryRunFilesystem(DefaultFilesystem):
         pass
 
 
+@dataclass(frozen=True)
+class ScanRules:
+    """Limits what a walk descends into.
+    Excluded entries are skipped with everything below them, so they're never listed.
+    With 'unique_inodes' set, a file with several hard links is reported only once.
+    """
+
+    exclude: Sequence[str] = ()
+    max_depth: Optional[int] = None
+    one_file_system: bool = False
+    follow_symlinks: bool = True
+    unique_inodes: bool = False
+
+    def is_excluded(self, path: Path) -> bool:
+        return any(
+            fnmatch(path.name, pattern) or fnmatch(str(path), pattern)
+            for pattern in self.exclude
+        )
+
+    def descends(self, entry: FileEntry, depth: int, root_device: int) -> bool:
+        """Returns whether a directory 'depth' levels below its root is listed."""
+        if self.max_depth is not None and depth > self.max_depth:
+            return False
+        if entry.is_symlink and not self.follow_symlinks:
+            return False
+        return not self.one_file_system or entry.device == root_device
+
+
+class DirectoryScanner:
+    """Lists directories on a bounded thread pool, so scanning doesn't block the event loop.
+
+    At most 'per_device' directories are listed at once on each device (st_dev),
+    which lets separate disks and mounts be scanned in parallel without
+    thrashing a single spinning disk.
+    """
+
+    def __init__(
+        self,
+        fs: Filesystem,
+        workers: int = 8,
+        per_device: int = 2,
+        rules: ScanRules = None,
+    ):
+        self.fs = fs
+        self.workers = workers
+        self.per_device = per_device
+        self.rules = rules or ScanRules()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # semaphores belong to an event loop, so they're kept per loop
+        self._semaphores: MutableMapping[
+            asyncio.AbstractEventLoop, Dict[int, asyncio.Semaphore]
+        ] = WeakKeyDictionary()
+
+    def with_rules(self, rules: ScanRules) -> "DirectoryScanner":
+        return DirectoryScanner(self.fs, self.workers, self.per_device, rules)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self.workers, thread_name_prefix="clutchless-scan"
+            )
+        return self._executor
+
+    def _get_semaphore(self, device: int) -> asyncio.Semaphore:
+        loop = asyncio.get_event_loop()
+        semaphores = self._semaphores.setdefault(loop, {})
+        try:
+            return semaphores[device]
+        except KeyError:
+            semaphore = asyncio.Semaphore(self.per_device)
+            semaphores[device] = semaphore
+            return semaphore
+
+    def _list(self, path: Path) -> Sequence[FileEntry]:
+        return list(self.fs.scan(path))
+
+    async def stat(self, path: Path) -> FileEntry:
+        loop = asyncio.get_event_loop()
+        try:
+            return await loop.run_in_executor(self._get_executor(), self.fs.stat, path)
+        except OSError as e:
+            # missing, a looping symlink or unreadable
+            logger.debug(f"can't stat {path}: {e}")
+            return FileEntry(path, False, False)
+
+    async def device(self, path: Path) -> int:
+        entry = await self.stat(path)
+        return entry.device
+
+    async def scan(self, path: Path, device: int = 0) -> Sequence[FileEntry]:
+        loop = asyncio.get_event_loop()
+        async with self._get_semaphore(device):
+            return await loop.run_in_executor(self._get_executor(), self._list, path)
+
+    async def walk(self, roots: Iterable[Path]) -> AsyncGenerator[FileEntry, None]:
+        """Yields every entry below the roots that the scan rules allow,
+        listing directories concurrently.
+
+        Directories are identified by device and inode, so each one is listed once
+        however many symlinks, bind mounts or overlapping roots lead to it, and
+        symlinks pointing back up the tree can't make the walk loop.
+        """
+        rules = self.rules
+        pending: Set[asyncio.Future] = set()
+        # depth below the root and the root's device, for every listing
+        origins: Dict[asyncio.Future, Tuple[int, int]] = {}
+        visited: Set[Tuple[int, int]] = set()
+
+        def is_first_visit(entry: FileEntry) -> bool:
+            if entry.inode == 0:
+                return True
+            key = (entry.device, entry.inode)
+            if key in visited:
+                return False
+            visited.add(key)
+            return True
+
+        def submit(path: Path, device: int, depth: int, root_device: int):
+            future = asyncio.ensure_future(self.scan(path, device))
+            origins[future] = (depth, root_device)
+            pending.add(future)
+
+        try:
+            for root in roots:
+                root_entry = await self.stat(root)
+                if is_first_visit(root_entry):
+                    submit(root, root_entry.device, 0, root_entry.device)
+            while len(pending) > 0:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for future in done:
+                    depth, root_device = origins.pop(future)
+                    for entry in future.result():
+                        if rules.is_excluded(entry.path):
+                            continue
+                        if entry.is_dir:
+                            if rules.descends(
+                                entry, depth + 1, root_device
+                            ) and is_first_visit(entry):
+                                submit(entry.path, entry.device, depth + 1, root_device)
+                        elif (
+                            rules.unique_inodes
+                            and entry.links > 1
+                            and not is_first_visit(entry)
+                        ):
+                            continue
+                        yield entry
+        finally:
+            for future in pending:
+                future.cancel()
+
+
 class FileLocator(Protocol):
     def roots(self) -> Iterable[Path]:
         raise NotImplementedError
@@ -133,13 +406,16 @@ class FileLocator(Protocol):
 
 
 class SingleDirectoryFileLocator(FileLocator):
-    def __init__(self, fs: Filesystem, path: Path = None):
+    def __init__(
+        self, fs: Filesystem, path: Path = None, scanner: DirectoryScanner = None
+    ):
         self.fs = fs
         if path is None:
             path = fs.root()
         if fs.is_file(path):
             raise ValueError(f"path {path} must be a directory")
         self.path = path
+        self.scanner = scanner or DirectoryScanner(fs)
 
     def roots(self) -> Iterable[Path]:
         yield self.path
@@ -160,51 +436,32 @@ class SingleDirectoryFileLocator(FileLocator):
         parents_of_wanted_paths = map(lambda pair: Path(pair[0]).parent, wanted_pairs)
         return next(parents_of_wanted_paths, None)
 
-    async def locate_directory(self, name: str) -> Optional[Path]:
-        queue: Deque[Path] = deque()
-        queue.append(self.path)
-        while len(queue) > 0:
-            try:
-                await asyncio.sleep(0)
-            except asyncio.CancelledError:
-                return None
-            item = queue.pop()
-            child_directories = (
-                child for child in self.fs.children(item) if self.fs.is_directory(child)
-            )
-            for directory_path in child_directories:
-                if directory_path.name == name:
-                    return item
-                queue.appendleft(directory_path)
+    async def _locate(self, name: str, want_dir: bool) -> Optional[Path]:
+        entries = self.scanner.walk([self.path])
+        try:
+            async for entry in entries:
+                if entry.is_dir == want_dir and entry.path.name == name:
+                    return entry.path.parent
+        except asyncio.CancelledError:
+            return None
+        finally:
+            await entries.aclose()
         return None
 
+    async def locate_directory(self, name: str) -> Optional[Path]:
+        return await self._locate(name, want_dir=True)
+
     async def locate_file(self, name: str) -> Optional[Path]:
-        queue: Deque[Path] = deque()
-        queue.append(self.path)
-        while len(queue) > 0:
-            try:
-                await asyncio.sleep(0)
-            except asyncio.CancelledError:
-                return None
-            item = queue.pop()
-            for child_path in self.fs.children(item):
-                if self.fs.is_file(child_path) and child_path.name == name:
-                    return item
-                elif self.fs.is_directory(child_path):
-                    queue.appendleft(child_path)
-        return None
+        return await self._locate(name, want_dir=False)
 
     async def collect(self, extension: str) -> AsyncGenerator[Path, None]:
-        queue: Deque[Path] = deque()
-        queue.append(self.path)
-        while len(queue) > 0:
-            await asyncio.sleep(0)
-            item = queue.pop()
-            for child_path in self.fs.children(item):
-                if self.fs.is_file(child_path) and child_path.suffix == extension:
-                    yield child_path
-                elif self.fs.is_directory(child_path):
-                    queue.appendleft(child_path)
+        entries = self.scanner.walk([self.path])
+        try:
+            async for entry in entries:
+                if entry.is_file and entry.path.suffix == extension:
+                    yield entry.path
+        finally:
+            await entries.aclose()
 
 
 class AggregateFileLocator(FileLocator):
@@ -260,9 +517,170 @@ class AggregateFileLocator(FileLocator):
 
 
 class MultipleDirectoryFileLocator(AggregateFileLocator):
-    def __init__(self, directories: Iterable[Path], fs: Filesystem):
+    def __init__(
+        self,
+        directories: Iterable[Path],
+        fs: Filesystem,
+        scanner: DirectoryScanner = None,
+    ):
         self.directories = set(directories)
+        scanner = scanner or DirectoryScanner(fs)
         locators = (
-            SingleDirectoryFileLocator(fs, directory) for directory in directories
+            SingleDirectoryFileLocator(fs, directory, scanner)
+            for directory in directories
         )
         super().__init__(locators, fs)
+
+
+class PathIndex(Protocol):
+    def file_parents(self, name: str) -> Set[Path]:
+        """Returns every directory that holds a file named 'name'."""
+        raise NotImplementedError
+
+    def directory_parents(self, name: str) -> Set[Path]:
+        """Returns every directory that holds a directory named 'name'."""
+        raise NotImplementedError
+
+    def files_with_size(self, size: int) -> Set[Path]:
+        """Returns the path of every file that is exactly 'size' bytes long."""
+        raise NotImplementedError
+
+    def directories_with_signature(self, signature: str) -> Set[Path]:
+        """Returns every directory whose tree signature equals 'signature'."""
+        raise NotImplementedError
+
+    def files_with_suffix(self, suffix: str) -> Iterable[Path]:
+        """Returns the path of every file whose name ends in the extension 'suffix'."""
+        raise NotImplementedError
+
+
+class NameIndex(PathIndex):
+    """Maps file and directory names to the set of directories that contain them.
+
+    File sizes are only kept when 'index_sizes' is set, since most lookups
+    match by name and do not need another entry per file.
+    """
+
+    def __init__(self, index_sizes: bool = False):
+        self.index_sizes = index_sizes
+        self.files: DefaultDict[str, Set[Path]] = defaultdict(set)
+        self.directories: DefaultDict[str, Set[Path]] = defaultdict(set)
+        self.sizes: DefaultDict[int, Set[Path]] = defaultdict(set)
+        self.tree = TreeSignatures()
+        # indexed files and directories by parent, so a subtree is dropped
+        # without looking at the rest of the index
+        self._children: DefaultDict[Path, Set[Path]] = defaultdict(set)
+
+    def add_file(self, path: Path, size: int = 0):
+        self.files[path.name].add(path.parent)
+        self._children[path.parent].add(path)
+        self.tree.add_file(path, size)
+        if self.index_sizes:
+            self.sizes[size].add(path)
+
+    def add_directory(self, path: Path):
+        self.directories[path.name].add(path.parent)
+        self._children[path.parent].add(path)
+
+    def remove(self, path: Path):
+        """Forgets a file or a directory together with everything below it.
+        For a root, which isn't indexed itself, only what's below it is forgotten.
+        """
+        pending = [path]
+        while len(pending) > 0:
+            current = pending.pop()
+            self._forget(current)
+            pending.extend(self._children.pop(current, ()))
+        if path.parent in self._children:
+            self._children[path.parent].discard(path)
+
+    def _forget(self, path: Path):
+        if path.parent in self.directories.get(path.name, ()):
+            self.directories[path.name].discard(path.parent)
+        if path.parent in self.files.get(path.name, ()):
+            self.files[path.name].discard(path.parent)
+            size = self.tree.remove_file(path)
+            if size is not None and size in self.sizes:
+                self.sizes[size].discard(path)
+
+    def file_parents(self, name: str) -> Set[Path]:
+        return self.files.get(name, set())
+
+    def directory_parents(self, name: str) -> Set[Path]:
+        return self.directories.get(name, set())
+
+    def files_with_size(self, size: int) -> Set[Path]:
+        return self.sizes.get(size, set())
+
+    def files_with_suffix(self, suffix: str) -> Iterable[Path]:
+        return [
+            parent / name
+            for (name, parents) in self.files.items()
+            if Path(name).suffix == suffix
+            for parent in parents
+        ]
+
+    def directories_with_signature(self, signature: str) -> Set[Path]:
+        # only the directories above files changed since the last call are hashed
+        return {
+            Path(path)
+            for path in self.tree.with_signature(signature)
+            if path.parent in self.directories.get(path.name, ())
+        }
+
+
+class IndexedFileLocator(FileLocator):
+    """Walks every root once and answers all lookups from a name index.
+
+    Unlike SingleDirectoryFileLocator, the cost of locating many names is
+    a single walk of the roots instead of one walk per name.
+    """
+
+    def __init__(
+        self,
+        directories: Iterable[Path],
+        fs: Filesystem,
+        scanner: DirectoryScanner = None,
+        index_sizes: bool = False,
+    ):
+        self.fs = fs
+        self.directories = set(directories)
+        self.scanner = scanner or DirectoryScanner(fs)
+        self.index_sizes = index_sizes
+        self._index: Optional[PathIndex] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    def roots(self) -> Iterable[Path]:
+        return iter(self.directories)
+
+    async def index(self) -> PathIndex:
+        # the lock is created lazily so it binds to the running event loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._index is None:
+                self._index = await self._build()
+        return self._index
+
+    async def _build(self) -> PathIndex:
+        index = NameIndex(self.index_sizes)
+        async for entry in self.scanner.walk(self.directories):
+            if entry.is_dir:
+                index.add_directory(entry.path)
+            elif entry.is_file:
+                index.add_file(entry.path, entry.size)
+        logger.info(f"indexed {len(self.directories)} roots")
+        return index
+
+    async def locate_file(self, name: str) -> Optional[Path]:
+        index = await self.index()
+        return min(index.file_parents(name), default=None)
+
+    async def locate_directory(self, name: str) -> Optional[Path]:
+        index = await self.index()
+        return min(index.directory_parents(name), default=None)
+
+    async def collect(self, extension: str) -> AsyncGenerator[Path, None]:
+        index = await self.index()
+        for path in index.files_with_suffix(extension):
+            yield path
@@ -0,0 +1,382 @@
+import logging
+import os
+import sqlite3
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (
+    Iterable,
+    Set,
+    Tuple,
+    Deque,
+    Sequence,
+    Optional,
+)
+
+from clutchless.domain.signature import directory_signature
+from clutchless.external.filesystem import (
+    Filesystem,
+    FileEntry,
+    IndexedFileLocator,
+    PathIndex,
+)
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    path TEXT PRIMARY KEY,
+    parent TEXT NOT NULL,
+    name TEXT NOT NULL,
+    is_dir INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_by_name ON entries (name);
+CREATE INDEX IF NOT EXISTS entries_by_parent ON entries (parent);
+CREATE INDEX IF NOT EXISTS entries_by_size ON entries (size) WHERE is_dir = 0;
+CREATE TABLE IF NOT EXISTS signatures (
+    path TEXT PRIMARY KEY,
+    signature TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS signatures_by_signature ON signatures (signature);
+"""
+
+EntryRow = Tuple[str, str, str, int, int, int]
+
+
+def default_index_path() -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home, "clutchless", "index.sqlite")
+
+
+def _subtree_bounds(path: Path) -> Tuple[str, str]:
+    """Returns the exclusive string bounds of all paths below 'path'.
+    '0' is the character right after '/', so every descendant sorts in between.
+    """
+    prefix = str(path).rstrip("/") + "/"
+    return prefix, prefix[:-1] + "0"
+
+
+def _is_under(path: Path, roots: Iterable[Path]) -> bool:
+    return any(path == root or root in path.parents for root in roots)
+
+
+def _to_row(entry: FileEntry) -> EntryRow:
+    return (
+        str(entry.path),
+        str(entry.path.parent),
+        entry.path.name,
+        int(entry.is_dir),
+        entry.size,
+        entry.mtime_ns,
+    )
+
+
+@dataclass
+class IndexStats:
+    roots: Sequence[Path]
+    directories: int
+    files: int
+    size: int
+
+
+@dataclass
+class RefreshResult:
+    checked: int = 0
+    relisted: int = 0
+    added: int = 0
+    removed: int = 0
+
+
+class DataIndex:
+    """Persistent index of data directories, stored in a local SQLite database.
+
+    Every entry below the indexed roots is stored with its name, type, size and mtime.
+    A refresh only lists directories again when their mtime changed, so files that
+    are modified in place keep their indexed size until their directory changes.
+    """
+
+    def __init__(self, fs: Filesystem, path: Path):
+        self.fs = fs
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(path))
+        self.connection.executescript(SCHEMA)
+        # directories listed since signatures were last updated
+        self._listed: Set[Path] = set()
+
+    def close(self):
+        self.connection.close()
+
+    def roots(self) -> Set[Path]:
+        rows = self.connection.execute("SELECT path FROM roots")
+        return {Path(path) for (path,) in rows}
+
+    def covers(self, path: Path) -> bool:
+        return _is_under(path, self.roots())
+
+    def build(self, roots: Iterable[Path]) -> int:
+        """Adds roots to the index and scans them from scratch, returns entry count."""
+        count = 0
+        with self.connection:
+            for root in roots:
+                mtime_ns = self.fs.stat(root).mtime_ns
+                self._delete_below(root)
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO roots VALUES (?, ?)", (str(root), mtime_ns)
+                )
+                count += self._insert_tree(root)
+            self._update_signatures()
+        return count
+
+    def refresh(self) -> RefreshResult:
+        result = RefreshResult()
+        directories = self.connection.execute(
+            "SELECT path, mtime_ns, 1 FROM roots "
+            "UNION ALL SELECT path, mtime_ns, 0 FROM entries WHERE is_dir = 1 "
+            "ORDER BY path"
+        ).fetchall()
+        with self.connection:
+            for (raw_path, mtime_ns, is_root) in directories:
+                path = Path(raw_path)
+                result.checked += 1
+                try:
+                    current = self.fs.stat(path)
+                except OSError:
+                    if is_root:
+                        result.removed += self._delete_below(path)
+                        self._set_mtime(path, 0, is_root)
+                    # otherwise removed when the parent directory is listed again
+                    continue
+                if current.is_symlink and not is_root:
+                    continue
+                if current.mtime_ns != mtime_ns:
+                    result.relisted += 1
+                    added, removed = self._relist(path)
+                    result.added += added
+                    result.removed += removed
+                    self._set_mtime(path, current.mtime_ns, is_root)
+            self._update_signatures()
+        return result
+
+    def stats(self) -> IndexStats:
+        (directories,) = self.connection.execute(
+            "SELECT COUNT(*) FROM entries WHERE is_dir = 1"
+        ).fetchone()
+        (files, size) = self.connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries WHERE is_dir = 0"
+        ).fetchone()
+        return IndexStats(sorted(self.roots()), directories, files, size)
+
+    def file_parents(self, name: str, roots: Iterable[Path]) -> Set[Path]:
+        return self._parents(name, False, roots)
+
+    def directory_parents(self, name: str, roots: Iterable[Path]) -> Set[Path]:
+        return self._parents(name, True, roots)
+
+    def files_with_size(self, size: int, roots: Iterable[Path]) -> Set[Path]:
+        rows = self.connection.execute(
+            "SELECT path FROM entries WHERE is_dir = 0 AND size = ?", (size,)
+        )
+        roots = set(roots)
+        paths = {Path(path) for (path,) in rows}
+        return {path for path in paths if _is_under(path, roots)}
+
+    def directories_with_signature(
+        self, signature: str, roots: Iterable[Path]
+    ) -> Set[Path]:
+        rows = self.connection.execute(
+            "SELECT path FROM signatures WHERE signature = ?", (signature,)
+        )
+        roots = set(roots)
+        paths = {Path(path) for (path,) in rows}
+        return {path for path in paths if _is_under(path, roots)}
+
+    def files_with_suffix(self, suffix: str, roots: Iterable[Path]) -> Iterable[Path]:
+        rows = self.connection.execute(
+            "SELECT path FROM entries WHERE is_dir = 0 AND name LIKE ?",
+            ("%" + suffix,),
+        )
+        roots = set(roots)
+        for (raw_path,) in rows:
+            path = Path(raw_path)
+            if path.suffix == suffix and _is_under(path, roots):
+                yield path
+
+    def _parents(self, name: str, is_dir: bool, roots: Iterable[Path]) -> Set[Path]:
+        rows = self.connection.execute(
+            "SELECT parent FROM entries WHERE name = ? AND is_dir = ?",
+            (name, int(is_dir)),
+        )
+        roots = set(roots)
+        parents = {Path(parent) for (parent,) in rows}
+        return {parent for parent in parents if _is_under(parent, roots)}
+
+    def _update_signatures(self):
+        """Recomputes the signatures of the directories listed since the last update
+        and of the directories above them, deepest first.
+        """
+        roots = self.roots()
+        changed: Set[Path] = set()
+        for directory in self._listed:
+            path = directory
+            while path not in changed and _is_under(path, roots):
+                changed.add(path)
+                path = path.parent
+        self._listed.clear()
+        for path in sorted(changed, key=lambda p: len(p.parts), reverse=True):
+            if path in roots:
+                # roots aren't entries, so they get no signature
+                continue
+            files = self.connection.execute(
+                "SELECT name, size FROM entries WHERE parent = ? AND is_dir = 0",
+                (str(path),),
+            )
+            subdirectories = self.connection.execute(
+                "SELECT entries.name, signatures.signature FROM entries "
+                "JOIN signatures ON signatures.path = entries.path "
+                "WHERE entries.parent = ? AND entries.is_dir = 1",
+                (str(path),),
+            )
+            signature = directory_signature(files.fetchall(), subdirectories.fetchall())
+            if signature is None:
+                self.connection.execute(
+                    "DELETE FROM signatures WHERE path = ?", (str(path),)
+                )
+            else:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO signatures VALUES (?, ?)",
+                    (str(path), signature),
+                )
+
+    def _set_mtime(self, path: Path, mtime_ns: int, is_root: bool):
+        table = "roots" if is_root else "entries"
+        self.connection.execute(
+            f"UPDATE {table} SET mtime_ns = ? WHERE path = ?", (mtime_ns, str(path))
+        )
+
+    def _delete_below(self, path: Path) -> int:
+        lower, upper = _subtree_bounds(path)
+        self.connection.execute(
+            "DELETE FROM signatures WHERE path > ? AND path < ?", (lower, upper)
+        )
+        cursor = self.connection.execute(
+            "DELETE FROM entries WHERE path > ? AND path < ?", (lower, upper)
+        )
+        return cursor.rowcount
+
+    def _delete_entry(self, path: Path) -> int:
+        self.connection.execute("DELETE FROM signatures WHERE path = ?", (str(path),))
+        cursor = self.connection.execute(
+            "DELETE FROM entries WHERE path = ?", (str(path),)
+        )
+        return cursor.rowcount + self._delete_below(path)
+
+    def _insert_tree(self, directory: Path) -> int:
+        """Inserts everything below a directory. Symlinked directories are stored
+        but not descended into, and each directory is listed once by inode.
+        """
+        count = 0
+        root = self.fs.stat(directory)
+        visited: Set[Tuple[int, int]] = {(root.device, root.inode)}
+        queue: Deque[Path] = deque([directory])
+        while len(queue) > 0:
+            item = queue.pop()
+            self._listed.add(item)
+            entries = list(self.fs.scan(item))
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (_to_row(entry) for entry in entries),
+            )
+            count += len(entries)
+            for entry in entries:
+                if not entry.is_dir or entry.is_symlink:
+                    continue
+                key = (entry.device, entry.inode)
+                if entry.inode == 0 or key not in visited:
+                    visited.add(key)
+                    queue.appendleft(entry.path)
+        return count
+
+    def _insert_entry(self, entry: FileEntry) -> int:
+        self.connection.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)", _to_row(entry)
+        )
+        if entry.is_dir:
+            return 1 + self._insert_tree(entry.path)
+        return 1
+
+    def _relist(self, directory: Path) -> Tuple[int, int]:
+        """Lists a directory again, returns counts of added and removed entries.
+        Subdirectories that still exist are left for refresh to check on their own.
+        """
+        added, removed = 0, 0
+        self._listed.add(directory)
+        current = {entry.path.name: entry for entry in self.fs.scan(directory)}
+        stored = {
+            name: (bool(is_dir), size, mtime_ns)
+            for (name, is_dir, size, mtime_ns) in self.connection.execute(
+                "SELECT name, is_dir, size, mtime_ns FROM entries WHERE parent = ?",
+                (str(directory),),
+            )
+        }
+        for name in stored.keys() - current.keys():
+            removed += self._delete_entry(directory / name)
+        for (name, entry) in current.items():
+            try:
+                is_dir, size, mtime_ns = stored[name]
+            except KeyError:
+                added += self._insert_entry(entry)
+                continue
+            if is_dir != entry.is_dir:
+                removed += self._delete_entry(entry.path)
+                added += self._insert_entry(entry)
+            elif not is_dir and (size, mtime_ns) != (entry.size, entry.mtime_ns):
+                self._insert_entry(entry)
+        return added, removed
+
+
+class RootedDataIndex(PathIndex):
+    """Name lookups in a DataIndex restricted to some of its roots."""
+
+    def __init__(self, data_index: DataIndex, roots: Iterable[Path]):
+        self.data_index = data_index
+        self.roots = set(roots)
+
+    def file_parents(self, name: str) -> Set[Path]:
+        return self.data_index.file_parents(name, self.roots)
+
+    def directory_parents(self, name: str) -> Set[Path]:
+        return self.data_index.directory_parents(name, self.roots)
+
+    def files_with_size(self, size: int) -> Set[Path]:
+        return self.data_index.files_with_size(size, self.roots)
+
+    def directories_with_signature(self, signature: str) -> Set[Path]:
+        return self.data_index.directories_with_signature(signature, self.roots)
+
+    def files_with_suffix(self, suffix: str) -> Iterable[Path]:
+        return self.data_index.files_with_suffix(suffix, self.roots)
+
+
+class DataIndexFileLocator(IndexedFileLocator):
+    """Answers lookups from a persistent DataIndex instead of walking the roots."""
+
+    def __init__(
+        self, directories: Iterable[Path], fs: Filesystem, data_index: DataIndex
+    ):
+        super().__init__(directories, fs)
+        self.data_index = data_index
+
+    async def _build(self) -> PathIndex:
+        return RootedDataIndex(self.data_index, self.directories)
+
+
+def open_data_index(fs: Filesystem, raw_path: Optional[str]) -> DataIndex:
+    path = Path(raw_path) if raw_path else default_index_path()
+    return DataIndex(fs, path.expanduser())
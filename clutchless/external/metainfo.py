@@ -1,18 +1,33 @@
 import asyncio
+import functools
+import hashlib
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from enum import IntEnum
 from io import BytesIO
 from pathlib import Path
-from typing import Protocol, Optional
-
-from torrentool.torrent import Torrent as ExternalTorrent
+from typing import (
+    Protocol,
+    Optional,
+    Set,
+    Sequence,
+    Mapping,
+    Iterable,
+    Tuple,
+)
 
 from clutchless.domain.torrent import MetainfoFile
+from clutchless.external.bencode import decode_metainfo
 from clutchless.external.filesystem import (
     Filesystem,
+    FileEntry,
     FileLocator,
     SingleDirectoryFileLocator,
+    IndexedFileLocator,
+    PathIndex,
 )
+from clutchless.external.verify import PieceVerifier, Sample
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +36,14 @@ class MetainfoIO(Protocol):
     def from_path(self, path: Path) -> MetainfoFile:
         raise NotImplementedError
 
+    def from_paths(self, paths: Iterable[Path]) -> Sequence[MetainfoFile]:
+        """Reads many metainfo files, returned in the order of 'paths'."""
+        raise NotImplementedError
+
+    def read_pieces(self, path: Path, info_hash: str) -> bytes:
+        """Reads the piece hashes of the metainfo file at 'path', checking it's still the same torrent."""
+        raise NotImplementedError
+
     def get_bytes(self, path: Path) -> bytes:
         raise NotImplementedError
 
@@ -30,40 +53,233 @@ class MetainfoIO(Protocol):
 
 class DefaultMetainfoIO(MetainfoIO):
     def from_path(self, path: Path) -> MetainfoFile:
-        external_torrent = ExternalTorrent.from_file(str(path))
-        properties = {
-            prop: getattr(external_torrent, prop) for prop in MetainfoFile.PROPERTIES
-        }
-        properties["info"] = external_torrent._struct.get("info") or dict()
-        return MetainfoFile(properties, path)
+        # the file list is only decoded when it's needed, names and hashes often suffice,
+        # and piece hashes (the bulk of most files) are read again when they're needed
+        struct, encoded_info = decode_metainfo(
+            self.get_bytes(path),
+            lazy_keys=frozenset({"files"}),
+            skip_keys=frozenset({"pieces"}),
+        )
+        info = struct.get("info") or dict()
+        # hashed as encoded in the file, which is what clients do
+        info_hash = hashlib.sha1(encoded_info).hexdigest() if info else None
+        properties = {"name": info.get("name"), "info_hash": info_hash, "info": info}
+        load_pieces = functools.partial(self.read_pieces, path, info_hash)
+        return MetainfoFile(properties, path, load_pieces)
+
+    def from_paths(self, paths: Iterable[Path]) -> Sequence[MetainfoFile]:
+        return [self.from_path(path) for path in paths]
+
+    def read_pieces(self, path: Path, info_hash: str) -> bytes:
+        struct, encoded_info = decode_metainfo(
+            self.get_bytes(path), lazy_keys=frozenset({"files"})
+        )
+        if encoded_info is None or hashlib.sha1(encoded_info).hexdigest() != info_hash:
+            raise RuntimeError(f"{path} no longer holds torrent {info_hash}")
+        return bytes(struct["info"]["pieces"])
 
     def get_bytes(self, path: Path) -> bytes:
         with open(path, "rb") as f:
-            return bytes(f.read())
+            return f.read()
 
     def write_bytes(self, value: bytes, path: Path):
         with open(path, "wb") as f:
             f.write(value)
 
 
+class ParallelMetainfoIO(MetainfoIO):
+    """Reads many metainfo files at once in a pool of 'jobs' processes.
+    Parsing and hashing are CPU-bound, so threads wouldn't help. Files come back
+    to this process as compact MetainfoFiles (without piece hashes).
+    """
+
+    # fewer files aren't worth starting processes for
+    MIN_PARALLEL = 64
+
+    def __init__(self, reader: MetainfoIO, jobs: int):
+        self.reader = reader
+        self.jobs = jobs
+        # started on first use and kept for later calls
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def from_path(self, path: Path) -> MetainfoFile:
+        return self.reader.from_path(path)
+
+    def from_paths(self, paths: Iterable[Path]) -> Sequence[MetainfoFile]:
+        paths = list(paths)
+        if self.jobs < 2 or len(paths) < self.MIN_PARALLEL:
+            return self.reader.from_paths(paths)
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.jobs)
+        chunk_size = max(1, min(256, len(paths) // (self.jobs * 8)))
+        return list(
+            self.executor.map(self.reader.from_path, paths, chunksize=chunk_size)
+        )
+
+    def read_pieces(self, path: Path, info_hash: str) -> bytes:
+        return self.reader.read_pieces(path, info_hash)
+
+    def get_bytes(self, path: Path) -> bytes:
+        return self.reader.get_bytes(path)
+
+    def write_bytes(self, value: bytes, path: Path):
+        self.reader.write_bytes(value, path)
+
+
 class TorrentDataReader(Protocol):
-    def verify(self, path: Path, file: MetainfoFile) -> bool:
+    def verify(self, path: Path, file: MetainfoFile, name: str = None) -> bool:
+        raise NotImplementedError
+
+    def verify_sized(self, path: Path, file: MetainfoFile, name: str = None) -> bool:
+        """Like verify, for data already known to have every file at its length."""
+        raise NotImplementedError
+
+
+class Verification(IntEnum):
+    """How thoroughly found data is checked, each level includes the ones before."""
+
+    # every file exists
+    EXISTS = 0
+    # and has the length given in the metainfo
+    SIZE = 1
+    # and no more than a piece of it was never written (sparse or preallocated)
+    SPARSE = 2
+    # and a random sample of pieces (see PieceVerifier.sample) hashes as it should
+    SAMPLED = 3
+    # and every piece hashes as it should
+    FULL = 4
+
+    @classmethod
+    def parse(cls, value: str) -> "Verification":
+        try:
+            return cls[value.upper()]
+        except KeyError:
+            names = ", ".join(level.name.lower() for level in cls)
+            raise ValueError(f"verification must be one of {names}") from None
+
+
+class VerificationStore(Protocol):
+    """Remembers which files of torrent data hashed correctly, and how thoroughly
+    they were checked.
+    """
+
+    def verified(
+        self, info_hash: str, entries: Sequence[FileEntry], verification: Verification
+    ) -> Set[int]:
+        """Returns the indices of the files (in 'entries') that hashed correctly at
+        'verification' or a more thorough level, and haven't changed since.
+        """
+        raise NotImplementedError
+
+    def store(
+        self, info_hash: str, entries: Sequence[FileEntry], verification: Verification
+    ):
         raise NotImplementedError
 
 
 class DefaultTorrentDataReader(TorrentDataReader):
-    def __init__(self, fs: Filesystem):
+    def __init__(
+        self,
+        fs: Filesystem,
+        verification: Verification = Verification.EXISTS,
+        verifier: PieceVerifier = None,
+        sample: Sample = None,
+        store: VerificationStore = None,
+    ):
         self.fs = fs
+        self.verification = verification
+        self.verifier = verifier or PieceVerifier()
+        self.sample = sample
+        self.store = store
+
+    def verify(self, path: Path, metainfo_file: MetainfoFile, name: str = None) -> bool:
+        files = set(metainfo_file.needed_files(path, name))
+        if len(files) == 0 or not all(self.fs.exists(file) for file in files):
+            return False
+        if self.verification < Verification.SIZE:
+            return True
+        spans = [
+            (path / relative_path, length)
+            for (relative_path, _, length) in metainfo_file.spans(name)
+        ]
+        entries = [self._stat(file) for (file, _) in spans]
+        for (entry, (_, length)) in zip(entries, spans):
+            if entry is None or not entry.is_file or entry.size != length:
+                return False
+        if self.verification >= Verification.SPARSE:
+            limit = metainfo_file.piece_length
+            if any(self.fs.unfilled_size(file) > limit for (file, _) in spans):
+                return False
+        if self.verification >= Verification.SAMPLED:
+            return self._check_pieces(path, metainfo_file, name, entries)
+        return True
+
+    def _check_pieces(
+        self,
+        path: Path,
+        metainfo_file: MetainfoFile,
+        name: Optional[str],
+        entries: Sequence[FileEntry],
+    ) -> bool:
+        verified: Set[int] = set()
+        if self.store is not None:
+            verified = self.store.verified(
+                metainfo_file.info_hash, entries, self.verification
+            )
+            if len(verified) == len(entries):
+                return True
+        unverified = [index for index in range(len(entries)) if index not in verified]
+        # the files that had every piece hashed
+        complete: Set[int] = set(unverified)
+        if self.verification == Verification.SAMPLED:
+            # a bad piece in the sample rules the data out, hashing the rest can't help
+            result = self.verifier.sample(
+                metainfo_file, path, name, self.sample, escalate=False
+            )
+            is_valid = result.is_valid
+            complete.intersection_update(result.complete_files)
+        else:
+            is_valid = self.verifier.check(metainfo_file, path, name, unverified)
+        if is_valid and self.store is not None:
+            # stored at the level each file reached, a sampled file isn't reused
+            # for a full check
+            hashed = [entries[index] for index in unverified if index in complete]
+            sampled = [entries[index] for index in unverified if index not in complete]
+            if len(hashed) > 0:
+                self.store.store(metainfo_file.info_hash, hashed, Verification.FULL)
+            if len(sampled) > 0:
+                self.store.store(metainfo_file.info_hash, sampled, Verification.SAMPLED)
+        return is_valid
 
-    def verify(self, path: Path, metainfo_file: MetainfoFile) -> bool:
-        files = set(metainfo_file.needed_files(path))
-        return len(files) > 0 and all(self.fs.exists(file) for file in files)
+    def verify_sized(
+        self, path: Path, metainfo_file: MetainfoFile, name: str = None
+    ) -> bool:
+        if self.verification <= Verification.SIZE:
+            return True
+        return self.verify(path, metainfo_file, name)
+
+    def _stat(self, path: Path) -> Optional[FileEntry]:
+        try:
+            return self.fs.stat(path)
+        except OSError:
+            # missing, a looping symlink or unreadable
+            return None
 
 
 @dataclass(frozen=True)
 class TorrentData:
+    """Data found for a metainfo file.
+    'name' is set when the data was found under a name other than the torrent's.
+    """
+
     metainfo_file: MetainfoFile
     location: Optional[Path] = None
+    name: Optional[str] = None
 
     def __lt__(self, other):
         return self.metainfo_file < other.metainfo_file
@@ -93,7 +309,8 @@ class CustomTorrentDataLocator(TorrentDataLocator):
             logger.info(f"cancelled find for {file}")
             return TorrentData(file)
         if found is not None:
-            if self.reader.verify(found, file):
+            loop = asyncio.get_running_loop()
+            if await loop.run_in_executor(None, self.reader.verify, found, file):
                 return TorrentData(file, found)
         return TorrentData(file)
 
@@ -107,3 +324,201 @@ class DefaultTorrentDataLocator(CustomTorrentDataLocator):
 
     async def find(self, file: MetainfoFile) -> TorrentData:
         return await super().find(file)
+
+
+class IndexedTorrentDataLocator(TorrentDataLocator):
+    """Resolves metainfo files against a name index shared by every lookup.
+
+    The data roots are walked once, the first time any file is looked up,
+    and every candidate location for a name is verified in turn.
+    """
+
+    def __init__(self, locator: IndexedFileLocator, reader: TorrentDataReader):
+        self.locator = locator
+        self.reader = reader
+
+    async def _verify(self, path: Path, file: MetainfoFile, name: str = None) -> bool:
+        # reads the data, so it's kept off the event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.reader.verify, path, file, name)
+
+    async def _verify_sized(
+        self, path: Path, file: MetainfoFile, name: str = None
+    ) -> bool:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, self.reader.verify_sized, path, file, name
+        )
+
+    async def find(self, file: MetainfoFile) -> TorrentData:
+        try:
+            index = await self.locator.index()
+        except asyncio.CancelledError:
+            logger.info(f"cancelled find for {file}")
+            return TorrentData(file)
+        if file.is_multifile:
+            # an identical tree under the same name has the right sizes already
+            for directory in sorted(index.directories_with_signature(file.signature)):
+                if directory.name == file.name and await self._verify_sized(
+                    directory.parent, file
+                ):
+                    return TorrentData(file, directory.parent)
+            candidates = index.directory_parents(file.name)
+        else:
+            candidates = index.file_parents(file.name)
+        for candidate in sorted(candidates):
+            if await self._verify(candidate, file):
+                return TorrentData(file, candidate)
+        return TorrentData(file)
+
+
+class SizeMatchingTorrentDataLocator(IndexedTorrentDataLocator):
+    """Also finds data that was renamed after download, by matching file sizes.
+
+    When nothing is found under the torrent's name, a single-file torrent
+    matches any file of the same length. A multi-file torrent matches any
+    directory with the same tree signature, or else any directory holding
+    every one of its files at the same relative path and length, which is
+    confirmed by the reader.
+    The locator's index must have been built with 'index_sizes' set.
+    """
+
+    async def find(self, file: MetainfoFile) -> TorrentData:
+        found = await super().find(file)
+        if found.location is not None:
+            return found
+        index = await self.locator.index()
+        if file.is_multifile:
+            signature_matches = index.directories_with_signature(file.signature)
+            for directory in sorted(signature_matches):
+                if await self._verify_sized(directory.parent, file, directory.name):
+                    return TorrentData(file, directory.parent, directory.name)
+        for candidate in sorted(self._candidates(index, file)):
+            if await self._verify(candidate.parent, file, candidate.name):
+                return TorrentData(file, candidate.parent, candidate.name)
+        return found
+
+    @staticmethod
+    def _candidates(index: PathIndex, file: MetainfoFile) -> Set[Path]:
+        if file.is_single_file:
+            return index.files_with_size(file.length)
+        files = file.files
+        if len(files) == 0:
+            return set()
+        # the largest file has the fewest look-alikes, so it narrows roots best
+        anchor = max(files, key=lambda torrent_file: torrent_file.length)
+        depth = len(anchor.path.parts)
+        roots = {
+            path.parents[depth - 1]
+            for path in index.files_with_size(anchor.length)
+            if path.parts[-depth:] == anchor.path.parts and len(path.parts) > depth
+        }
+        return {
+            root
+            for root in roots
+            if all(
+                root / torrent_file.path in index.files_with_size(torrent_file.length)
+                for torrent_file in files
+            )
+        }
+
+
+class ContentMatchingTorrentDataLocator(IndexedTorrentDataLocator):
+    """Also finds data that was renamed after download, by hashing some of its pieces.
+
+    The first file of the torrent that holds a whole piece is looked up by its
+    length. A candidate of the right length is read for the first piece that lies
+    wholly inside the file, and only on a hit are a few more of its pieces read to
+    confirm it. The torrent's other files must then be found at the same paths
+    relative to the candidate's root, and are confirmed the same way. Files too
+    small to hold a whole piece cannot be identified and are skipped.
+    Only the torrent's name may differ, as that's the only rename that's applied.
+    The locator's index must have been built with 'index_sizes' set.
+    """
+
+    CONFIRMING_PIECES = 2
+
+    def __init__(
+        self, locator: IndexedFileLocator, reader: TorrentDataReader, fs: Filesystem
+    ):
+        super().__init__(locator, reader)
+        self.fs = fs
+
+    async def find(self, file: MetainfoFile) -> TorrentData:
+        found = await super().find(file)
+        if found.location is not None:
+            return found
+        index = await self.locator.index()
+        spans = [
+            (path, offset, length, file.whole_pieces(offset, length))
+            for (path, offset, length) in file.spans()
+        ]
+        spans = [span for span in spans if len(span[3]) > 0]
+        if len(spans) == 0:
+            return found
+        # looked up on the event loop, a data index can't be used from other threads
+        sized = {length: index.files_with_size(length) for (_, _, length, _) in spans}
+        (path, offset, length, pieces) = spans[0]
+        loop = asyncio.get_running_loop()
+        for candidate in sorted(sized[length]):
+            root = self._root(path, candidate)
+            if root is None:
+                continue
+            # reads the data, so it's kept off the event loop
+            matches = await loop.run_in_executor(
+                None, self._matches_at, file, sized, root, spans
+            )
+            if matches:
+                return TorrentData(file, root.parent, root.name)
+        return found
+
+    @staticmethod
+    def _root(path: Path, candidate: Path) -> Optional[Path]:
+        """Returns the data root if 'candidate' lies at the torrent's relative path."""
+        relative = path.parts[1:]
+        if len(candidate.parts) <= len(relative) + 1:
+            return None
+        if relative and candidate.parts[-len(relative) :] != relative:
+            return None
+        return candidate.parents[len(relative) - 1] if relative else candidate
+
+    def _matches_at(
+        self,
+        file: MetainfoFile,
+        sized: Mapping[int, Set[Path]],
+        root: Path,
+        spans: Sequence[Tuple[Path, int, int, range]],
+    ) -> bool:
+        for (path, offset, length, pieces) in spans:
+            candidate = root.joinpath(*path.parts[1:])
+            if candidate not in sized[length]:
+                return False
+            if not self._is_match(file, candidate, offset, pieces):
+                return False
+        return True
+
+    def _is_match(
+        self, file: MetainfoFile, candidate: Path, offset: int, pieces: range
+    ) -> bool:
+        if not self._is_piece(file, candidate, offset, pieces[0]):
+            return False
+        return all(
+            self._is_piece(file, candidate, offset, piece)
+            for piece in self._confirming(pieces)
+        )
+
+    def _confirming(self, pieces: range) -> Sequence[int]:
+        # spread the confirming pieces out towards the end of the file
+        step = max(1, (len(pieces) - 1) // self.CONFIRMING_PIECES)
+        return pieces[1:][::-1][::step][: self.CONFIRMING_PIECES]
+
+    def _is_piece(
+        self, file: MetainfoFile, candidate: Path, offset: int, piece: int
+    ) -> bool:
+        start, end = file.piece_span(piece)
+        try:
+            data = self.fs.read_bytes(candidate, start - offset, end - start)
+        except OSError as e:
+            logger.info(f"failed reading {candidate}: {e}")
+            return False
+        return hashlib.sha1(data).digest() == file.piece_hash(piece)
@@ -0,0 +1,183 @@
+import asyncio
+import base64
+import json
+import logging
+from typing import Any, Mapping, MutableMapping, MutableSequence, Optional, Tuple
+from urllib.parse import urlparse, unquote
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ADDRESS = "http://localhost:9091/transmission/rpc"
+
+SESSION_ID_HEADER = "X-Transmission-Session-Id"
+
+
+class RpcError(RuntimeError):
+    pass
+
+
+class _Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        # whether it was kept alive after an earlier response
+        self.reused = False
+
+    def close(self):
+        self.writer.close()
+
+
+class AsyncRpcClient:
+    """Sends requests to Transmission's RPC interface over HTTP/1.1 connections that
+    are kept open between requests.
+
+    Up to 'connections' requests are in flight at the same time, each on its own
+    connection. The session id Transmission hands out with a 409 response is kept
+    and sent with every request, until Transmission answers with 409 again.
+    """
+
+    def __init__(
+        self,
+        address: str = DEFAULT_ADDRESS,
+        connections: int = 4,
+        timeout: float = 60,
+    ):
+        url = urlparse(address)
+        if url.scheme not in ("http", "https"):
+            raise ValueError(f"unsupported address: {address}")
+        self.host = url.hostname or "localhost"
+        self.ssl = url.scheme == "https"
+        self.port = url.port or (443 if self.ssl else 80)
+        self.path = url.path or "/"
+        self.authorization: Optional[str] = None
+        if url.username is not None:
+            credentials = f"{unquote(url.username)}:{unquote(url.password or '')}"
+            encoded = base64.b64encode(credentials.encode()).decode()
+            self.authorization = f"Basic {encoded}"
+        self.connections = connections
+        self.timeout = timeout
+        self.session_id: Optional[str] = None
+        self._idle: MutableSequence[_Connection] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def request(
+        self, method: str, arguments: Optional[Mapping[str, Any]] = None
+    ) -> Mapping[str, Any]:
+        """Returns the decoded response, with its 'result' and 'arguments'."""
+        if self._slots is None:
+            # made on first use, to belong to the running event loop
+            self._slots = asyncio.Semaphore(self.connections)
+        body = json.dumps({"method": method, "arguments": arguments or {}}).encode()
+        async with self._slots:
+            return await asyncio.wait_for(self._send(body), self.timeout)
+
+    async def close(self):
+        while self._idle:
+            connection = self._idle.pop()
+            connection.close()
+            await connection.writer.wait_closed()
+
+    async def _send(self, body: bytes) -> Mapping[str, Any]:
+        renegotiated = False
+        retried = False
+        while True:
+            # at_eof is the only check that an idle connection is still open, so
+            # one closed by Transmission is retried once on a fresh connection
+            connection = await self._connect(fresh=retried)
+            try:
+                status, headers, content = await self._exchange(connection, body)
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                connection.close()
+                if connection.reused and not retried:
+                    retried = True
+                    continue
+                if isinstance(e, asyncio.IncompleteReadError):
+                    raise RpcError("connection closed by Transmission") from e
+                raise
+            except (asyncio.LimitOverrunError, ValueError) as e:
+                connection.close()
+                raise RpcError(f"malformed response: {e}") from e
+            except BaseException:
+                # cancelled (or timed out) half way, the connection can't be reused
+                connection.close()
+                raise
+            if headers.get("connection", "").lower() == "close":
+                connection.close()
+            else:
+                connection.reused = True
+                self._idle.append(connection)
+            if status == 409 and not renegotiated:
+                self.session_id = headers.get(SESSION_ID_HEADER.lower())
+                renegotiated = True
+                continue
+            if status != 200:
+                raise RpcError(f"Transmission responded with HTTP {status}")
+            try:
+                return json.loads(content)
+            except ValueError as e:
+                raise RpcError(f"malformed response: {e}") from e
+
+    async def _connect(self, fresh: bool = False) -> _Connection:
+        while self._idle and not fresh:
+            connection = self._idle.pop()
+            if not connection.reader.at_eof():
+                return connection
+            connection.close()
+        reader, writer = await asyncio.open_connection(
+            self.host, self.port, ssl=self.ssl or None
+        )
+        return _Connection(reader, writer)
+
+    def _request_head(self, length: int) -> bytes:
+        lines = [
+            f"POST {self.path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            "Content-Type: application/json",
+            f"Content-Length: {length}",
+        ]
+        if self.session_id is not None:
+            lines.append(f"{SESSION_ID_HEADER}: {self.session_id}")
+        if self.authorization is not None:
+            lines.append(f"Authorization: {self.authorization}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _exchange(
+        self, connection: _Connection, body: bytes
+    ) -> Tuple[int, Mapping[str, str], bytes]:
+        reader = connection.reader
+        connection.writer.write(self._request_head(len(body)) + body)
+        await connection.writer.drain()
+        status_line = await reader.readuntil(b"\r\n")
+        try:
+            status = int(status_line.split(b" ", 2)[1])
+        except (IndexError, ValueError):
+            raise RpcError(f"unexpected response: {status_line!r}")
+        headers: MutableMapping[str, str] = {}
+        while True:
+            line = await reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            (name, _, value) = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            content = await self._read_chunks(reader)
+        elif "content-length" in headers:
+            content = await reader.readexactly(int(headers["content-length"]))
+        else:
+            # the body ends with the connection
+            content = await reader.read()
+            headers["connection"] = "close"
+        return status, headers, content
+
+    @staticmethod
+    async def _read_chunks(reader: asyncio.StreamReader) -> bytes:
+        chunks = []
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            if size == 0:
+                # skip any trailers
+                while await reader.readuntil(b"\r\n") != b"\r\n":
+                    pass
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
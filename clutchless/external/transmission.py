@@ -1,6 +1,22 @@
+import asyncio
 import itertools
+import json
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Mapping, Sequence, Set, Union, MutableMapping, Protocol, cast, Tuple
+from typing import (
+    Mapping,
+    Sequence,
+    Set,
+    Union,
+    MutableMapping,
+    Protocol,
+    cast,
+    Tuple,
+    Optional,
+    Iterable,
+    FrozenSet,
+    Callable,
+)
 
 from clutch import Client
 from clutch.network.rpc.message import Response
@@ -14,6 +30,7 @@ from clutch.schema.user.response.torrent.add import TorrentAdd
 
 from clutchless.domain.torrent import MetainfoFile
 from clutchless.external.result import QueryResult, CommandResult
+from clutchless.external.rpc import AsyncRpcClient, RpcError
 
 IdsArg = Union[int, Set[int]]
 
@@ -44,6 +61,14 @@ class PartialTorrent:
         )
 
 
+@dataclass(frozen=True)
+class TorrentSummary:
+    name: str
+    metainfo_path: Path
+    location: Path
+    announce_urls: FrozenSet[str] = frozenset()
+
+
 class TransmissionError(Exception):
     def __init__(self, message):
         self.message = message
@@ -87,6 +112,10 @@ class TransmissionApi(Protocol):
     def get_torrent_trackers(self) -> QueryResult[Mapping[int, Set[str]]]:
         raise NotImplementedError
 
+    def get_torrent_summaries(self) -> QueryResult[Mapping[int, TorrentSummary]]:
+        """Returns the name, metainfo file, location and trackers of every torrent."""
+        raise NotImplementedError
+
     def move_torrent_location(self, torrent_id, new_path) -> CommandResult:
         raise NotImplementedError
 
@@ -116,25 +145,151 @@ class TransmissionApi(Protocol):
     def verify(self, torrent_id: int) -> CommandResult:
         raise NotImplementedError
 
+    def rename_torrent_path(
+        self, torrent_id: int, path: str, name: str
+    ) -> CommandResult:
+        raise NotImplementedError
+
+    # the bulk variants send one request for every 'batch_size' torrents and fail
+    # if any of them did, which torrents were changed can be queried afterwards
+
+    def remove_torrents_keeping_data(self, ids: Set[int]) -> CommandResult:
+        raise NotImplementedError
+
+    def verify_torrents(self, ids: Set[int]) -> CommandResult:
+        raise NotImplementedError
+
+    def start_torrents(self, ids: Set[int]) -> CommandResult:
+        raise NotImplementedError
+
+    def stop_torrents(self, ids: Set[int]) -> CommandResult:
+        raise NotImplementedError
+
+    def move_torrents_location(self, ids: Set[int], new_path: Path) -> CommandResult:
+        raise NotImplementedError
+
+    def invalidate(self, ids: IdsArg = None):
+        """Forgets what was queried about some torrents (all of them without 'ids'),
+        for when they may have changed outside of this API.
+        """
+        raise NotImplementedError
+
+
+# read by most queries and small, so the first snapshot fetches all of them
+SNAPSHOT_FIELDS = frozenset(
+    {
+        "id",
+        "name",
+        "hash_string",
+        "torrent_file",
+        "percent_done",
+        "error",
+        "error_string",
+        "download_dir",
+    }
+)
+
+
+# most torrents changed with one request by the bulk methods of ClutchApi
+BATCH_SIZE = 500
+
+
+def _id_set(ids: IdsArg) -> Set[int]:
+    return {ids} if isinstance(ids, int) else set(ids)
+
+
+def is_missing_data_error(error: int, error_string: str) -> bool:
+    # no data found error found in torrent.c in Transmission project
+    return error == 3 and error_string.startswith("No data found!")
+
 
 class ClutchApi(TransmissionApi):
-    def __init__(self, client: Client):
+    """Serves queries from a snapshot of the torrents in Transmission, fetched with
+    one torrent-get for all of them.
+
+    The snapshot starts with SNAPSHOT_FIELDS and is fetched again with more fields
+    when a query needs ones it's missing (like trackers or files). Changing a
+    torrent marks it, and marked torrents are fetched again (only them) before the
+    next query.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        fields: Iterable[str] = SNAPSHOT_FIELDS,
+        batch_size: int = BATCH_SIZE,
+    ):
         self.client = client
+        self.batch_size = batch_size
+        self.fields: Set[str] = set(fields) | {"id"}
+        self._torrents: Optional[MutableMapping[int, TorrentAccessorObject]] = None
+        self._changed: Set[int] = set()
+
+    def invalidate(self, ids: IdsArg = None):
+        if ids is None:
+            self._torrents = None
+        else:
+            self._changed.update(_id_set(ids))
 
-    def get_errors_by_id(
-        self, ids: Set[int]
-    ) -> QueryResult[Mapping[int, Tuple[int, str]]]:
+    def _fetch(
+        self, ids: Optional[Set[int]] = None
+    ) -> QueryResult[Sequence[TorrentAccessorObject]]:
         response: Response[TorrentAccessorResponse] = self.client.torrent.accessor(
-            fields={"id", "error", "error_string"}
+            fields=self.fields, ids=ids
         )
+        if response.result != "success" or response.arguments is None:
+            return QueryResult(success=False, error=response.result)
         arguments = cast(TorrentAccessorResponse, response.arguments)
-        torrents: Sequence[TorrentAccessorObject] = cast(
-            Sequence[TorrentAccessorObject], arguments.torrents
+        return QueryResult(
+            value=cast(Sequence[TorrentAccessorObject], arguments.torrents)
+        )
+
+    def _snapshot(
+        self, fields: Iterable[str] = ()
+    ) -> QueryResult[Mapping[int, TorrentAccessorObject]]:
+        missing = set(fields) - self.fields
+        if self._torrents is None or missing:
+            self.fields |= missing
+            result = self._fetch()
+            if not result.success:
+                return QueryResult(success=False, error=result.error)
+            self._torrents = {torrent.id: torrent for torrent in result.value}
+            self._changed.clear()
+        elif self._changed:
+            changed = set(self._changed)
+            result = self._fetch(changed)
+            if not result.success:
+                return QueryResult(success=False, error=result.error)
+            # removed torrents aren't returned
+            for torrent_id in changed:
+                self._torrents.pop(torrent_id, None)
+            self._torrents.update((torrent.id, torrent) for torrent in result.value)
+            self._changed -= changed
+        return QueryResult(value=self._torrents)
+
+    def _torrents_in(
+        self, ids: IdsArg = None, fields: Iterable[str] = ()
+    ) -> QueryResult[Sequence[TorrentAccessorObject]]:
+        result = self._snapshot(fields)
+        if not result.success:
+            return QueryResult(success=False, error=result.error)
+        torrents = result.value
+        if ids is None:
+            return QueryResult(value=list(torrents.values()))
+        return QueryResult(
+            value=[torrents[i] for i in sorted(_id_set(ids)) if i in torrents]
         )
+
+    def get_errors_by_id(
+        self, ids: Set[int]
+    ) -> QueryResult[Mapping[int, Tuple[int, str]]]:
+        result = self._torrents_in(ids)
+        if not result.success:
+            return QueryResult(success=False, error=result.error)
         return QueryResult(
             value={
                 torrent.id: (torrent.error, torrent.error_string)
-                for torrent in torrents
+                for torrent in result.value
                 if torrent.error != 0
             }
         )
@@ -148,6 +303,7 @@ class ClutchApi(TransmissionApi):
         if response.result != "success" or response.arguments is None:
             return CommandResult(error=response.result, success=False)
         if response.arguments.torrent_added:
+            self.invalidate(response.arguments.torrent_added.id)
             return CommandResult()
         elif response.arguments.torrent_duplicate:
             return CommandResult(error="duplicate torrent", success=False)
@@ -163,37 +319,30 @@ class ClutchApi(TransmissionApi):
         if response.result != "success" or response.arguments is None:
             return CommandResult(error=response.result, success=False)
         if response.arguments.torrent_added:
-            return CommandResult()
+            self.invalidate(response.arguments.torrent_added.id)
+            return CommandResult(id=response.arguments.torrent_added.id)
         elif response.arguments.torrent_duplicate:
             return CommandResult(error="duplicate torrent", success=False)
         return CommandResult(error="unknown error", success=False)
 
     def get_torrent_name_by_id(self, ids: Set[int]) -> QueryResult[Mapping[int, str]]:
-        response: Response[TorrentAccessorResponse] = self.client.torrent.accessor(
-            fields={"id", "percent_done", "name"}, ids=ids
-        )
-        if response.result != "success":
-            return QueryResult(success=False, error=response.result)
-        arguments = cast(TorrentAccessorResponse, response.arguments)
-        torrents: Sequence[TorrentAccessorObject] = cast(
-            Sequence[TorrentAccessorObject], arguments.torrents
+        result = self._torrents_in(ids)
+        if not result.success:
+            return QueryResult(success=False, error=result.error)
+        return QueryResult(
+            value={
+                torrent.id: torrent.name
+                for torrent in result.value
+                if torrent.name is not None
+            }
         )
-        result = {}
-        for torrent in torrents:
-            if torrent.id is not None and torrent.name is not None:
-                result[torrent.id] = torrent.name
-        return QueryResult(value=result)
 
     def get_partial_torrents(self) -> QueryResult[Mapping[str, PartialTorrent]]:
-        response: Response[TorrentAccessorResponse] = self.client.torrent.accessor(
-            fields={"hash_string", "wanted", "files"}
-        )
-        if response.result != "success":
-            return QueryResult(success=False, error=response.result)
+        result = self._torrents_in(fields={"wanted", "files"})
+        if not result.success:
+            return QueryResult(success=False, error=result.error)
         partial_torrents: MutableMapping[str, PartialTorrent] = {}
-        arguments = cast(TorrentAccessorResponse, response.arguments)
-        torrents = cast(Sequence[TorrentAccessorObject], arguments.torrents)
-        for torrent in torrents:
+        for torrent in result.value:
             wanted_files = {file for file in torrent.wanted}
             file_names = {file.name for file in torrent.files}
             wanted_file_names = set(itertools.compress(file_names, wanted_files))
@@ -204,86 +353,57 @@ class ClutchApi(TransmissionApi):
         return QueryResult(value=partial_torrents)
 
     def get_incomplete_ids(self) -> QueryResult[Set[int]]:
-        response: Response[TorrentAccessorResponse] = self.client.torrent.accessor(
-            fields={
-                "id",
-                "percent_done",
-                "error",
-                "error_string",
-                "is_finished",
-                "left_until_done",
-            }
-        )
-        arguments = cast(TorrentAccessorResponse, response.arguments)
-        torrents: Sequence[TorrentAccessorObject] = cast(
-            Sequence[TorrentAccessorObject], arguments.torrents
-        )
-
-        def is_missing_data_error(error: int, error_string: str):
-            return error == 3 and error_string.startswith("No data found!")
-
+        result = self._torrents_in()
+        if not result.success:
+            return QueryResult(success=False, error=result.error)
         return QueryResult(
             value={
                 torrent.id
-                for torrent in torrents
+                for torrent in result.value
                 if torrent.percent_done == 0.0
                 or is_missing_data_error(torrent.error, torrent.error_string)
             }
         )
 
     def get_metainfo_file_path(self, torrent_id: int) -> QueryResult[Path]:
-        response: Response[TorrentAccessorResponse] = self.client.torrent.accessor(
-            fields={"torrent_file"}
-        )
-        arguments = cast(TorrentAccessorResponse, response.arguments)
-        torrents: Sequence[TorrentAccessorObject] = cast(
-            Sequence[TorrentAccessorObject], arguments.torrents
-        )
-        if len(torrents) != 1:
+        result = self._torrents_in(torrent_id)
+        if not result.success:
+            return QueryResult(success=False, error=result.error)
+        if len(result.value) != 1:
             return QueryResult(error="expected only one result", success=False)
-        return QueryResult(value=Path(torrents[0].torrent_file))
+        return QueryResult(value=Path(result.value[0].torrent_file))
 
     def get_metainfo_file_paths_by_id(
         self, ids: Set[int]
     ) -> QueryResult[Mapping[int, Path]]:
-        response: Response[TorrentAccessorResponse] = self.client.torrent.accessor(
-            fields={"id", "torrent_file", "percent_done"}, ids=ids
-        )
-        arguments = cast(TorrentAccessorResponse, response.arguments)
-        torrents: Sequence[TorrentAccessorObject] = cast(
-            Sequence[TorrentAccessorObject], arguments.torrents
-        )
+        result = self._torrents_in(ids)
+        if not result.success:
+            return QueryResult(success=False, error=result.error)
         return QueryResult(
-            value={torrent.id: Path(torrent.torrent_file) for torrent in torrents}
+            value={torrent.id: Path(torrent.torrent_file) for torrent in result.value}
         )
 
     def get_incomplete_torrent_files(self) -> QueryResult[Set[Path]]:
-        response: Response[TorrentAccessorResponse] = self.client.torrent.accessor(
-            fields={"torrent_file", "percent_done"}
-        )
-        arguments = cast(TorrentAccessorResponse, response.arguments)
-        torrents: Sequence[TorrentAccessorObject] = cast(
-            Sequence[TorrentAccessorObject], arguments.torrents
-        )
+        result = self._torrents_in()
+        if not result.success:
+            return QueryResult(success=False, error=result.error)
         return QueryResult(
             value={
                 Path(torrent.torrent_file)
-                for torrent in torrents
+                for torrent in result.value
                 if torrent.percent_done == 0.0
             }
         )
 
     def get_announce_urls(self) -> QueryResult[Set[str]]:
-        response: Response[TorrentAccessorResponse] = self.client.torrent.accessor(
-            fields={"trackers"}
-        )
-        arguments = cast(TorrentAccessorResponse, response.arguments)
-        torrents: Sequence[TorrentAccessorObject] = cast(
-            Sequence[TorrentAccessorObject], arguments.torrents
-        )
+        result = self._torrents_in(fields={"trackers"})
+        if not result.success:
+            return QueryResult(success=False, error=result.error)
         return QueryResult(
             value={
-                tracker.announce for torrent in torrents for tracker in torrent.trackers
+                tracker.announce
+                for torrent in result.value
+                for tracker in torrent.trackers
             }
         )
 
@@ -291,21 +411,34 @@ class ClutchApi(TransmissionApi):
         def get_announce_urls(torrent) -> Set[str]:
             return {tracker.announce for tracker in torrent.trackers}
 
-        response: Response[TorrentAccessorResponse] = self.client.torrent.accessor(
-            fields={"trackers", "id"}
-        )
-        arguments = cast(TorrentAccessorResponse, response.arguments)
-        torrents: Sequence[TorrentAccessorObject] = cast(
-            Sequence[TorrentAccessorObject], arguments.torrents
+        result = self._torrents_in(fields={"trackers"})
+        if not result.success:
+            return QueryResult(success=False, error=result.error)
+        return QueryResult(
+            value={torrent.id: get_announce_urls(torrent) for torrent in result.value}
         )
+
+    def get_torrent_summaries(self) -> QueryResult[Mapping[int, TorrentSummary]]:
+        result = self._torrents_in(fields={"trackers"})
+        if not result.success:
+            return QueryResult(success=False, error=result.error)
         return QueryResult(
-            value={torrent.id: get_announce_urls(torrent) for torrent in torrents}
+            value={
+                torrent.id: TorrentSummary(
+                    torrent.name,
+                    Path(torrent.torrent_file),
+                    Path(torrent.download_dir),
+                    frozenset(tracker.announce for tracker in torrent.trackers),
+                )
+                for torrent in result.value
+            }
         )
 
     def move_torrent_location(self, torrent_id: int, new_path: Path) -> CommandResult:
         response: Response = self.client.torrent.move(
             ids=torrent_id, location=str(new_path), move=True
         )
+        self.invalidate(torrent_id)
         if response.result != "success":
             return CommandResult(success=False, error=response.result)
         return CommandResult()
@@ -314,92 +447,65 @@ class ClutchApi(TransmissionApi):
         response: Response = self.client.torrent.move(
             ids=torrent_id, location=str(new_path), move=False
         )
+        self.invalidate(torrent_id)
         if response.result != "success":
             return CommandResult(success=False)
         return CommandResult()
 
     def get_torrent_location(self, torrent_id: int) -> QueryResult[Path]:
-        response: Response[TorrentAccessorResponse] = self.client.torrent.accessor(
-            fields={"download_dir"}, ids=torrent_id
-        )
-        if response.result != "success":
-            raise TransmissionError(f"clutch failure: {response.result}")
-        arguments = cast(TorrentAccessorResponse, response.arguments)
-        torrents: Sequence[TorrentAccessorObject] = cast(
-            Sequence[TorrentAccessorObject], arguments.torrents
-        )
-        if len(torrents) != 1:
+        result = self._torrents_in(torrent_id)
+        if not result.success:
+            raise TransmissionError(f"clutch failure: {result.error}")
+        if len(result.value) != 1:
             raise TransmissionError(
                 f"torrent with id {torrent_id} not returned in result"
             )
         else:
-            return QueryResult(value=Path(torrents[0].download_dir))
+            return QueryResult(value=Path(result.value[0].download_dir))
 
     def get_torrent_files_by_id(self) -> QueryResult[Mapping[int, Path]]:
-        response: Response[TorrentAccessorResponse] = self.client.torrent.accessor(
-            fields={"id", "torrent_file"}
-        )
-        if response.result != "success":
-            QueryResult(success=False, error=response.result)
-        arguments = cast(TorrentAccessorResponse, response.arguments)
-        torrents: Sequence[TorrentAccessorObject] = cast(
-            Sequence[TorrentAccessorObject], arguments.torrents
-        )
+        result = self._torrents_in()
+        if not result.success:
+            return QueryResult(success=False, error=result.error)
         return QueryResult(
-            value={torrent.id: Path(torrent.torrent_file) for torrent in torrents}
+            value={torrent.id: Path(torrent.torrent_file) for torrent in result.value}
         )
 
     def get_torrent_hashes_by_id(self) -> QueryResult[Mapping[int, str]]:
-        response: Response[TorrentAccessorResponse] = self.client.torrent.accessor(
-            fields={"id", "hash_string"}
-        )
-        if response.result != "success":
-            return QueryResult(success=False, error=response.result)
-        arguments = cast(TorrentAccessorResponse, response.arguments)
-        torrents: Sequence[TorrentAccessorObject] = cast(
-            Sequence[TorrentAccessorObject], arguments.torrents
-        )
+        result = self._torrents_in()
+        if not result.success:
+            return QueryResult(success=False, error=result.error)
         return QueryResult(
-            value={torrent.id: torrent.hash_string for torrent in torrents}
+            value={torrent.id: torrent.hash_string for torrent in result.value}
         )
 
     def get_torrent_ids_by_hash(self) -> QueryResult[Mapping[str, int]]:
-        response: Response[TorrentAccessorResponse] = self.client.torrent.accessor(
-            fields={"id", "hash_string"}
-        )
-        if response.result != "success":
-            return QueryResult(success=False, error=response.result)
-        arguments = cast(TorrentAccessorResponse, response.arguments)
-        torrents: Sequence[TorrentAccessorObject] = cast(
-            Sequence[TorrentAccessorObject], arguments.torrents
-        )
+        result = self._torrents_in()
+        if not result.success:
+            return QueryResult(success=False, error=result.error)
         return QueryResult(
-            value={torrent.hash_string: torrent.id for torrent in torrents}
+            value={torrent.hash_string: torrent.id for torrent in result.value}
         )
 
     def get_torrent_names_by_id_with_missing_data(
         self,
     ) -> QueryResult[Mapping[int, str]]:
-        response: Response[TorrentAccessorResponse] = self.client.torrent.accessor(
-            fields={"id", "error_string", "error", "name"}
-        )
-        if response.result != "success":
-            return QueryResult(error=response.result, success=False)
-        arguments = cast(TorrentAccessorResponse, response.arguments)
-        torrents: Sequence[TorrentAccessorObject] = cast(
-            Sequence[TorrentAccessorObject], arguments.torrents
+        result = self._torrents_in()
+        if not result.success:
+            return QueryResult(error=result.error, success=False)
+        return QueryResult(
+            value={
+                torrent.id: torrent.name
+                for torrent in result.value
+                if is_missing_data_error(torrent.error, torrent.error_string)
+            }
         )
-        result: MutableMapping[int, str] = {}
-        for torrent in torrents:
-            # no data found error found in torrent.c in Transmission project
-            if torrent.error == 3 and "No data found!" in torrent.error_string:
-                result[torrent.id] = torrent.name
-        return QueryResult(value=result)
 
     def remove_torrent_keeping_data(self, torrent_id: int) -> CommandResult:
         response: Response[TorrentAccessorResponse] = self.client.torrent.remove(
             torrent_id, delete_local_data=False
         )
+        self.invalidate(torrent_id)
         if response.result != "success":
             return CommandResult(error=response.result, success=False)
         return CommandResult()
@@ -408,15 +514,92 @@ class ClutchApi(TransmissionApi):
         response: Response[TorrentAccessorResponse] = self.client.torrent.action(
             TorrentActionMethod.VERIFY, torrent_id
         )
+        self.invalidate(torrent_id)
         if response.result != "success":
             return CommandResult(error=response.result, success=False)
         return CommandResult()
 
+    def rename_torrent_path(
+        self, torrent_id: int, path: str, name: str
+    ) -> CommandResult:
+        response: Response = self.client.torrent.rename(
+            ids=torrent_id, path=path, name=name
+        )
+        self.invalidate(torrent_id)
+        if response.result != "success":
+            return CommandResult(error=response.result, success=False)
+        return CommandResult()
+
+    def _in_batches(
+        self, ids: Set[int], send: Callable[[Set[int]], Response]
+    ) -> CommandResult:
+        errors = []
+        ordered = sorted(ids)
+        for start in range(0, len(ordered), self.batch_size):
+            batch = set(ordered[start : start + self.batch_size])
+            response = send(batch)
+            self.invalidate(batch)
+            if response.result != "success":
+                errors.append(response.result)
+        if errors:
+            return CommandResult(error=errors[0], success=False)
+        return CommandResult()
+
+    def remove_torrents_keeping_data(self, ids: Set[int]) -> CommandResult:
+        return self._in_batches(
+            ids,
+            lambda batch: self.client.torrent.remove(batch, delete_local_data=False),
+        )
+
+    def verify_torrents(self, ids: Set[int]) -> CommandResult:
+        return self._in_batches(
+            ids,
+            lambda batch: self.client.torrent.action(TorrentActionMethod.VERIFY, batch),
+        )
+
+    def start_torrents(self, ids: Set[int]) -> CommandResult:
+        return self._in_batches(
+            ids,
+            lambda batch: self.client.torrent.action(TorrentActionMethod.START, batch),
+        )
+
+    def stop_torrents(self, ids: Set[int]) -> CommandResult:
+        return self._in_batches(
+            ids,
+            lambda batch: self.client.torrent.action(TorrentActionMethod.STOP, batch),
+        )
+
+    def move_torrents_location(self, ids: Set[int], new_path: Path) -> CommandResult:
+        return self._in_batches(
+            ids,
+            lambda batch: self.client.torrent.move(
+                ids=batch, location=str(new_path), move=True
+            ),
+        )
+
 
 class DryRunClient(TransmissionApi):
+    def remove_torrents_keeping_data(self, ids: Set[int]) -> CommandResult:
+        pass
+
+    def verify_torrents(self, ids: Set[int]) -> CommandResult:
+        pass
+
+    def start_torrents(self, ids: Set[int]) -> CommandResult:
+        pass
+
+    def stop_torrents(self, ids: Set[int]) -> CommandResult:
+        pass
+
+    def move_torrents_location(self, ids: Set[int], new_path: Path) -> CommandResult:
+        pass
+
     def verify(self, torrent_id: int) -> CommandResult:
         pass
 
+    def invalidate(self, ids: IdsArg = None):
+        pass
+
     def get_errors_by_id(
         self, ids: Set[int]
     ) -> QueryResult[Mapping[int, Tuple[int, str]]]:
@@ -457,6 +640,9 @@ class DryRunClient(TransmissionApi):
     def get_torrent_trackers(self) -> QueryResult[Mapping[int, Set[str]]]:
         pass
 
+    def get_torrent_summaries(self) -> QueryResult[Mapping[int, TorrentSummary]]:
+        pass
+
     def move_torrent_location(self, torrent_id, new_path) -> CommandResult:
         pass
 
@@ -482,3 +668,81 @@ class DryRunClient(TransmissionApi):
 
     def remove_torrent_keeping_data(self, torrent_id) -> CommandResult:
         pass
+
+    def rename_torrent_path(
+        self, torrent_id: int, path: str, name: str
+    ) -> CommandResult:
+        pass
+
+
+class AsyncTransmissionApi(Protocol):
+    """The requests made for every torrent while adding, as coroutines, so that
+    many of them can be in flight at the same time.
+    """
+
+    async def add_torrent(self, file: Path) -> CommandResult:
+        raise NotImplementedError
+
+    async def add_torrent_with_files(
+        self, file: Path, download_dir: Path
+    ) -> CommandResult:
+        raise NotImplementedError
+
+    async def rename_torrent_path(
+        self, torrent_id: int, path: str, name: str
+    ) -> CommandResult:
+        raise NotImplementedError
+
+    async def close(self):
+        raise NotImplementedError
+
+
+class AsyncRpcApi(AsyncTransmissionApi):
+    def __init__(self, client: AsyncRpcClient):
+        self.client = client
+
+    async def _request(
+        self, method: str, arguments: Mapping
+    ) -> Tuple[CommandResult, Mapping]:
+        try:
+            response = await self.client.request(method, arguments)
+        except asyncio.TimeoutError:
+            error = f"no response within {self.client.timeout} seconds"
+            return CommandResult(error=error, success=False), {}
+        except (RpcError, OSError, json.JSONDecodeError) as e:
+            # OSError covers refused and reset connections
+            return CommandResult(error=str(e), success=False), {}
+        if response.get("result") != "success":
+            return CommandResult(error=response.get("result"), success=False), {}
+        return CommandResult(), response.get("arguments") or {}
+
+    async def _add(self, arguments: Mapping) -> CommandResult:
+        (result, response) = await self._request("torrent-add", arguments)
+        if not result.success:
+            return result
+        if response.get("torrent-added"):
+            return CommandResult(id=response["torrent-added"]["id"])
+        elif response.get("torrent-duplicate"):
+            return CommandResult(error="duplicate torrent", success=False)
+        return CommandResult(error="unknown error", success=False)
+
+    async def add_torrent(self, file: Path) -> CommandResult:
+        return await self._add({"filename": str(file), "paused": True})
+
+    async def add_torrent_with_files(
+        self, file: Path, download_dir: Path
+    ) -> CommandResult:
+        return await self._add(
+            {"filename": str(file), "download-dir": str(download_dir), "paused": True}
+        )
+
+    async def rename_torrent_path(
+        self, torrent_id: int, path: str, name: str
+    ) -> CommandResult:
+        (result, _) = await self._request(
+            "torrent-rename-path", {"ids": [torrent_id], "path": path, "name": name}
+        )
+        return result
+
+    async def close(self):
+        await self.client.close()
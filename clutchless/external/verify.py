@@ -0,0 +1,436 @@
+"""Hashing of torrent data, piece by piece, the way BitTorrent checks it.
+reference: https://www.bittorrent.org/beps/bep_0003.html#info-dictionary
+"""
+import hashlib
+import math
+import os
+import threading
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from random import Random
+from typing import (
+    Sequence,
+    Optional,
+    Iterator,
+    Tuple,
+    MutableMapping,
+    List,
+    BinaryIO,
+    Set,
+    Iterable,
+)
+
+from clutchless.domain.torrent import MetainfoFile
+
+# data each worker hashes in one go: sequential enough for readahead to pay off
+TASK_SIZE = 32 * 2**20
+
+
+def default_threads() -> int:
+    return min(8, os.cpu_count() or 1)
+
+
+@dataclass(frozen=True)
+class FileCompleteness:
+    """How much of a file (at 'path' below the data location) hashed correctly."""
+
+    path: Path
+    length: int
+    verified: int
+
+    @property
+    def fraction(self) -> float:
+        return self.verified / self.length if self.length > 0 else 1.0
+
+    @property
+    def is_complete(self) -> bool:
+        return self.verified == self.length
+
+
+@dataclass(frozen=True)
+class VerifyResult:
+    """'pieces' holds a byte for every piece, 1 if it hashed correctly."""
+
+    metainfo_file: MetainfoFile
+    location: Path
+    name: Optional[str]
+    pieces: bytes
+    files: Sequence[FileCompleteness]
+
+    @property
+    def valid_pieces(self) -> int:
+        return self.pieces.count(1)
+
+    @property
+    def is_complete(self) -> bool:
+        return self.valid_pieces == len(self.pieces)
+
+
+@dataclass(frozen=True)
+class Sample:
+    """How many pieces a sampled check picks at random: a fraction of them, or a
+    count, whichever is more.
+    """
+
+    fraction: float = 0.0
+    count: int = 0
+
+    @classmethod
+    def parse(cls, value: str) -> "Sample":
+        """Reads a count (64) or a fraction (0.01 or 1%)."""
+        try:
+            if value.endswith("%"):
+                sample = cls(fraction=float(value[:-1]) / 100)
+            elif "." in value:
+                sample = cls(fraction=float(value))
+            else:
+                sample = cls(count=int(value))
+        except ValueError:
+            sample = None
+        if sample is None or not 0 <= sample.fraction <= 1 or sample.count < 0:
+            raise ValueError(
+                f"sample must be a count of pieces or a fraction, not {value}"
+            )
+        return sample
+
+    def size(self, piece_count: int) -> int:
+        return min(piece_count, max(self.count, math.ceil(self.fraction * piece_count)))
+
+
+@dataclass(frozen=True)
+class SampleResult:
+    """What a sampled check hashed: 'hashed' pieces in all, 'chosen' of them at
+    random out of 'candidates' (the pieces that aren't first or last of a file).
+    'full' is the result of hashing every piece, when the sample had a bad one.
+    'complete_files' are the files (indices in the order of MetainfoFile.spans)
+    that had every one of their pieces hashed.
+    """
+
+    metainfo_file: MetainfoFile
+    location: Path
+    name: Optional[str]
+    is_valid: bool
+    hashed: int
+    chosen: int
+    candidates: int
+    full: Optional[VerifyResult] = None
+    complete_files: Sequence[int] = ()
+
+    def bad_fraction_bound(self, confidence: float = 0.95) -> float:
+        """Returns the most of the pieces that weren't hashed that can be bad, with
+        'confidence': if more were, a sample this size would have had a bad one
+        with at least that probability.
+        """
+        if self.chosen == self.candidates:
+            return 0.0
+        if self.chosen == 0:
+            return 1.0
+        return 1 - (1 - confidence) ** (1 / self.chosen)
+
+
+class _Layout:
+    """Where the files of a torrent's data lie in the stream that's cut into pieces."""
+
+    def __init__(self, file: MetainfoFile, location: Path, name: str = None):
+        self.file = file
+        self.piece_length = file.piece_length
+        self.paths: List[Path] = []
+        self.relative_paths: List[Path] = []
+        self.offsets: List[int] = []
+        self.lengths: List[int] = []
+        for (relative_path, offset, length) in file.spans(name):
+            self.paths.append(location / relative_path)
+            self.relative_paths.append(relative_path)
+            self.offsets.append(offset)
+            self.lengths.append(length)
+        self.length = sum(self.lengths)
+        self.piece_count = -(-self.length // self.piece_length)
+        # loaded once here, rather than by whichever worker gets there first
+        self.pieces = file.pieces
+
+    def piece_size(self, index: int) -> int:
+        return min(self.piece_length, self.length - index * self.piece_length)
+
+    def piece_hash(self, index: int) -> bytes:
+        return self.pieces[index * 20 : (index + 1) * 20]
+
+    def segments(self, start: int, size: int) -> Iterator[Tuple[int, int, int]]:
+        """Yields the file index, offset in the file and length of every part of a
+        span of the stream.
+        """
+        index = bisect_right(self.offsets, start) - 1
+        while size > 0:
+            end = self.offsets[index] + self.lengths[index]
+            if start < end:
+                length = min(size, end - start)
+                yield index, start - self.offsets[index], length
+                start += length
+                size -= length
+            index += 1
+
+    def boundary_pieces(self) -> Set[int]:
+        """Returns the indices of the first and last piece of every file."""
+        pieces = set()
+        for (offset, length) in zip(self.offsets, self.lengths):
+            if length > 0:
+                pieces.add(offset // self.piece_length)
+                pieces.add((offset + length - 1) // self.piece_length)
+        return pieces
+
+    def pieces_of(self, files: Iterable[int]) -> List[int]:
+        """Returns the indices of the pieces that hold data of some files."""
+        pieces = set()
+        for index in files:
+            offset, length = self.offsets[index], self.lengths[index]
+            if length > 0:
+                first = offset // self.piece_length
+                last = (offset + length - 1) // self.piece_length
+                pieces.update(range(first, last + 1))
+        return sorted(pieces)
+
+    def completeness(self, valid: bytes) -> List[FileCompleteness]:
+        result = []
+        for (relative_path, offset, length) in zip(
+            self.relative_paths, self.offsets, self.lengths
+        ):
+            verified = length
+            end = offset + length
+            for index in range(
+                offset // self.piece_length, -(-end // self.piece_length)
+            ):
+                if not valid[index]:
+                    piece_start = index * self.piece_length
+                    piece_end = piece_start + self.piece_length
+                    verified -= min(end, piece_end) - max(offset, piece_start)
+            result.append(FileCompleteness(relative_path, length, verified))
+        return result
+
+
+class _OpenFiles:
+    """The files one worker reads, opened as they're needed."""
+
+    def __init__(self, layout: _Layout, start: int, end: int, sequential: bool):
+        self.layout = layout
+        # the span of the stream the worker hashes, to advise the kernel about
+        self.start = start
+        self.end = end
+        self.sequential = sequential
+        self.files: MutableMapping[int, Optional[BinaryIO]] = {}
+
+    def __enter__(self) -> "_OpenFiles":
+        return self
+
+    def __exit__(self, *args):
+        for file in self.files.values():
+            if file is not None:
+                file.close()
+
+    def get(self, index: int) -> Optional[BinaryIO]:
+        if index not in self.files:
+            self.files[index] = self._open(index)
+        return self.files[index]
+
+    def _open(self, index: int) -> Optional[BinaryIO]:
+        try:
+            # unbuffered, pieces are read straight into the worker's buffer
+            file = open(self.layout.paths[index], "rb", buffering=0)
+        except OSError:
+            return None
+        if hasattr(os, "posix_fadvise") and not self.sequential:
+            # reading ahead of scattered pieces is wasted
+            os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_RANDOM)
+        elif hasattr(os, "posix_fadvise"):
+            offset = self.layout.offsets[index]
+            start = max(self.start - offset, 0)
+            length = min(self.end - offset, self.layout.lengths[index]) - start
+            os.posix_fadvise(file.fileno(), start, length, os.POSIX_FADV_SEQUENTIAL)
+            os.posix_fadvise(file.fileno(), start, length, os.POSIX_FADV_WILLNEED)
+        return file
+
+    def read_into(self, start: int, view: memoryview) -> bool:
+        """Fills 'view' with the stream from 'start', False if any of it is missing."""
+        position = 0
+        for (index, offset, length) in self.layout.segments(start, len(view)):
+            file = self.get(index)
+            if file is None:
+                return False
+            end = position + length
+            try:
+                file.seek(offset)
+                while position < end:
+                    read = file.readinto(view[position:end])
+                    if not read:
+                        return False
+                    position += read
+            except OSError:
+                return False
+        return True
+
+
+class PieceVerifier:
+    """Hashes every piece of a torrent's data against the metainfo, reading across
+    file boundaries the way BitTorrent does.
+
+    The data is split into spans that are hashed on a pool of threads (reading files
+    and hashing both release the GIL), each reading its span front to back into a
+    buffer the size of a piece. Files are read rather than mapped, since a mapped
+    file that's truncated while it's hashed would crash the process (SIGBUS).
+    """
+
+    def __init__(
+        self,
+        threads: int = None,
+        task_size: int = TASK_SIZE,
+        random: Random = None,
+    ):
+        self.threads = threads or default_threads()
+        self.task_size = task_size
+        self.random = random or Random()
+
+    def verify(
+        self, file: MetainfoFile, location: Path, name: str = None
+    ) -> VerifyResult:
+        """Hashes every piece of the data at 'location', 'name' overrides the torrent name."""
+        layout = _Layout(file, location, name)
+        valid = bytearray(layout.piece_count)
+        tasks = self._sequential_tasks(layout, range(layout.piece_count))
+        self._hash(layout, tasks, valid, threading.Event(), False)
+        return VerifyResult(
+            file, location, name, bytes(valid), layout.completeness(valid)
+        )
+
+    def check(
+        self,
+        file: MetainfoFile,
+        location: Path,
+        name: str = None,
+        files: Sequence[int] = None,
+    ) -> bool:
+        """Returns whether every piece hashes as it should, stopping at the first
+        one that doesn't. 'files' limits it to the pieces of those files (indices
+        in the order of MetainfoFile.spans).
+        """
+        layout = _Layout(file, location, name)
+        if files is None:
+            pieces: Sequence[int] = range(layout.piece_count)
+        else:
+            pieces = layout.pieces_of(files)
+        valid = bytearray(layout.piece_count)
+        mismatch = threading.Event()
+        tasks = self._sequential_tasks(layout, pieces)
+        self._hash(layout, tasks, valid, mismatch, True)
+        return not mismatch.is_set()
+
+    def sample(
+        self,
+        file: MetainfoFile,
+        location: Path,
+        name: str = None,
+        sample: Sample = None,
+        escalate: bool = True,
+    ) -> SampleResult:
+        """Hashes the first and last piece of every file and a sample of the other
+        pieces, chosen at random. When any of them doesn't hash as it should and
+        'escalate' is set, every piece is hashed (see verify) for the result.
+        """
+        sample = sample or Sample(fraction=0.01)
+        layout = _Layout(file, location, name)
+        boundaries = layout.boundary_pieces()
+        candidates = layout.piece_count - len(boundaries)
+        size = min(sample.size(layout.piece_count), candidates)
+        # a few extra, so there are still enough once boundary pieces are left out
+        drawn = self.random.sample(
+            range(layout.piece_count), min(size + len(boundaries), layout.piece_count)
+        )
+        chosen = [index for index in drawn if index not in boundaries][:size]
+        pieces = sorted(boundaries.union(chosen))
+        valid = bytearray(layout.piece_count)
+        mismatch = threading.Event()
+        step = max(1, -(-len(pieces) // self.threads))
+        tasks = [pieces[first : first + step] for first in range(0, len(pieces), step)]
+        self._hash(layout, tasks, valid, mismatch, True, False)
+        full = None
+        if mismatch.is_set() and escalate:
+            full = self.verify(file, location, name)
+        hashed = set(pieces)
+        complete_files = [
+            index
+            for index in range(len(layout.lengths))
+            if hashed.issuperset(layout.pieces_of([index]))
+        ]
+        return SampleResult(
+            file,
+            location,
+            name,
+            not mismatch.is_set(),
+            len(pieces),
+            len(chosen),
+            candidates,
+            full,
+            complete_files,
+        )
+
+    def _sequential_tasks(
+        self, layout: _Layout, pieces: Sequence[int]
+    ) -> List[Sequence[int]]:
+        step = max(1, self.task_size // layout.piece_length)
+        return [pieces[first : first + step] for first in range(0, len(pieces), step)]
+
+    def _hash(
+        self,
+        layout: _Layout,
+        tasks: Sequence[Sequence[int]],
+        valid: bytearray,
+        mismatch: threading.Event,
+        stop_early: bool,
+        sequential: bool = True,
+    ):
+        if self.threads == 1 or len(tasks) < 2:
+            for pieces in tasks:
+                self._hash_pieces(
+                    layout, pieces, valid, mismatch, stop_early, sequential
+                )
+            return
+        with ThreadPoolExecutor(min(self.threads, len(tasks))) as pool:
+            futures = [
+                pool.submit(
+                    self._hash_pieces,
+                    layout,
+                    pieces,
+                    valid,
+                    mismatch,
+                    stop_early,
+                    sequential,
+                )
+                for pieces in tasks
+            ]
+            for future in futures:
+                future.result()
+
+    @staticmethod
+    def _hash_pieces(
+        layout: _Layout,
+        pieces: Sequence[int],
+        valid: bytearray,
+        mismatch: threading.Event,
+        stop_early: bool,
+        sequential: bool,
+    ):
+        buffer = memoryview(bytearray(layout.piece_length))
+        start = pieces[0] * layout.piece_length
+        end = min((pieces[-1] + 1) * layout.piece_length, layout.length)
+        with _OpenFiles(layout, start, end, sequential) as files:
+            for index in pieces:
+                if stop_early and mismatch.is_set():
+                    return
+                view = buffer[: layout.piece_size(index)]
+                is_valid = files.read_into(
+                    index * layout.piece_length, view
+                ) and hashlib.sha1(view).digest() == layout.piece_hash(index)
+                if is_valid:
+                    valid[index] = 1
+                elif stop_early:
+                    mismatch.set()
+                    return
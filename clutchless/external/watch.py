@@ -0,0 +1,206 @@
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import os
+import struct
+from pathlib import Path
+from typing import Protocol, Iterable, Set, Mapping, MutableMapping, Tuple, Optional
+
+from clutchless.external.filesystem import Filesystem, DirectoryScanner
+
+logger = logging.getLogger(__name__)
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (
+    IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class Watcher(Protocol):
+    async def run(self, roots: Iterable[Path], queue: asyncio.Queue):
+        """Puts the path of everything created, changed or removed below roots on the queue.
+        Runs until cancelled. A path may be reported any number of times.
+        """
+        raise NotImplementedError
+
+
+class PollingWatcher(Watcher):
+    """Walks the roots every 'interval' seconds and reports what differs from the last walk."""
+
+    def __init__(self, scanner: DirectoryScanner, interval: float):
+        self.scanner = scanner
+        self.interval = interval
+
+    async def _snapshot(self, roots: Iterable[Path]) -> Mapping[Path, Tuple]:
+        return {
+            entry.path: (entry.is_dir, entry.size, entry.mtime_ns)
+            async for entry in self.scanner.walk(roots)
+        }
+
+    async def run(self, roots: Iterable[Path], queue: asyncio.Queue):
+        roots = set(roots)
+        previous = await self._snapshot(roots)
+        while True:
+            await asyncio.sleep(self.interval)
+            current = await self._snapshot(roots)
+            for path in previous.keys() - current.keys():
+                queue.put_nowait(path)
+            for (path, state) in current.items():
+                if previous.get(path) != state:
+                    queue.put_nowait(path)
+            previous = current
+
+
+class InotifyWatcher(Watcher):
+    """Subscribes to inotify events for every directory below the roots (Linux only).
+
+    New directories are watched as they appear. When the kernel's event queue
+    overflows, the roots themselves are reported so everything is looked at again.
+    """
+
+    def __init__(self, fs: Filesystem, scanner: DirectoryScanner):
+        self.fs = fs
+        self.scanner = scanner
+        self.libc = self._load_libc()
+        self.fd: Optional[int] = None
+        self.directories: MutableMapping[int, Path] = {}
+        self.roots: Set[Path] = set()
+        # walks of new directories still adding watches
+        self.tasks: Set[asyncio.Future] = set()
+
+    @staticmethod
+    def _load_libc() -> ctypes.CDLL:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        # raises AttributeError where inotify is missing
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_uint32,
+        ]
+        return libc
+
+    @classmethod
+    def is_available(cls) -> bool:
+        try:
+            cls._load_libc()
+        except (OSError, AttributeError):
+            return False
+        return True
+
+    def _add_watch(self, directory: Path):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            logger.warning(f"can't watch {directory}: {os.strerror(errno)}")
+            return
+        self.directories[wd] = directory
+
+    async def _add_tree(self, directory: Path):
+        # walked like the roots, so directory links can't make it loop
+        self._add_watch(directory)
+        async for entry in self.scanner.walk([directory]):
+            if entry.is_dir:
+                self._add_watch(entry.path)
+
+    def _watch_tree(self, directory: Path):
+        task = asyncio.ensure_future(self._add_tree(directory))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def _read_events(self, queue: asyncio.Queue):
+        try:
+            buffer = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = buffer[offset : offset + length].rstrip(b"\0")
+            offset += length
+            self._handle(wd, mask, os.fsdecode(name), queue)
+
+    def _handle(self, wd: int, mask: int, name: str, queue: asyncio.Queue):
+        if mask & IN_Q_OVERFLOW:
+            logger.warning("inotify queue overflowed, reporting roots")
+            for root in self.roots:
+                queue.put_nowait(root)
+            return
+        directory = self.directories.get(wd)
+        if directory is None:
+            return
+        if mask & IN_IGNORED:
+            del self.directories[wd]
+            return
+        path = directory / name if name else directory
+        if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+            self._watch_tree(path)
+        queue.put_nowait(path)
+
+    async def run(self, roots: Iterable[Path], queue: asyncio.Queue):
+        self.roots = set(roots)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        loop = asyncio.get_running_loop()
+        try:
+            for root in self.roots:
+                self._add_watch(root)
+            async for entry in self.scanner.walk(self.roots):
+                if entry.is_dir:
+                    self._add_watch(entry.path)
+            loop.add_reader(self.fd, self._read_events, queue)
+            await asyncio.Future()
+        finally:
+            for task in list(self.tasks):
+                task.cancel()
+            loop.remove_reader(self.fd)
+            os.close(self.fd)
+            self.fd = None
+            self.directories.clear()
+
+
+def get_watcher(
+    fs: Filesystem, scanner: DirectoryScanner, interval: Optional[float]
+) -> Watcher:
+    """Returns an inotify watcher where possible, unless a polling interval is given."""
+    if interval is None and InotifyWatcher.is_available():
+        return InotifyWatcher(fs, scanner)
+    return PollingWatcher(scanner, interval or 10.0)
+
+
+async def next_batch(queue: asyncio.Queue, quiet: float) -> Set[Path]:
+    """Waits for changes, then collects them until none arrived for 'quiet' seconds.
+    A steady stream of changes is cut into batches at ten times that delay.
+    """
+    batch = {await queue.get()}
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + quiet * 10
+    while True:
+        timeout = min(quiet, deadline - loop.time())
+        if timeout <= 0:
+            return batch
+        try:
+            batch.add(await asyncio.wait_for(queue.get(), timeout))
+        except asyncio.TimeoutError:
+            return batch
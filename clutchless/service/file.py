@@ -2,7 +2,7 @@ import asyncio
 import logging
 import signal
 from pathlib import Path
-from typing import Iterable, Set, Tuple, AsyncGenerator, Sequence
+from typing import Iterable, Set, Tuple, AsyncGenerator, Sequence, Optional
 
 from clutchless.domain.torrent import MetainfoFile
 from clutchless.external.filesystem import (
@@ -10,6 +10,7 @@ from clutchless.external.filesystem import (
     Filesystem,
     SingleDirectoryFileLocator,
     AggregateFileLocator,
+    DirectoryScanner,
 )
 from clutchless.external.metainfo import MetainfoIO
 
@@ -103,18 +104,23 @@ async def collect_from_aggregate(
 
 
 async def generate_metainfo_paths(
-    fs: Filesystem, paths: Iterable[Path]
+    fs: Filesystem, paths: Iterable[Path], scanner: Optional[DirectoryScanner] = None
 ) -> AsyncGenerator[Path, None]:
     dirs, files = _sort_into_dirs_and_files(fs, set(paths))
     for result in _validate_metainfo_files(files):
         yield result
-    locators = (SingleDirectoryFileLocator(fs, directory) for directory in dirs)
+    scanner = scanner or DirectoryScanner(fs)
+    locators = (
+        SingleDirectoryFileLocator(fs, directory, scanner) for directory in dirs
+    )
     async for result in collect_from_aggregate(fs, locators):
         yield result
 
 
-async def _collect(fs: Filesystem, paths: Set[Path]) -> Iterable[Path]:
-    gen = generate_metainfo_paths(fs, paths)
+async def _collect(
+    fs: Filesystem, paths: Set[Path], scanner: Optional[DirectoryScanner] = None
+) -> Iterable[Path]:
+    gen = generate_metainfo_paths(fs, paths, scanner)
     results = set()
     async for path in gen:
         results.add(path)
@@ -122,7 +128,9 @@ async def _collect(fs: Filesystem, paths: Set[Path]) -> Iterable[Path]:
 
 
 def collect_metainfo_paths(
-    fs: Filesystem, raw_torrent_paths: Iterable[str]
+    fs: Filesystem,
+    raw_torrent_paths: Iterable[str],
+    scanner: Optional[DirectoryScanner] = None,
 ) -> Set[Path]:
     """Returns valid metainfo paths.
     For each path supplied, this function categorizes each as a file or directory.
@@ -134,7 +142,7 @@ def collect_metainfo_paths(
 
     async def _main():
         loop = asyncio.get_event_loop()
-        task = asyncio.create_task(_collect(fs, paths))
+        task = asyncio.create_task(_collect(fs, paths, scanner))
 
         def _interrupt():
             task.cancel()
@@ -148,11 +156,14 @@ def collect_metainfo_paths(
 def _get_metainfo_files(
     reader: MetainfoIO, paths: Iterable[Path]
 ) -> Iterable[MetainfoFile]:
-    return (reader.from_path(path) for path in paths)
+    return reader.from_paths(paths)
 
 
 def collect_metainfo_files(
-    reader: MetainfoIO, fs: Filesystem, raw_torrent_paths: Iterable[str]
+    reader: MetainfoIO,
+    fs: Filesystem,
+    raw_torrent_paths: Iterable[str],
+    scanner: Optional[DirectoryScanner] = None,
 ) -> Iterable[MetainfoFile]:
-    paths = collect_metainfo_paths(fs, raw_torrent_paths)
+    paths = collect_metainfo_paths(fs, raw_torrent_paths, scanner)
     return _get_metainfo_files(reader, paths)
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+from pathlib import Path
+from typing import Iterable, Optional, Callable, MutableSequence, Sequence, Awaitable
+
+from clutchless.domain.torrent import MetainfoFile
+from clutchless.external.filesystem import Filesystem, DirectoryScanner
+from clutchless.external.metainfo import MetainfoIO, TorrentDataLocator, TorrentData
+from clutchless.service.file import generate_metainfo_paths
+
+logger = logging.getLogger(__name__)
+
+# put on a queue after the last item
+_DONE = object()
+
+
+class _Failed:
+    """Passed down to the consumer when a stage raised."""
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+class AddPipeline:
+    """Streams metainfo files from discovery, through parsing and data lookup,
+    to a consumer, all on one event loop.
+
+    Stages are joined by bounded queues, so a stage that falls behind holds back
+    the ones before it instead of results piling up in memory, and the first
+    torrents reach the consumer while later ones are still being discovered.
+    """
+
+    # most metainfo files parsed in one go (see MetainfoIO.from_paths)
+    BATCH_SIZE = 64
+
+    def __init__(
+        self,
+        fs: Filesystem,
+        reader: MetainfoIO,
+        scanner: DirectoryScanner,
+        data_locator: Optional[TorrentDataLocator] = None,
+        queue_size: int = 256,
+        lookups: int = 16,
+    ):
+        self.fs = fs
+        self.reader = reader
+        self.scanner = scanner
+        self.data_locator = data_locator
+        self.queue_size = queue_size
+        self.lookups = lookups
+
+    async def _discover(self, paths: Iterable[Path], found: asyncio.Queue):
+        async for path in generate_metainfo_paths(self.fs, paths, self.scanner):
+            await found.put(path)
+        await found.put(_DONE)
+
+    def _read(self, paths: Sequence[Path]) -> Sequence[MetainfoFile]:
+        try:
+            return self.reader.from_paths(paths)
+        except Exception:
+            # one unreadable file shouldn't lose the others in its batch
+            files = []
+            for path in paths:
+                try:
+                    files.append(self.reader.from_path(path))
+                except Exception as e:
+                    logger.warning(f"skipping unreadable metainfo file {path}: {e}")
+            return files
+
+    async def _parse(self, found: asyncio.Queue, parsed: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        is_done = False
+        while not is_done:
+            batch: MutableSequence[Path] = [await found.get()]
+            while len(batch) < self.BATCH_SIZE and not found.empty():
+                batch.append(found.get_nowait())
+            if batch[-1] is _DONE:
+                batch.pop()
+                is_done = True
+            for file in await loop.run_in_executor(None, self._read, batch):
+                await parsed.put(file)
+        await parsed.put(_DONE)
+
+    async def _locate(self, parsed: asyncio.Queue, located: asyncio.Queue):
+        while True:
+            file = await parsed.get()
+            if file is _DONE:
+                # let the other lookups see it too
+                await parsed.put(_DONE)
+                return
+            if self.data_locator is None:
+                await located.put(TorrentData(file))
+            else:
+                await located.put(await self.data_locator.find(file))
+
+    async def _lookups(self, parsed: asyncio.Queue, located: asyncio.Queue):
+        await asyncio.gather(
+            *(self._locate(parsed, located) for _ in range(self.lookups))
+        )
+        await located.put(_DONE)
+
+    @staticmethod
+    async def _stage(stage, located: asyncio.Queue):
+        try:
+            await stage
+        except Exception as e:
+            await located.put(_Failed(e))
+
+    async def run(self, paths: Iterable[Path], consume: Callable[[TorrentData], None]):
+        """Calls 'consume' (in a worker thread, one at a time) for every metainfo
+        file found below 'paths', as soon as its data was looked for.
+        """
+        loop = asyncio.get_running_loop()
+
+        async def _consume(data: TorrentData):
+            await loop.run_in_executor(None, consume, data)
+
+        await self.run_async(paths, _consume)
+
+    @staticmethod
+    async def _consume(
+        located: asyncio.Queue, consume: Callable[[TorrentData], Awaitable[None]]
+    ):
+        while True:
+            data = await located.get()
+            if data is _DONE:
+                # let the other consumers see it too
+                await located.put(_DONE)
+                return
+            if isinstance(data, _Failed):
+                raise data.error
+            await consume(data)
+
+    async def run_async(
+        self,
+        paths: Iterable[Path],
+        consume: Callable[[TorrentData], Awaitable[None]],
+        consumers: int = 1,
+    ):
+        """Like run, but awaits 'consume' on the event loop, with up to 'consumers'
+        of them running at the same time.
+        """
+        found: asyncio.Queue = asyncio.Queue(self.queue_size)
+        parsed: asyncio.Queue = asyncio.Queue(self.queue_size)
+        located: asyncio.Queue = asyncio.Queue(self.queue_size)
+        stages = [
+            asyncio.create_task(self._stage(stage, located))
+            for stage in (
+                self._discover(paths, found),
+                self._parse(found, parsed),
+                self._lookups(parsed, located),
+            )
+        ]
+        workers = [
+            asyncio.create_task(self._consume(located, consume))
+            for _ in range(consumers)
+        ]
+        tasks = stages + workers
+        try:
+            await asyncio.gather(*workers)
+            await asyncio.gather(*stages)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -26,14 +26,20 @@ from clutchless.external.metainfo import (
     TorrentDataLocator,
 )
 from clutchless.external.result import QueryResult, CommandResult
-from clutchless.external.transmission import TransmissionApi
+from clutchless.external.transmission import (
+    TransmissionApi,
+    TorrentSummary,
+    AsyncTransmissionApi,
+    BATCH_SIZE,
+)
 
 logger = logging.getLogger(__name__)
 
 
-class AddService:
-    def __init__(self, api: TransmissionApi):
-        self.api = api
+class AddResults:
+    """What happened to the torrents given to an add service."""
+
+    def __init__(self):
         self.success: MutableSequence[MetainfoFile] = []
         self.added_without_data: MutableSequence[MetainfoFile] = []
         # these are added together (if linking)
@@ -46,26 +52,44 @@ class AddService:
         self.fail: MutableSequence[MetainfoFile] = []
         self.error: MutableSequence[str] = []
 
-    def add(self, file: MetainfoFile):
-        path = cast(Path, file.path)
-        result = self.api.add_torrent(path)
+    def _added(self, file: MetainfoFile, result: CommandResult):
         if result.success:
             self.success.append(file)
             self.added_without_data.append(file)
         else:
-            self.fail.append(file)
-            self.error.append(result.error or "empty error string")
+            self._failed(file, result)
 
-    def add_with_data(self, file: MetainfoFile, data_path: Path):
-        path = cast(Path, file.path)
-        result = self.api.add_torrent_with_files(path, data_path)
+    def _added_with_data(
+        self, file: MetainfoFile, data_path: Path, result: CommandResult
+    ):
         if result.success:
             self.success.append(file)
             self.found.append(file)
             self.link.append(data_path)
         else:
-            self.fail.append(file)
-            self.error.append(result.error or "empty error string")
+            self._failed(file, result)
+
+    def _failed(self, file: MetainfoFile, result: CommandResult):
+        self.fail.append(file)
+        self.error.append(result.error or "empty error string")
+
+
+class AddService(AddResults):
+    def __init__(self, api: TransmissionApi):
+        super().__init__()
+        self.api = api
+
+    def add(self, file: MetainfoFile):
+        path = cast(Path, file.path)
+        self._added(file, self.api.add_torrent(path))
+
+    def add_with_data(self, file: MetainfoFile, data_path: Path, data_name: str = None):
+        path = cast(Path, file.path)
+        result = self.api.add_torrent_with_files(path, data_path)
+        if result.success and data_name is not None:
+            # point the torrent at its renamed data before anything is verified
+            result = self.api.rename_torrent_path(result.id, file.name, data_name)
+        self._added_with_data(file, data_path, result)
 
 
 class LinkOnlyAddService(AddService):
@@ -73,6 +97,34 @@ class LinkOnlyAddService(AddService):
         pass
 
 
+class AsyncAddService(AddResults):
+    """AddService for an AsyncTransmissionApi, so torrents can be added while
+    others are (see StreamingAddCommand).
+    """
+
+    def __init__(self, api: AsyncTransmissionApi, link_only: bool = False):
+        super().__init__()
+        self.api = api
+        self.link_only = link_only
+
+    async def add(self, file: MetainfoFile):
+        if not self.link_only:
+            path = cast(Path, file.path)
+            self._added(file, await self.api.add_torrent(path))
+
+    async def add_with_data(
+        self, file: MetainfoFile, data_path: Path, data_name: str = None
+    ):
+        path = cast(Path, file.path)
+        result = await self.api.add_torrent_with_files(path, data_path)
+        if result.success and data_name is not None:
+            result = await self.api.rename_torrent_path(result.id, file.name, data_name)
+        self._added_with_data(file, data_path, result)
+
+    async def close(self):
+        await self.api.close()
+
+
 class FindService:
     def __init__(self, data_locator: TorrentDataLocator):
         self.data_locator = data_locator
@@ -192,6 +244,8 @@ class LinkDataService:
         return self.__query_metainfo_file_by_id(incomplete_ids)
 
     def get_incomplete_metainfo_path_by_id(self) -> Mapping[int, Path]:
+        # torrents may have changed since the last time (see WatchService)
+        self.api.invalidate()
         return self.__get_metainfo_path_by_id()
 
     def change_location(self, torrent_id: int, new_path: Path):
@@ -206,18 +260,25 @@ class LinkDataService:
         if not command_result.success:
             raise RuntimeError(f"failed to remove torrent with id:{torrent_id}")
 
+    def remove_by_ids(self, ids: Set[int]):
+        command_result: CommandResult = self.api.remove_torrents_keeping_data(ids)
+        if not command_result.success:
+            raise RuntimeError(f"failed to remove torrents: {command_result.error}")
+
     def get_metainfo_raw_value(self, path: Path) -> bytes:
         return self.metainfo_io.get_bytes(path)
 
     def restore_metainfo(self, value: bytes, path: Path):
         self.metainfo_io.write_bytes(value, path)
 
-    def add_with_paths(self, metainfo_path: Path, data_path: Path):
+    def add_with_paths(self, metainfo_path: Path, data_path: Path) -> Optional[int]:
+        """Returns the id of the added torrent, where Transmission reports it."""
         result = self.api.add_torrent_with_files(metainfo_path, data_path)
         if not result.success:
             raise RuntimeError(
                 f"failed to add data files from:f{data_path} for metainfo file:f{metainfo_path}"
             )
+        return result.id
 
     def get_hash_with_torrent_id(self, torrent_id: int) -> str:
         result = self.api.get_torrent_hashes_by_id()
@@ -225,44 +286,167 @@ class LinkDataService:
             raise RuntimeError(f"failed to retrieve torrent hashes by id")
         return result.value[torrent_id]
 
+    def get_torrent_ids(self) -> Set[int]:
+        result = self.api.get_torrent_hashes_by_id()
+        if not result.success:
+            raise RuntimeError(f"failed to retrieve torrent ids")
+        return set(result.value)
+
     def get_torrent_id_with_hash(self, torrent_hash: str) -> int:
         result = self.api.get_torrent_ids_by_hash()
         if not result.success:
             raise RuntimeError(f"failed to retrieve torrent ids by hash")
         return result.value[torrent_hash]
 
+    def rename(self, torrent_id: int, path: str, name: str):
+        result = self.api.rename_torrent_path(torrent_id, path, name)
+        if not result.success:
+            raise RuntimeError(f"failed to rename torrent path {path} to {name}")
+
     def trigger_verify(self, torrent_id: int):
         result = self.api.verify(torrent_id)
         if not result.success:
             raise RuntimeError(f"failed to verify torrent")
 
+    def trigger_verify_by_ids(self, ids: Set[int]):
+        result = self.api.verify_torrents(ids)
+        if not result.success:
+            raise RuntimeError(f"failed to verify torrents")
+
 
 class LinkService:
-    def __init__(self, metainfo_reader: MetainfoIO, data_service: LinkDataService):
+    def __init__(
+        self,
+        metainfo_reader: MetainfoIO,
+        data_service: LinkDataService,
+        batch_size: int = BATCH_SIZE,
+    ):
         self.metainfo_reader = metainfo_reader
         self.data_service = data_service
+        self.batch_size = batch_size
 
     def get_incomplete_id_by_metainfo_file(self) -> Mapping[MetainfoFile, int]:
         metainfo_path_by_id = self.data_service.get_incomplete_metainfo_path_by_id()
-        return {
-            self.metainfo_reader.from_path(path): torrent_id
-            for (torrent_id, path) in metainfo_path_by_id.items()
-        }
-
-    def change_location(self, torrent_id: int, metainfo_path: Path, new_path: Path):
-        raw_value = self.data_service.get_metainfo_raw_value(metainfo_path)
+        files = self.metainfo_reader.from_paths(metainfo_path_by_id.values())
+        return dict(zip(files, metainfo_path_by_id.keys()))
+
+    def change_location(
+        self,
+        torrent_id: int,
+        metainfo_file: MetainfoFile,
+        new_path: Path,
+        data_name: str = None,
+    ):
+        raw_value = self.data_service.get_metainfo_raw_value(metainfo_file.path)
         torrent_hash = self.data_service.get_hash_with_torrent_id(torrent_id)
         self.data_service.remove_by_id(torrent_id)
-        self.data_service.restore_metainfo(raw_value, metainfo_path)
-        self.data_service.add_with_paths(metainfo_path, new_path)
-        new_id = self.data_service.get_torrent_id_with_hash(torrent_hash)
+        new_id = self._add_again(
+            metainfo_file, raw_value, torrent_hash, new_path, data_name
+        )
         self.data_service.trigger_verify(new_id)
 
+    def change_locations(
+        self, data_by_id: Mapping[int, TorrentData]
+    ) -> Mapping[int, str]:
+        """Like change_location for many torrents, but they're removed (and verified
+        once they're added again) with one request per batch of them.
+
+        Returns why any of them weren't linked.
+        """
+        failures: MutableMapping[int, str] = {}
+        saved: MutableMapping[int, Tuple[bytes, str]] = {}
+        for (torrent_id, data) in data_by_id.items():
+            try:
+                saved[torrent_id] = (
+                    self.data_service.get_metainfo_raw_value(data.metainfo_file.path),
+                    self.data_service.get_hash_with_torrent_id(torrent_id),
+                )
+            except RuntimeError as e:
+                failures[torrent_id] = str(e)
+        ordered = sorted(saved)
+        for start in range(0, len(ordered), self.batch_size):
+            batch = {
+                torrent_id: saved[torrent_id]
+                for torrent_id in ordered[start : start + self.batch_size]
+            }
+            failures.update(self._change_batch(data_by_id, batch))
+        return failures
+
+    def _change_batch(
+        self,
+        data_by_id: Mapping[int, TorrentData],
+        saved: Mapping[int, Tuple[bytes, str]],
+    ) -> Mapping[int, str]:
+        failures: MutableMapping[int, str] = {}
+        removed: Set[int] = set(saved)
+        try:
+            self.data_service.remove_by_ids(set(saved))
+        except RuntimeError as e:
+            # some of them may have been removed before it failed, those are
+            # added back (their metainfo files are only in 'saved' now)
+            try:
+                removed = removed - self.data_service.get_torrent_ids()
+            except RuntimeError:
+                removed = set()
+            failures.update(
+                (torrent_id, str(e))
+                for torrent_id in saved
+                if torrent_id not in removed
+            )
+        new_ids: MutableMapping[int, int] = {}
+        for torrent_id in sorted(removed):
+            (raw_value, torrent_hash) = saved[torrent_id]
+            data = data_by_id[torrent_id]
+            try:
+                new_ids[torrent_id] = self._add_again(
+                    data.metainfo_file,
+                    raw_value,
+                    torrent_hash,
+                    data.location,
+                    data.name,
+                )
+            except RuntimeError as e:
+                failures[torrent_id] = str(e)
+        if new_ids:
+            try:
+                self.data_service.trigger_verify_by_ids(set(new_ids.values()))
+            except RuntimeError as e:
+                failures.update((torrent_id, str(e)) for torrent_id in new_ids)
+        return failures
+
+    def _add_again(
+        self,
+        metainfo_file: MetainfoFile,
+        raw_value: bytes,
+        torrent_hash: str,
+        new_path: Path,
+        data_name: Optional[str],
+    ) -> int:
+        """Adds a removed torrent back with its data at 'new_path' and returns its id."""
+        self.data_service.restore_metainfo(raw_value, metainfo_file.path)
+        new_id = self.data_service.add_with_paths(metainfo_file.path, new_path)
+        if new_id is None:
+            new_id = self.data_service.get_torrent_id_with_hash(torrent_hash)
+        if data_name is not None:
+            self.data_service.rename(new_id, metainfo_file.name, data_name)
+        return new_id
+
 
 class DryRunLinkService(LinkService):
-    def change_location(self, torrent_id: int, metainfo_path: Path, new_path: Path):
+    def change_location(
+        self,
+        torrent_id: int,
+        metainfo_file: MetainfoFile,
+        new_path: Path,
+        data_name: str = None,
+    ):
         pass
 
+    def change_locations(
+        self, data_by_id: Mapping[int, TorrentData]
+    ) -> Mapping[int, str]:
+        return {}
+
 
 class AnnounceUrl:
     def __init__(self, announce_url: str):
@@ -302,10 +486,10 @@ class PruneService:
             raise RuntimeError("get_torrent_names_by_id_with_missing_data query failed")
         return query.value or dict()
 
-    def remove_torrent(self, torrent_id: int):
-        result: CommandResult = self.client.remove_torrent_keeping_data(torrent_id)
+    def remove_torrents(self, ids: Set[int]):
+        result: CommandResult = self.client.remove_torrents_keeping_data(ids)
         if not result.success:
-            raise RuntimeError("failed remove_torrent command", result)
+            raise RuntimeError("failed remove_torrents command", result)
 
 
 class OrganizeService:
@@ -314,9 +498,8 @@ class OrganizeService:
     shortened and camelcase hostname -> announce urls(sorted too)
     """
 
-    def __init__(self, client: TransmissionApi, metainfo_reader: MetainfoIO):
+    def __init__(self, client: TransmissionApi):
         self.client = client
-        self.metainfo_reader = metainfo_reader
 
     def get_announce_urls_by_folder_name(self) -> "OrderedDict[str, Sequence[str]]":
         query_result: QueryResult[Set[str]] = self.client.get_announce_urls()
@@ -358,27 +541,35 @@ class OrganizeService:
                 continue
         return trackers
 
-    def get_announce_urls_by_torrent_id(self) -> Mapping[int, Set[str]]:
-        result: QueryResult[Mapping[int, Set[str]]] = self.client.get_torrent_trackers()
+    def get_torrents(self) -> Mapping[int, TorrentSummary]:
+        result: QueryResult[
+            Mapping[int, TorrentSummary]
+        ] = self.client.get_torrent_summaries()
         if not result.success:
-            raise RuntimeError("get_torrent_trackers query failed")
+            raise RuntimeError("get_torrent_summaries query failed")
         return result.value or dict()
 
-    def move_location(self, torrent_id: int, new_path: Path):
-        command_result: CommandResult = self.client.move_torrent_location(
-            torrent_id, new_path
-        )
-        if not command_result.success:
-            raise RuntimeError("failed to change torrent location")
-
-    def get_torrent_location(self, torrent_id: int) -> Path:
-        result: QueryResult[Path] = self.client.get_torrent_location(torrent_id)
-        if not result.success or result.value is None:
-            raise RuntimeError("get_torrent_location query failed")
-        return result.value
-
-    def get_metainfo_file(self, torrent_id: int) -> MetainfoFile:
-        result: QueryResult[Path] = self.client.get_metainfo_file_path(torrent_id)
-        if not result.success or result.value is None:
-            raise RuntimeError("get_torrent_location query failed")
-        return self.metainfo_reader.from_path(result.value)
+    def move_locations(self, ids_by_path: Mapping[Path, Set[int]]) -> Mapping[int, str]:
+        """Moves torrents to new locations with one request for every location (see
+        move_torrents_location) and returns why any of them weren't moved.
+
+        Transmission answers a request for many torrents with one result, so what
+        happened to each of them is read back from the torrents afterwards.
+        """
+        errors: MutableMapping[Path, str] = {}
+        for (new_path, ids) in ids_by_path.items():
+            result: CommandResult = self.client.move_torrents_location(ids, new_path)
+            if not result.success:
+                errors[new_path] = f"failed to change torrent location: {result.error}"
+        torrents = self.get_torrents()
+        failures: MutableMapping[int, str] = {}
+        for (new_path, ids) in ids_by_path.items():
+            for torrent_id in ids:
+                torrent = torrents.get(torrent_id)
+                if torrent is None:
+                    failures[torrent_id] = "torrent is gone from Transmission"
+                elif torrent.location != new_path:
+                    failures[torrent_id] = errors.get(
+                        new_path, f"location is still {torrent.location}"
+                    )
+        return failures
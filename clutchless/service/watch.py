@@ -0,0 +1,180 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import (
+    Set,
+    Iterable,
+    MutableSequence,
+    Tuple,
+    cast,
+    Sequence,
+    MutableMapping,
+)
+
+from clutchless.domain.torrent import MetainfoFile
+from clutchless.external.filesystem import (
+    Filesystem,
+    IndexedFileLocator,
+    NameIndex,
+    DirectoryScanner,
+)
+from clutchless.external.metainfo import MetainfoIO, TorrentDataLocator, TorrentData
+from clutchless.service.torrent import AddService, LinkService
+
+logger = logging.getLogger(__name__)
+
+
+def _is_under(path: Path, roots: Iterable[Path]) -> bool:
+    return any(path == root or root in path.parents for root in roots)
+
+
+@dataclass
+class WatchBatch:
+    added: MutableSequence[MetainfoFile] = field(default_factory=list)
+    linked: MutableSequence[TorrentData] = field(default_factory=list)
+    failed: MutableSequence[Tuple[MetainfoFile, str]] = field(default_factory=list)
+
+
+class WatchService:
+    """Keeps a name/size index of the data roots current from reported changes,
+    and adds or links torrents once a batch of changes has been applied.
+    """
+
+    def __init__(
+        self,
+        fs: Filesystem,
+        scanner: DirectoryScanner,
+        reader: MetainfoIO,
+        file_locator: IndexedFileLocator,
+        data_locator: TorrentDataLocator,
+        add_service: AddService,
+        link_service: LinkService,
+        metainfo_roots: Iterable[Path],
+        force: bool = False,
+    ):
+        self.fs = fs
+        self.scanner = scanner
+        self.reader = reader
+        self.file_locator = file_locator
+        self.data_locator = data_locator
+        self.add_service = add_service
+        self.link_service = link_service
+        self.metainfo_roots = set(metainfo_roots)
+        self.force = force
+        # info hashes handled by this process, so they aren't handled again
+        self.seen: Set[str] = set()
+        # new metainfo files whose data hasn't been found yet
+        self.pending: Set[MetainfoFile] = set()
+
+    @property
+    def data_roots(self) -> Set[Path]:
+        return self.file_locator.directories
+
+    async def update_index(self, paths: Iterable[Path]) -> Set[Path]:
+        """Applies changed paths to the index, returns those that exist below the data roots."""
+        index = cast(NameIndex, await self.file_locator.index())
+        present = set()
+        for path in sorted(paths):
+            if not _is_under(path, self.data_roots):
+                continue
+            index.remove(path)
+            try:
+                entry = self.fs.stat(path)
+            except OSError:
+                # gone again, a looping symlink or unreadable
+                continue
+            present.add(path)
+            if entry.is_file:
+                index.add_file(path, entry.size)
+            elif entry.is_dir:
+                if path not in self.data_roots:
+                    index.add_directory(path)
+                async for child in self.scanner.walk([path]):
+                    if child.is_dir:
+                        index.add_directory(child.path)
+                    elif child.is_file:
+                        index.add_file(child.path, child.size)
+        return present
+
+    async def new_metainfo_files(self, paths: Iterable[Path]) -> Set[MetainfoFile]:
+        metainfo_paths = set()
+        for path in paths:
+            if not _is_under(path, self.metainfo_roots):
+                continue
+            if path.suffix == ".torrent" and self.fs.is_file(path):
+                metainfo_paths.add(path)
+            elif self.fs.is_directory(path):
+                async for entry in self.scanner.walk([path]):
+                    if entry.is_file and entry.path.suffix == ".torrent":
+                        metainfo_paths.add(entry.path)
+        loop = asyncio.get_running_loop()
+        files = await loop.run_in_executor(None, self._read, sorted(metainfo_paths))
+        return {file for file in files if file.info_hash not in self.seen}
+
+    def _read(self, paths: Sequence[Path]) -> Sequence[MetainfoFile]:
+        try:
+            return self.reader.from_paths(paths)
+        except Exception:
+            # one unreadable file shouldn't lose the others
+            files = []
+            for path in paths:
+                try:
+                    files.append(self.reader.from_path(path))
+                except Exception as e:
+                    # most likely still being written, it's reported again when closed
+                    logger.info(f"skipping unreadable metainfo file {path}: {e}")
+            return files
+
+    async def add(self, files: Iterable[MetainfoFile], batch: WatchBatch):
+        for file in sorted(files):
+            found = await self.data_locator.find(file)
+            if found.location is None and not self.force:
+                # tried again once more data arrives
+                self.pending.add(file)
+                continue
+            self.pending.discard(file)
+            self.seen.add(file.info_hash)
+            fail_count = len(self.add_service.fail)
+            if found.location is not None:
+                self.add_service.add_with_data(file, found.location, found.name)
+            else:
+                self.add_service.add(file)
+            if len(self.add_service.fail) > fail_count:
+                batch.failed.append((file, self.add_service.error[-1]))
+            elif found.location is not None:
+                batch.linked.append(found)
+            else:
+                batch.added.append(file)
+
+    async def link(self, batch: WatchBatch):
+        torrent_id_by_file = self.link_service.get_incomplete_id_by_metainfo_file()
+        data_by_id: MutableMapping[int, TorrentData] = {}
+        for (file, torrent_id) in sorted(torrent_id_by_file.items()):
+            if file.info_hash in self.seen:
+                continue
+            found = await self.data_locator.find(file)
+            if found.location is None:
+                continue
+            self.seen.add(file.info_hash)
+            data_by_id[torrent_id] = found
+        if not data_by_id:
+            return
+        failures = self.link_service.change_locations(data_by_id)
+        for (torrent_id, found) in data_by_id.items():
+            if torrent_id in failures:
+                batch.failed.append((found.metainfo_file, failures[torrent_id]))
+            else:
+                batch.linked.append(found)
+
+    async def handle(self, paths: Set[Path]) -> WatchBatch:
+        batch = WatchBatch()
+        pending = set(self.pending)
+        data_changed = await self.update_index(paths)
+        new_files = await self.new_metainfo_files(paths)
+        if new_files:
+            await self.add(new_files, batch)
+        if data_changed:
+            await self.add(pending - new_files, batch)
+            await self.link(batch)
+        return batch
@@ -1,14 +1,24 @@
 """ Add torrents to Transmission (with or without data).
 
 Usage:
-    clutchless add [--dry-run] [--delete] [-f | --force] (<metainfo> ...) [-d <data> ...]
+    clutchless add [--dry-run] [--delete] [-f | --force] [-y | --yes] [--match-size] [--exclude <glob>]... [--max-depth <depth>] [--one-file-system] [--skip-symlinks] [--unique-inodes] [--verify <level>] [--sample <amount>]
+        (<metainfo> ...) [-d <data> ...]
 
 Arguments:
     <metainfo> ...  Paths to metainfo files (files or directories) to add to Transmission.
 
 Options:
-    -d <data> ...   Data to associate to torrents.
-    -f, --force     Add torrents even when they're not found.
-    --delete        Delete successfully added torrents (meaningless when used with --dry-run).
-    --dry-run       Output what would be done instead of modifying anything.
+    -d <data> ...          Data to associate to torrents.
+    -f, --force            Add torrents even when they're not found.
+    -y, --yes              Don't ask before adding, add each torrent as soon as its data was looked for.
+    --match-size           Also link renamed data, by matching file sizes (the torrent is renamed to match).
+    --delete               Delete successfully added torrents (meaningless when used with --dry-run).
+    --dry-run              Output what would be done instead of modifying anything.
+    --exclude <glob>       Skip files and folders matching <glob>, by name or full path (repeatable).
+    --max-depth <depth>    Look at most <depth> folders deep below each folder given.
+    --one-file-system      Skip folders on other filesystems than the folder given.
+    --skip-symlinks        Don't follow symbolic links to folders.
+    --unique-inodes        Only report the first path found of hard-linked files.
+    --verify <level>       Check found data: exists, size, sparse (rejects unwritten space), sampled (hashes some pieces) or full (hashes every piece) [default: exists].
+    --sample <amount>      Pieces hashed at random by --verify sampled, a count (64) or a fraction (0.01 or 1%), besides the first and last piece of every file [default: 1%].
 """
@@ -1,11 +1,16 @@
 """ Delete duplicate metainfo files from paths provided.
 
 Usage:
-    clutchless dedupe [--dry-run] (<metainfo> ...)
+    clutchless dedupe [--dry-run] [--exclude <glob>]... [--max-depth <depth>] [--one-file-system] [--skip-symlinks] [--unique-inodes] (<metainfo> ...)
 
 Arguments:
     <metainfo> ...  Filepaths of metainfo files or directories to search for metainfo files.
 
 Options:
-    --dry-run       Output what metainfo files would be deleted, if any.
+    --dry-run              Output what metainfo files would be deleted, if any.
+    --exclude <glob>       Skip files and folders matching <glob>, by name or full path (repeatable).
+    --max-depth <depth>    Look at most <depth> folders deep below each folder given.
+    --one-file-system      Skip folders on other filesystems than the folder given.
+    --skip-symlinks        Don't follow symbolic links to folders.
+    --unique-inodes        Only report the first path found of hard-linked files.
 """
@@ -1,19 +1,30 @@
 """ Locate data that belongs to metainfo files.
 
 Usage:
-    clutchless find (<metainfo> ...) (-d <data> ...)
+    clutchless find [--index <file>] [--match-size | --by-content] [--exclude <glob>]... [--max-depth <depth>] [--one-file-system] [--skip-symlinks] [--unique-inodes] [--verify <level>] [--sample <amount>]
+        (<metainfo> ...) (-d <data> ...)
 
 Arguments:
     <metainfo> ...  Filepaths of metainfo files or directories to search for metainfo files.
 
 Options:
-    -d <data> ...   Folder(s) to search for data that belongs to the specified metainfo files.
+    -d <data> ...          Folder(s) to search for data that belongs to the specified metainfo files.
+    --index <file>         Query the data index at <file> instead of scanning the folders (see 'clutchless index'), not with the options limiting the scan.
+    --match-size           Also find renamed data, by matching the names and sizes of the files in it.
+    --by-content           Also find data with renamed files, by hashing a few pieces of files with matching sizes.
+    --exclude <glob>       Skip files and folders matching <glob>, by name or full path (repeatable).
+    --max-depth <depth>    Look at most <depth> folders deep below each folder given.
+    --one-file-system      Skip folders on other filesystems than the folder given.
+    --skip-symlinks        Don't follow symbolic links to folders.
+    --unique-inodes        Only report the first path found of hard-linked files.
+    --verify <level>       Check found data: exists, size, sparse (rejects unwritten space), sampled (hashes some pieces) or full (hashes every piece) [default: exists].
+    --sample <amount>      Pieces hashed at random by --verify sampled, a count (64) or a fraction (0.01 or 1%), besides the first and last piece of every file [default: 1%].
 """
 from pathlib import Path
 from typing import Mapping, Set
 
 from clutchless.domain.torrent import MetainfoFile
-from clutchless.external.filesystem import Filesystem, FileLocator
+from clutchless.external.filesystem import Filesystem, FileLocator, DirectoryScanner
 from clutchless.external.metainfo import MetainfoIO
 from clutchless.service.file import (
     get_valid_directories,
@@ -29,11 +40,13 @@ class FindArgs:
         reader: MetainfoIO,
         fs: Filesystem,
         locator: FileLocator,
+        scanner: DirectoryScanner = None,
     ):
         self.args = args
         self.reader = reader
         self.fs = fs
         self.locator = locator
+        self.scanner = scanner
 
     def get_data_dirs(self) -> Set[Path]:
         raw_data_directories = self.args["-d"]
@@ -41,8 +54,12 @@ class FindArgs:
 
     def get_torrent_files_paths(self) -> Set[Path]:
         raw_torrents_paths = set(self.args["<metainfo>"])
-        return set(collect_metainfo_paths(self.fs, raw_torrents_paths))
+        return set(collect_metainfo_paths(self.fs, raw_torrents_paths, self.scanner))
 
     def get_torrent_files(self) -> Set[MetainfoFile]:
         raw_torrents_paths = set(self.args["<metainfo>"])
-        return set(collect_metainfo_files(self.reader, self.fs, raw_torrents_paths))
+        return set(
+            collect_metainfo_files(
+                self.reader, self.fs, raw_torrents_paths, self.scanner
+            )
+        )
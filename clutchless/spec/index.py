@@ -0,0 +1,18 @@
+""" Manage a persistent index of data directories that find and link can query instead of scanning.
+
+Usage:
+    clutchless index build [--index <file>] (<data> ...)
+    clutchless index refresh [--index <file>]
+    clutchless index stats [--index <file>]
+
+Arguments:
+    <data> ...      Directories to add to the index (any already indexed are scanned again).
+
+Options:
+    --index <file>  Location of the index (default is ~/.cache/clutchless/index.sqlite).
+
+The available index commands are:
+    build       Scan directories from scratch and store them in the index.
+    refresh     Update the index, only listing directories that changed since the last scan.
+    stats       Output the indexed directories and how much they contain.
+"""
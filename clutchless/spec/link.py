@@ -1,13 +1,23 @@
 """ For torrents with missing data in Transmission, find the data and set the found location.
 
 Usage:
-    clutchless link [--dry-run] (<data> ...)
+    clutchless link [--dry-run] [--index <file>] [--match-size] [--exclude <glob>]... [--max-depth <depth>] [--one-file-system] [--skip-symlinks] [--unique-inodes] [--verify <level>] [--sample <amount>]
+        (<data> ...)
     clutchless link --list
 
 Arguments:
     <data> ...  Path(s) of directories to search for already-downloaded data.
 
 Options:
-    --dry-run   Prevent any changes in Transmission, only report found data for 0% data torrents.
-    --list      Output all torrents with 0% completion.
+    --dry-run              Prevent any changes in Transmission, only report found data for 0% data torrents.
+    --list                 Output all torrents with 0% completion.
+    --index <file>         Query the data index at <file> instead of scanning the directories (see 'clutchless index'), not with the options limiting the scan.
+    --match-size           Also link renamed data, by matching file sizes (the torrent is renamed to match).
+    --exclude <glob>       Skip files and folders matching <glob>, by name or full path (repeatable).
+    --max-depth <depth>    Look at most <depth> folders deep below each folder given.
+    --one-file-system      Skip folders on other filesystems than the folder given.
+    --skip-symlinks        Don't follow symbolic links to folders.
+    --unique-inodes        Only report the first path found of hard-linked files.
+    --verify <level>       Check found data: exists, size, sparse (rejects unwritten space), sampled (hashes some pieces) or full (hashes every piece) [default: exists].
+    --sample <amount>      Pieces hashed at random by --verify sampled, a count (64) or a fraction (0.01 or 1%), besides the first and last piece of every file [default: 1%].
 """
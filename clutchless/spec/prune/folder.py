@@ -1,12 +1,17 @@
 """ Remove metainfo files in folders, only if they're associated with torrents registered in Transmission.
 
 Usage:
-    clutchless prune folder [--dry-run] <metainfo> ...
+    clutchless prune folder [--dry-run] [--exclude <glob>]... [--max-depth <depth>] [--one-file-system] [--skip-symlinks] [--unique-inodes] <metainfo> ...
 
 Arguments:
     <metainfo> ...  Folders to search for metainfo files to remove.
 
 Options:
-    --dry-run       Doesn't delete any files, only outputs what would be done.
+    --dry-run              Doesn't delete any files, only outputs what would be done.
+    --exclude <glob>       Skip files and folders matching <glob>, by name or full path (repeatable).
+    --max-depth <depth>    Look at most <depth> folders deep below each folder given.
+    --one-file-system      Skip folders on other filesystems than the folder given.
+    --skip-symlinks        Don't follow symbolic links to folders.
+    --unique-inodes        Only report the first path found of hard-linked files.
 
 """
@@ -1,11 +1,16 @@
 """ Changes the name of metainfo files based on metainfo (torrent name).
 
 Usage:
-    clutchless rename [--dry-run] <path> ...
+    clutchless rename [--dry-run] [--exclude <glob>]... [--max-depth <depth>] [--one-file-system] [--skip-symlinks] [--unique-inodes] <path> ...
 
 Arguments:
     <path> ...  Paths (files or directories) where metainfo files are found.
 
 Options:
-    --dry-run   Prevent any changes in Transmission, only report found data for 0% data torrents.
+    --dry-run              Prevent any changes in Transmission, only report found data for 0% data torrents.
+    --exclude <glob>       Skip files and folders matching <glob>, by name or full path (repeatable).
+    --max-depth <depth>    Look at most <depth> folders deep below each folder given.
+    --one-file-system      Skip folders on other filesystems than the folder given.
+    --skip-symlinks        Don't follow symbolic links to folders.
+    --unique-inodes        Only report the first path found of hard-linked files.
 """
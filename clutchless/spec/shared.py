@@ -1,5 +1,13 @@
 from pathlib import Path
-from typing import Set, Sequence
+from typing import Set, Sequence, Mapping
+
+from clutchless.external.filesystem import ScanRules
+from clutchless.external.metainfo import Verification
+from clutchless.external.verify import Sample
+
+
+class OptionError(ValueError):
+    """A command's option was given a value it doesn't take."""
 
 
 class PathParser:
@@ -13,3 +21,41 @@ class PathParser:
     @classmethod
     def parse_path(cls, raw_path: str) -> Path:
         return Path(raw_path).resolve(strict=True)
+
+
+def parse_scan_rules(args: Mapping) -> ScanRules:
+    """Reads the scan rule options of a command."""
+    raw_depth = args.get("--max-depth")
+    max_depth = None
+    if raw_depth is not None:
+        try:
+            max_depth = int(raw_depth)
+        except ValueError:
+            raise OptionError(
+                f"--max-depth must be a number, not {raw_depth}"
+            ) from None
+        if max_depth < 0:
+            raise OptionError("--max-depth can't be negative")
+    return ScanRules(
+        tuple(args.get("--exclude") or ()),
+        max_depth,
+        bool(args.get("--one-file-system")),
+        not args.get("--skip-symlinks"),
+        bool(args.get("--unique-inodes")),
+    )
+
+
+def parse_verification(args: Mapping) -> Verification:
+    """Reads how thoroughly a command checks the data it finds."""
+    try:
+        return Verification.parse(args.get("--verify") or "exists")
+    except ValueError as e:
+        raise OptionError(f"--verify: {e}") from None
+
+
+def parse_sample(args: Mapping) -> Sample:
+    """Reads how many pieces a sampled check hashes."""
+    try:
+        return Sample.parse(args.get("--sample") or "1%")
+    except ValueError as e:
+        raise OptionError(f"--sample: {e}") from None
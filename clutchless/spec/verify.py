@@ -0,0 +1,20 @@
+""" Hash the data of metainfo files piece by piece, and report how much of every file is complete.
+
+Usage:
+    clutchless verify [--threads <count>] [--sample <amount>] [--match-size] [--exclude <glob>]... [--max-depth <depth>] [--one-file-system] [--skip-symlinks] [--unique-inodes]
+        (<metainfo> ...) (-d <data> ...)
+
+Arguments:
+    <metainfo> ...  Filepaths of metainfo files or directories to search for metainfo files.
+
+Options:
+    -d <data> ...          Folder(s) to search for data that belongs to the specified metainfo files.
+    --threads <count>      Threads that hash pieces (default is one for each processor, at most 8).
+    --sample <amount>      Only hash the first and last piece of every file and a count (64) or fraction (0.01 or 1%) of the others, chosen at random. Data with a bad piece is hashed in full.
+    --match-size           Also verify renamed data, found by matching the names and sizes of the files in it.
+    --exclude <glob>       Skip files and folders matching <glob>, by name or full path (repeatable).
+    --max-depth <depth>    Look at most <depth> folders deep below each folder given.
+    --one-file-system      Skip folders on other filesystems than the folder given.
+    --skip-symlinks        Don't follow symbolic links to folders.
+    --unique-inodes        Only report the first path found of hard-linked files.
+"""
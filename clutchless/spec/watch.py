@@ -0,0 +1,18 @@
+""" Keep watching folders, adding new metainfo files to Transmission and linking torrents to new data.
+
+Usage:
+    clutchless watch [-f | --force] [--poll <seconds>] [--debounce <seconds>] [--match-size] [--verify <level>] [--sample <amount>]
+        (<metainfo> ...) [-d <data> ...]
+
+Arguments:
+    <metainfo> ...  Folders to watch for new metainfo files.
+
+Options:
+    -d <data> ...           Folders to watch for data, to link new torrents and torrents with missing data.
+    -f, --force             Add new torrents even when their data isn't found.
+    --poll <seconds>        Look for changes every <seconds> instead of subscribing to inotify events.
+    --debounce <seconds>    Act once nothing has changed for <seconds> [default: 2].
+    --match-size            Also find renamed data, by matching file sizes (the torrent is renamed to match).
+    --verify <level>        Check found data: exists, size, sparse (rejects unwritten space), sampled (hashes some pieces) or full (hashes every piece) [default: exists].
+    --sample <amount>       Pieces hashed at random by --verify sampled, a count (64) or a fraction (0.01 or 1%), besides the first and last piece of every file [default: 1%].
+"""
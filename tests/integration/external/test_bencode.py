@@ -0,0 +1,17 @@
+import hashlib
+
+import pytest
+from torrentool.torrent import Torrent
+
+from clutchless.external.bencode import decode_metainfo
+
+
+@pytest.mark.parametrize("name", ["being_earnest.torrent", "ion.torrent"])
+def test_decode_metainfo_matches_torrentool(datadir, name):
+    path = datadir / name
+    expected = Torrent.from_file(str(path))
+
+    result, encoded_info = decode_metainfo(path.read_bytes())
+
+    assert hashlib.sha1(encoded_info).hexdigest() == expected.info_hash
+    assert result["info"] == expected._struct["info"]
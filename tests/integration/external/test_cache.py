@@ -0,0 +1,165 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pytest_mock import MockerFixture
+
+from clutchless.domain.torrent import MetainfoFile
+from clutchless.external.cache import CachingMetainfoIO, VerificationCache
+from clutchless.external.filesystem import DefaultFilesystem
+from clutchless.external.metainfo import (
+    DefaultMetainfoIO,
+    DefaultTorrentDataReader,
+    Verification,
+)
+from clutchless.external.verify import PieceVerifier, Sample
+
+
+@pytest.mark.parametrize("name", ["being_earnest.torrent", "ion.torrent"])
+def test_cached_metainfo_file(datadir, tmp_path, mocker: MockerFixture, name):
+    reader = DefaultMetainfoIO()
+    parse = mocker.spy(reader, "from_path")
+    path = datadir / name
+    expected = reader.from_path(path)
+
+    CachingMetainfoIO(reader, DefaultFilesystem(), tmp_path / "cache.sqlite").from_path(
+        path
+    )
+    cache = CachingMetainfoIO(reader, DefaultFilesystem(), tmp_path / "cache.sqlite")
+    result = cache.from_path(path)
+
+    assert parse.call_count == 2
+    assert result == expected
+    assert result.name == expected.name
+    assert result.is_single_file == expected.is_single_file
+    assert result.files == expected.files
+    assert result.length == expected.length
+    assert result.pieces == expected.pieces
+
+
+def test_changed_metainfo_file_parsed_again(datadir, tmp_path, mocker: MockerFixture):
+    reader = DefaultMetainfoIO()
+    parse = mocker.spy(reader, "from_path")
+    path = datadir / "ion.torrent"
+    cache = CachingMetainfoIO(reader, DefaultFilesystem(), tmp_path / "cache.sqlite")
+    cache.from_path(path)
+
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    cache.from_path(path)
+    cache.from_path(path)
+
+    assert parse.call_count == 2
+
+
+def test_cached_metainfo_file_from_thread(datadir, tmp_path):
+    path = datadir / "ion.torrent"
+    cache = CachingMetainfoIO(
+        DefaultMetainfoIO(), DefaultFilesystem(), tmp_path / "cache.sqlite"
+    )
+
+    with ThreadPoolExecutor(1) as pool:
+        result = pool.submit(cache.from_paths, [path]).result()
+
+    assert result == [cache.from_path(path)]
+
+
+def make_data(tmp_path):
+    content = bytes(range(256)) * 8
+    file = MetainfoFile(
+        {
+            "name": "folder",
+            "info_hash": "a",
+            "info": {
+                "name": "folder",
+                "piece length": 256,
+                "pieces": b"".join(
+                    hashlib.sha1(content[start : start + 256]).digest()
+                    for start in range(0, len(content), 256)
+                ),
+                "files": [
+                    {"path": ["a.bin"], "length": 1024},
+                    {"path": ["b.bin"], "length": 1024},
+                ],
+            },
+        }
+    )
+    (tmp_path / "folder").mkdir()
+    (tmp_path / "folder" / "a.bin").write_bytes(content[:1024])
+    (tmp_path / "folder" / "b.bin").write_bytes(content[1024:])
+    return file
+
+
+def test_verification_cache(tmp_path):
+    make_data(tmp_path)
+    fs = DefaultFilesystem()
+    entries = [fs.stat(tmp_path / "folder" / name) for name in ("a.bin", "b.bin")]
+    VerificationCache(tmp_path / "verified.sqlite").store(
+        "a", entries, Verification.SAMPLED
+    )
+    os.utime(entries[1].path, ns=(0, 0))
+    changed = [entries[0], fs.stat(entries[1].path)]
+
+    cache = VerificationCache(tmp_path / "verified.sqlite")
+
+    assert cache.verified("a", entries, Verification.SAMPLED) == {0, 1}
+    assert cache.verified("a", changed, Verification.SAMPLED) == {0}
+    assert cache.verified("b", entries, Verification.SAMPLED) == set()
+    assert cache.verified("a", entries, Verification.FULL) == set()
+
+
+def test_cached_verification_hashes_changed_files(tmp_path, mocker: MockerFixture):
+    file = make_data(tmp_path)
+    verifier = PieceVerifier(1)
+    check = mocker.spy(verifier, "check")
+    cache = VerificationCache(tmp_path / "verified.sqlite")
+    reader = DefaultTorrentDataReader(
+        DefaultFilesystem(), Verification.FULL, verifier, store=cache
+    )
+
+    assert reader.verify(tmp_path, file)
+    assert reader.verify(tmp_path, file)
+    os.utime(tmp_path / "folder" / "b.bin", ns=(0, 0))
+    assert reader.verify(tmp_path, file)
+
+    assert [args[3] for (args, _) in check.call_args_list] == [[0, 1], [1]]
+
+
+def test_sampled_verification_cached_at_level_reached(tmp_path):
+    content = bytes(range(256)) * 5
+    file = MetainfoFile(
+        {
+            "name": "folder",
+            "info_hash": "a",
+            "info": {
+                "name": "folder",
+                "piece length": 256,
+                "pieces": b"".join(
+                    hashlib.sha1(content[start : start + 256]).digest()
+                    for start in range(0, len(content), 256)
+                ),
+                "files": [
+                    {"path": ["large.bin"], "length": 1024},
+                    {"path": ["small.bin"], "length": 256},
+                ],
+            },
+        }
+    )
+    (tmp_path / "folder").mkdir()
+    (tmp_path / "folder" / "large.bin").write_bytes(content[:1024])
+    (tmp_path / "folder" / "small.bin").write_bytes(content[1024:])
+    fs = DefaultFilesystem()
+    cache = VerificationCache(tmp_path / "verified.sqlite")
+    reader = DefaultTorrentDataReader(
+        fs, Verification.SAMPLED, PieceVerifier(1), Sample(count=0), cache
+    )
+
+    assert reader.verify(tmp_path, file)
+
+    entries = [
+        fs.stat(tmp_path / "folder" / name) for name in ("large.bin", "small.bin")
+    ]
+    assert cache.verified("a", entries, Verification.SAMPLED) == {0, 1}
+    # only the first and last piece of the large file were hashed
+    assert cache.verified("a", entries, Verification.FULL) == {1}
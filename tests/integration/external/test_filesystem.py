@@ -4,8 +4,11 @@ import pytest
 
 from clutchless.external.filesystem import (
     DefaultFilesystem,
+    FileEntry,
     FileLocator,
     SingleDirectoryFileLocator,
+    DirectoryScanner,
+    ScanRules,
 )
 
 
@@ -39,6 +42,34 @@ def test_default_filesystem_children(tmp_path):
     assert set(children) == expected_children
 
 
+def test_default_filesystem_scan(tmp_path):
+    file = tmp_path / "file"
+    file.write_bytes(b"12345")
+    directory = tmp_path / "directory"
+    directory.mkdir()
+    (tmp_path / "dangling").symlink_to(tmp_path / "missing")
+    fs = DefaultFilesystem()
+
+    entries = {entry.path: entry for entry in fs.scan(tmp_path)}
+
+    assert set(entries) == {file, directory}
+    stat = file.stat()
+    assert entries[file] == FileEntry(
+        file, False, True, 5, stat.st_mtime_ns, stat.st_dev, stat.st_ino, 1, False
+    )
+    assert entries[directory].is_dir
+    assert not entries[directory].is_file
+
+
+def test_default_filesystem_scan_not_directory(tmp_path):
+    file = tmp_path / "file"
+    file.touch()
+    fs = DefaultFilesystem()
+
+    assert list(fs.scan(file)) == []
+    assert list(fs.scan(tmp_path / "missing")) == []
+
+
 @pytest.mark.asyncio
 async def test_default_locator_find_file(tmp_path):
     file = tmp_path / "test_file"
@@ -61,3 +92,107 @@ async def test_default_filesystem_find_directory(tmp_path):
     result = await locator.locate_directory("test_dir")
 
     assert result == tmp_path
+
+
+@pytest.fixture
+def linked_tree(tmp_path) -> Path:
+    root = tmp_path / "root"
+    (root / "data").mkdir(parents=True)
+    (root / "data" / "file").write_bytes(b"data")
+    (root / "data" / "loop").symlink_to(root)
+    (root / "cross_seed").mkdir()
+    (root / "cross_seed" / "file").hardlink_to(root / "data" / "file")
+    return root
+
+
+@pytest.mark.asyncio
+async def test_walk_survives_symlink_loop(linked_tree):
+    fs = DefaultFilesystem()
+    scanner = DirectoryScanner(fs)
+
+    results = [entry.path async for entry in scanner.walk([linked_tree])]
+
+    assert sorted(results) == [
+        linked_tree / "cross_seed",
+        linked_tree / "cross_seed" / "file",
+        linked_tree / "data",
+        linked_tree / "data" / "file",
+        linked_tree / "data" / "loop",
+    ]
+
+
+def test_default_filesystem_scan_skips_broken_links(tmp_path):
+    (tmp_path / "file").write_bytes(b"data")
+    (tmp_path / "loop").symlink_to(tmp_path / "loop")
+    (tmp_path / "dangling").symlink_to(tmp_path / "missing")
+    fs = DefaultFilesystem()
+
+    entries = [entry.path for entry in fs.scan(tmp_path)]
+
+    assert entries == [tmp_path / "file"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "rules",
+    [
+        ScanRules(),
+        ScanRules(follow_symlinks=False),
+        ScanRules(one_file_system=True, unique_inodes=True),
+    ],
+)
+async def test_walk_survives_looping_file_link(tmp_path, rules):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "file").write_bytes(b"data")
+    (tmp_path / "data" / "loop").symlink_to(tmp_path / "data" / "loop")
+    (tmp_path / "data" / "dangling").symlink_to(tmp_path / "missing")
+    (tmp_path / "loop_root").symlink_to(tmp_path / "loop_root")
+    fs = DefaultFilesystem()
+    scanner = DirectoryScanner(fs, rules=rules)
+
+    results = [
+        entry.path async for entry in scanner.walk([tmp_path, tmp_path / "loop_root"])
+    ]
+
+    assert sorted(results) == [tmp_path / "data", tmp_path / "data" / "file"]
+
+
+@pytest.mark.asyncio
+async def test_walk_unique_inodes(linked_tree):
+    fs = DefaultFilesystem()
+    scanner = DirectoryScanner(fs, rules=ScanRules(unique_inodes=True))
+
+    results = [entry async for entry in scanner.walk([linked_tree])]
+
+    files = [entry.path.name for entry in results if entry.is_file]
+    assert files == ["file"]
+
+
+@pytest.mark.asyncio
+async def test_walk_skip_symlinks(tmp_path):
+    (tmp_path / "elsewhere").mkdir()
+    (tmp_path / "elsewhere" / "file").write_bytes(b"data")
+    (tmp_path / "root").mkdir()
+    (tmp_path / "root" / "link").symlink_to(tmp_path / "elsewhere")
+    fs = DefaultFilesystem()
+    scanner = DirectoryScanner(fs, rules=ScanRules(follow_symlinks=False))
+
+    results = [entry async for entry in scanner.walk([tmp_path / "root"])]
+
+    assert [entry.path for entry in results] == [tmp_path / "root" / "link"]
+    assert results[0].is_symlink
+
+
+def test_default_filesystem_unfilled_size(tmp_path):
+    block = 2**16
+    file: Path = tmp_path / "sparse"
+    with open(file, "wb") as data:
+        data.write(b"x" * block)
+        data.truncate(block * 4)
+    full: Path = tmp_path / "full"
+    full.write_bytes(b"x" * block * 4)
+
+    fs = DefaultFilesystem()
+
+    assert fs.unfilled_size(file) == block * 3
+    assert fs.unfilled_size(full) == 0
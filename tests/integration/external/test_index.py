@@ -0,0 +1,178 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from clutchless.domain.torrent import MetainfoFile
+from clutchless.external.filesystem import DefaultFilesystem
+from clutchless.external import index
+from clutchless.external.index import DataIndex, DataIndexFileLocator
+
+
+def bump_mtime(path: Path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def data(tmp_path) -> Path:
+    data = tmp_path / "data"
+    (data / "torrent_name" / "nested").mkdir(parents=True)
+    (data / "torrent_name" / "nested" / "file1").write_bytes(b"1234")
+    (data / "single_file").write_bytes(b"12")
+    return data
+
+
+@pytest.fixture
+def data_index(tmp_path) -> DataIndex:
+    return DataIndex(DefaultFilesystem(), tmp_path / "cache" / "index.sqlite")
+
+
+def test_build(data, data_index):
+    count = data_index.build({data})
+
+    assert count == 4
+    assert data_index.roots() == {data}
+    assert data_index.file_parents("single_file", {data}) == {data}
+    assert data_index.file_parents("file1", {data}) == {
+        data / "torrent_name" / "nested"
+    }
+    assert data_index.directory_parents("torrent_name", {data}) == {data}
+    assert data_index.file_parents("torrent_name", {data}) == set()
+
+
+def test_build_restricts_to_roots(data, data_index):
+    data_index.build({data})
+
+    assert data_index.file_parents("file1", {data / "torrent_name"}) == {
+        data / "torrent_name" / "nested"
+    }
+    assert data_index.file_parents("single_file", {data / "torrent_name"}) == set()
+
+
+def test_files_with_size(data, data_index):
+    data_index.build({data})
+
+    assert data_index.files_with_size(2, {data}) == {data / "single_file"}
+    assert data_index.files_with_size(4, {data / "torrent_name"}) == {
+        data / "torrent_name" / "nested" / "file1"
+    }
+    assert data_index.files_with_size(3, {data}) == set()
+
+
+def test_directories_with_signature(data, data_index):
+    data_index.build({data})
+    file = MetainfoFile(
+        {
+            "name": "renamed",
+            "info_hash": "a",
+            "info": {"files": [{"path": ["nested", "file1"], "length": 4}]},
+        }
+    )
+
+    assert data_index.directories_with_signature(file.signature, {data}) == {
+        data / "torrent_name"
+    }
+
+
+def test_stats(data, data_index):
+    data_index.build({data})
+
+    stats = data_index.stats()
+
+    assert stats.roots == [data]
+    assert (stats.directories, stats.files, stats.size) == (2, 2, 6)
+
+
+def test_refresh_unchanged(data, data_index):
+    data_index.build({data})
+
+    result = data_index.refresh()
+
+    assert result.checked == 3
+    assert result.relisted == 0
+
+
+def test_refresh_added_and_removed(data, data_index):
+    data_index.build({data})
+    (data / "single_file").unlink()
+    (data / "new_dir").mkdir()
+    (data / "new_dir" / "new_file").touch()
+    bump_mtime(data)
+
+    result = data_index.refresh()
+
+    assert result.relisted == 1
+    assert (result.added, result.removed) == (2, 1)
+    assert data_index.file_parents("single_file", {data}) == set()
+    assert data_index.file_parents("new_file", {data}) == {data / "new_dir"}
+
+
+def test_refresh_removed_directory(data, data_index):
+    data_index.build({data})
+    (data / "torrent_name" / "nested" / "file1").unlink()
+    (data / "torrent_name" / "nested").rmdir()
+    bump_mtime(data / "torrent_name")
+
+    result = data_index.refresh()
+
+    assert result.removed == 2
+    assert data_index.file_parents("file1", {data}) == set()
+    assert data_index.stats().directories == 1
+
+
+def test_refresh_lists_changed_directories_only(data, data_index, mocker):
+    data_index.build({data})
+    (data / "torrent_name" / "nested" / "file2").touch()
+    bump_mtime(data / "torrent_name" / "nested")
+    scan = mocker.spy(data_index.fs, "scan")
+
+    data_index.refresh()
+
+    scan.assert_called_once_with(data / "torrent_name" / "nested")
+    assert data_index.file_parents("file2", {data}) == {
+        data / "torrent_name" / "nested"
+    }
+
+
+def test_refresh_updates_signatures_above_changes(data, data_index, tmp_path, mocker):
+    (data / "other" / "deeper").mkdir(parents=True)
+    (data / "other" / "deeper" / "file3").write_bytes(b"123")
+    data_index.build({data})
+    (data / "torrent_name" / "nested" / "file2").write_bytes(b"1")
+    bump_mtime(data / "torrent_name" / "nested")
+    compute = mocker.spy(index, "directory_signature")
+
+    data_index.refresh()
+
+    assert compute.call_count == 2
+    fresh = DataIndex(DefaultFilesystem(), tmp_path / "fresh.sqlite")
+    fresh.build({data})
+    query = "SELECT path, signature FROM signatures ORDER BY path"
+    assert (
+        data_index.connection.execute(query).fetchall()
+        == fresh.connection.execute(query).fetchall()
+    )
+
+
+@pytest.mark.asyncio
+async def test_data_index_locator(data, data_index):
+    data_index.build({data})
+    locator = DataIndexFileLocator({data}, DefaultFilesystem(), data_index)
+
+    assert await locator.locate_file("file1") == data / "torrent_name" / "nested"
+    assert await locator.locate_directory("torrent_name") == data
+    assert await locator.locate_file("missing") is None
+
+
+@pytest.mark.asyncio
+async def test_data_index_locator_collect(data, data_index):
+    (data / "torrent_name" / "a.torrent").touch()
+    data_index.build({data})
+    locator = DataIndexFileLocator(
+        {data / "torrent_name"}, DefaultFilesystem(), data_index
+    )
+
+    collected = [path async for path in locator.collect(".torrent")]
+
+    assert collected == [data / "torrent_name" / "a.torrent"]
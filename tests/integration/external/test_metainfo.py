@@ -1,11 +1,19 @@
+import hashlib
+
 import pytest
 
-from clutchless.external.filesystem import DefaultFilesystem
+from clutchless.domain.torrent import MetainfoFile
+from clutchless.external.filesystem import DefaultFilesystem, IndexedFileLocator
+from clutchless.external.index import DataIndex, DataIndexFileLocator
 from clutchless.external.metainfo import (
     DefaultMetainfoIO,
     MetainfoIO,
     DefaultTorrentDataLocator,
     TorrentData,
+    ContentMatchingTorrentDataLocator,
+    DefaultTorrentDataReader,
+    ParallelMetainfoIO,
+    Verification,
 )
 
 
@@ -20,3 +28,253 @@ async def test_async_data_locator_multi_file(datadir):
     result = await locator.find(file)
 
     assert result == TorrentData(file, datadir)
+
+
+def make_pieces(data: bytes, piece_length: int) -> bytes:
+    return b"".join(
+        hashlib.sha1(data[start : start + piece_length]).digest()
+        for start in range(0, len(data), piece_length)
+    )
+
+
+@pytest.mark.asyncio
+async def test_content_matching_data_locator(tmp_path):
+    content = bytes(range(256)) * 4
+    file = MetainfoFile(
+        {
+            "name": "original.bin",
+            "info_hash": "a",
+            "info": {
+                "piece length": 256,
+                "pieces": make_pieces(content, 256),
+                "length": len(content),
+            },
+        }
+    )
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a_same_size.bin").write_bytes(b"0" * len(content))
+    (data / "renamed.bin").write_bytes(content)
+    fs = DefaultFilesystem()
+    locator = ContentMatchingTorrentDataLocator(
+        IndexedFileLocator([data], fs, index_sizes=True),
+        DefaultTorrentDataReader(fs),
+        fs,
+    )
+
+    result = await locator.find(file)
+
+    assert result == TorrentData(file, data, "renamed.bin")
+
+
+def make_multi_file(contents) -> MetainfoFile:
+    return MetainfoFile(
+        {
+            "name": "original",
+            "info_hash": "a",
+            "info": {
+                "piece length": 32,
+                "pieces": make_pieces(b"".join(contents), 32),
+                "files": [
+                    {"path": ["first"], "length": 100},
+                    {"path": ["sub", "second"], "length": 50},
+                    {"path": ["sub", "third"], "length": 70},
+                ],
+            },
+        }
+    )
+
+
+@pytest.mark.asyncio
+async def test_content_matching_data_locator_multi_file(tmp_path):
+    contents = [b"a" * 100, b"b" * 50, b"c" * 70]
+    file = make_multi_file(contents)
+    # a decoy of the same sizes at the same paths, with other content
+    decoy = tmp_path / "data" / "decoy"
+    (decoy / "sub").mkdir(parents=True)
+    (decoy / "first").write_bytes(contents[0])
+    (decoy / "sub" / "second").write_bytes(contents[1])
+    (decoy / "sub" / "third").write_bytes(b"x" * 70)
+    renamed = tmp_path / "data" / "renamed"
+    (renamed / "sub").mkdir(parents=True)
+    (renamed / "first").write_bytes(contents[0])
+    (renamed / "sub" / "second").write_bytes(contents[1])
+    (renamed / "sub" / "third").write_bytes(contents[2])
+    fs = DefaultFilesystem()
+    locator = ContentMatchingTorrentDataLocator(
+        IndexedFileLocator([tmp_path / "data"], fs, index_sizes=True),
+        DefaultTorrentDataReader(fs),
+        fs,
+    )
+
+    result = await locator.find(file)
+
+    assert result == TorrentData(file, tmp_path / "data", "renamed")
+
+
+@pytest.mark.asyncio
+async def test_content_matching_data_locator_with_data_index(tmp_path):
+    contents = [b"a" * 100, b"b" * 50, b"c" * 70]
+    file = make_multi_file(contents)
+    data = tmp_path / "data"
+    renamed = data / "renamed"
+    (renamed / "sub").mkdir(parents=True)
+    (renamed / "first").write_bytes(contents[0])
+    (renamed / "sub" / "second").write_bytes(contents[1])
+    (renamed / "sub" / "third").write_bytes(contents[2])
+    fs = DefaultFilesystem()
+    data_index = DataIndex(fs, tmp_path / "index.sqlite")
+    data_index.build({data})
+    locator = ContentMatchingTorrentDataLocator(
+        DataIndexFileLocator({data}, fs, data_index),
+        DefaultTorrentDataReader(fs),
+        fs,
+    )
+
+    result = await locator.find(file)
+
+    assert result == TorrentData(file, data, "renamed")
+
+
+@pytest.mark.asyncio
+async def test_content_matching_data_locator_needs_same_paths(tmp_path):
+    contents = [b"a" * 100, b"b" * 50, b"c" * 70]
+    file = make_multi_file(contents)
+    renamed = tmp_path / "data" / "renamed"
+    (renamed / "other_sub").mkdir(parents=True)
+    (renamed / "first").write_bytes(contents[0])
+    (renamed / "other_sub" / "two").write_bytes(contents[1])
+    (renamed / "other_sub" / "three").write_bytes(contents[2])
+    fs = DefaultFilesystem()
+    locator = ContentMatchingTorrentDataLocator(
+        IndexedFileLocator([tmp_path / "data"], fs, index_sizes=True),
+        DefaultTorrentDataReader(fs),
+        fs,
+    )
+
+    result = await locator.find(file)
+
+    # linking there would leave Transmission looking for the torrent's file names
+    assert result == TorrentData(file)
+
+
+def test_parallel_metainfo_io(datadir, tmp_path):
+    reader = DefaultMetainfoIO()
+    paths = []
+    for index in range(ParallelMetainfoIO.MIN_PARALLEL):
+        path = tmp_path / f"{index}.torrent"
+        path.write_bytes((datadir / "being_earnest.torrent").read_bytes())
+        paths.append(path)
+    expected = reader.from_paths(paths)
+
+    parallel = ParallelMetainfoIO(reader, 2)
+    try:
+        result = parallel.from_paths(paths)
+    finally:
+        parallel.close()
+
+    assert result == expected
+    assert result[0].files == expected[0].files
+    assert result[-1].pieces == expected[-1].pieces
+
+
+def make_single_file(content: bytes, piece_length: int) -> MetainfoFile:
+    return MetainfoFile(
+        {
+            "name": "file.bin",
+            "info_hash": "a",
+            "info": {
+                "piece length": piece_length,
+                "pieces": make_pieces(content, piece_length),
+                "length": len(content),
+            },
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "verification,expected",
+    [
+        (Verification.EXISTS, True),
+        (Verification.SIZE, False),
+        (Verification.SPARSE, False),
+        (Verification.FULL, False),
+    ],
+)
+def test_data_reader_size(tmp_path, verification, expected):
+    content = bytes(range(256)) * 4
+    file = make_single_file(content, 256)
+    (tmp_path / "file.bin").write_bytes(content[:-1])
+
+    reader = DefaultTorrentDataReader(DefaultFilesystem(), verification)
+
+    assert reader.verify(tmp_path, file) == expected
+
+
+@pytest.mark.parametrize(
+    "verification,expected",
+    [
+        (Verification.SIZE, True),
+        (Verification.SPARSE, False),
+    ],
+)
+def test_data_reader_sparse(tmp_path, verification, expected):
+    piece_length = 2**16
+    content = bytes(piece_length * 4)
+    file = make_single_file(content, piece_length)
+    with open(tmp_path / "file.bin", "wb") as data:
+        # only the first piece is written, the rest is a hole
+        data.write(b"x" * piece_length)
+        data.truncate(len(content))
+
+    reader = DefaultTorrentDataReader(DefaultFilesystem(), verification)
+
+    assert reader.verify(tmp_path, file) == expected
+    assert reader.verify_sized(tmp_path, file) == expected
+
+
+@pytest.mark.parametrize(
+    "verification,expected",
+    [
+        (Verification.SPARSE, True),
+        (Verification.SAMPLED, False),
+        (Verification.FULL, False),
+    ],
+)
+def test_data_reader_full(tmp_path, verification, expected):
+    content = bytes(range(256)) * 4
+    file = make_single_file(content, 256)
+    corrupted = bytearray(content)
+    corrupted[1000] ^= 0xFF
+    (tmp_path / "file.bin").write_bytes(bytes(corrupted))
+
+    reader = DefaultTorrentDataReader(DefaultFilesystem(), verification)
+
+    assert reader.verify(tmp_path, file) == expected
+
+
+def test_data_reader_full_multi_file(tmp_path):
+    content = bytes(range(256)) * 3
+    file = MetainfoFile(
+        {
+            "name": "folder",
+            "info_hash": "a",
+            "info": {
+                "name": "folder",
+                "piece length": 256,
+                "pieces": make_pieces(content, 256),
+                "files": [
+                    {"path": ["a.bin"], "length": 300},
+                    {"path": ["sub", "b.bin"], "length": len(content) - 300},
+                ],
+            },
+        }
+    )
+    (tmp_path / "renamed" / "sub").mkdir(parents=True)
+    (tmp_path / "renamed" / "a.bin").write_bytes(content[:300])
+    (tmp_path / "renamed" / "sub" / "b.bin").write_bytes(content[300:])
+
+    reader = DefaultTorrentDataReader(DefaultFilesystem(), Verification.FULL)
+
+    assert reader.verify(tmp_path, file, "renamed")
+    assert not reader.verify(tmp_path, file)
@@ -0,0 +1,182 @@
+import hashlib
+from pathlib import Path
+
+import pytest
+
+from clutchless.domain.torrent import MetainfoFile
+from random import Random
+
+from clutchless.external.verify import (
+    PieceVerifier,
+    FileCompleteness,
+    Sample,
+    SampleResult,
+)
+
+
+def make_pieces(data: bytes, piece_length: int) -> bytes:
+    return b"".join(
+        hashlib.sha1(data[start : start + piece_length]).digest()
+        for start in range(0, len(data), piece_length)
+    )
+
+
+def make_multi_file(content: bytes, piece_length: int, lengths) -> MetainfoFile:
+    return MetainfoFile(
+        {
+            "name": "folder",
+            "info_hash": "a",
+            "info": {
+                "name": "folder",
+                "piece length": piece_length,
+                "pieces": make_pieces(content, piece_length),
+                "files": [
+                    {"path": [f"{index}.bin"], "length": length}
+                    for (index, length) in enumerate(lengths)
+                ],
+            },
+        }
+    )
+
+
+def write_files(directory: Path, content: bytes, lengths):
+    directory.mkdir(parents=True)
+    offset = 0
+    for (index, length) in enumerate(lengths):
+        (directory / f"{index}.bin").write_bytes(content[offset : offset + length])
+        offset += length
+
+
+@pytest.mark.parametrize("threads", [1, 3])
+def test_verify_complete(tmp_path, threads):
+    content = bytes(range(256)) * 40
+    lengths = [1000, 0, 3000, 4, 6236]
+    file = make_multi_file(content, 256, lengths)
+    write_files(tmp_path / "folder", content, lengths)
+
+    verifier = PieceVerifier(threads, task_size=1024)
+    result = verifier.verify(file, tmp_path)
+
+    assert result.is_complete
+    assert len(result.pieces) == 40
+    assert [completeness.fraction for completeness in result.files] == [1.0] * 5
+    assert verifier.check(file, tmp_path)
+
+
+@pytest.mark.parametrize("threads", [1, 3])
+def test_verify_incomplete(tmp_path, threads):
+    content = bytes(range(256)) * 40
+    lengths = [1000, 3000, 6240]
+    file = make_multi_file(content, 256, lengths)
+    write_files(tmp_path / "renamed", content, lengths)
+    # corrupts piece 3, which spans the first two files (768 to 1024)
+    with open(tmp_path / "renamed" / "1.bin", "r+b") as data:
+        data.write(b"x")
+    # and the last file is missing bytes of the final piece
+    with open(tmp_path / "renamed" / "2.bin", "r+b") as data:
+        data.truncate(6000)
+
+    verifier = PieceVerifier(threads, task_size=1024)
+    result = verifier.verify(file, tmp_path, "renamed")
+
+    assert not result.is_complete
+    assert result.valid_pieces == 38
+    assert result.pieces[2] == 1 and result.pieces[3] == 0 and result.pieces[39] == 0
+    assert result.files == [
+        FileCompleteness(Path("renamed", "0.bin"), 1000, 1000 - 232),
+        FileCompleteness(Path("renamed", "1.bin"), 3000, 3000 - 24),
+        FileCompleteness(Path("renamed", "2.bin"), 6240, 6240 - 256),
+    ]
+    assert not verifier.check(file, tmp_path, "renamed")
+
+
+def test_verify_missing(tmp_path):
+    content = bytes(range(256)) * 4
+    file = make_multi_file(content, 256, [512, 512])
+    write_files(tmp_path / "folder", content[:512], [512])
+
+    result = PieceVerifier(1).verify(file, tmp_path)
+
+    assert result.pieces == bytes([1, 1, 0, 0])
+    assert [completeness.verified for completeness in result.files] == [512, 0]
+
+
+def test_sample_complete(tmp_path):
+    content = bytes(range(256)) * 100
+    # first and last pieces of the files: 0, 3 (shared by both) and 99
+    lengths = [1000, 24600]
+    file = make_multi_file(content, 256, lengths)
+    write_files(tmp_path / "folder", content, lengths)
+
+    verifier = PieceVerifier(2, random=Random(0))
+    result = verifier.sample(file, tmp_path, sample=Sample(count=10))
+
+    assert result.is_valid
+    assert (result.hashed, result.chosen, result.candidates) == (13, 10, 97)
+    assert result.full is None
+    assert 0 < result.bad_fraction_bound() < 1
+
+
+def test_sample_boundary_pieces(tmp_path):
+    content = bytes(range(256)) * 100
+    lengths = [1000, 24600]
+    file = make_multi_file(content, 256, lengths)
+    write_files(tmp_path / "folder", content, lengths)
+    # the last piece of the torrent is bad
+    with open(tmp_path / "folder" / "1.bin", "r+b") as data:
+        data.seek(24599)
+        data.write(b"x")
+
+    verifier = PieceVerifier(1, random=Random(0))
+    sampled = verifier.sample(file, tmp_path, sample=Sample(count=0), escalate=False)
+    escalated = verifier.sample(file, tmp_path, sample=Sample(count=0))
+
+    assert not sampled.is_valid
+    assert sampled.full is None
+    assert not escalated.is_valid
+    assert escalated.full.valid_pieces == 99
+    assert escalated.full.files[1].verified == 24600 - 256
+
+
+def test_sample_all_pieces(tmp_path):
+    content = bytes(range(256)) * 4
+    file = make_multi_file(content, 256, [1024])
+    write_files(tmp_path / "folder", content, [1024])
+
+    result = PieceVerifier(1).sample(file, tmp_path, sample=Sample(fraction=1.0))
+
+    assert result.is_valid
+    assert (result.hashed, result.chosen, result.candidates) == (4, 2, 2)
+    assert result.bad_fraction_bound() == 0.0
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        ("64", Sample(count=64)),
+        ("0.01", Sample(fraction=0.01)),
+        ("1%", Sample(fraction=0.01)),
+    ],
+)
+def test_sample_parse(value, expected):
+    assert Sample.parse(value) == expected
+
+
+@pytest.mark.parametrize("value", ["a", "150%", "-1", "1.5"])
+def test_sample_parse_invalid(value):
+    with pytest.raises(ValueError):
+        Sample.parse(value)
+
+
+def test_sample_size():
+    assert Sample(fraction=0.01).size(1000) == 10
+    assert Sample(fraction=0.01).size(50) == 1
+    assert Sample(fraction=0.01, count=64).size(1000) == 64
+    assert Sample(count=64).size(10) == 10
+
+
+def test_bad_fraction_bound():
+    result = SampleResult(None, Path("/"), None, True, 300, 299, 1000)
+
+    # a sample of 299 misses 1% bad pieces 5% of the time
+    assert result.bad_fraction_bound() == pytest.approx(0.01, abs=0.0001)
@@ -0,0 +1,133 @@
+import asyncio
+from pathlib import Path
+from typing import Set
+
+import pytest
+
+from clutchless.external.filesystem import DefaultFilesystem, DirectoryScanner
+from clutchless.external.watch import (
+    InotifyWatcher,
+    PollingWatcher,
+    Watcher,
+    next_batch,
+)
+
+
+async def watch_until(
+    watcher: Watcher, root: Path, action, expected: Set[Path]
+) -> Set[Path]:
+    queue: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(watcher.run([root], queue))
+    try:
+        await asyncio.sleep(0.2)
+        action()
+        seen = set()
+        while not expected <= seen:
+            seen.add(await asyncio.wait_for(queue.get(), 5))
+        return seen
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not InotifyWatcher.is_available(), reason="needs inotify")
+async def test_inotify_watcher_reports_new_directories(tmp_path):
+    fs = DefaultFilesystem()
+    watcher = InotifyWatcher(fs, DirectoryScanner(fs))
+
+    def action():
+        (tmp_path / "new" / "deeper").mkdir(parents=True)
+        (tmp_path / "new" / "deeper" / "file").write_bytes(b"data")
+
+    seen = await watch_until(watcher, tmp_path, action, {tmp_path / "new"})
+
+    assert tmp_path / "new" in seen
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not InotifyWatcher.is_available(), reason="needs inotify")
+async def test_inotify_watcher_watches_moved_in_loop(tmp_path):
+    (tmp_path / "root").mkdir()
+    staging = tmp_path / "staging"
+    (staging / "deeper").mkdir(parents=True)
+    (staging / "deeper" / "loop").symlink_to(staging, target_is_directory=True)
+    fs = DefaultFilesystem()
+    watcher = InotifyWatcher(fs, DirectoryScanner(fs))
+    new = tmp_path / "root" / "new"
+
+    def action():
+        staging.rename(new)
+
+    async def moved_in_then_written():
+        # once the moved in tree is watched, a file written deep inside is reported
+        while new not in watcher.directories.values() or watcher.tasks:
+            await asyncio.sleep(0.01)
+        (new / "deeper" / "file").write_bytes(b"data")
+
+    queue: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(watcher.run([tmp_path / "root"], queue))
+    try:
+        await asyncio.sleep(0.2)
+        action()
+        await asyncio.wait_for(moved_in_then_written(), 5)
+        seen = set()
+        while new / "deeper" / "file" not in seen:
+            seen.add(await asyncio.wait_for(queue.get(), 5))
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    assert new in seen
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not InotifyWatcher.is_available(), reason="needs inotify")
+async def test_inotify_watcher_reports_removed_files(tmp_path):
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "nested" / "file").write_bytes(b"data")
+    fs = DefaultFilesystem()
+    watcher = InotifyWatcher(fs, DirectoryScanner(fs))
+
+    def action():
+        (tmp_path / "nested" / "file").unlink()
+
+    seen = await watch_until(watcher, tmp_path, action, {tmp_path / "nested" / "file"})
+
+    assert tmp_path / "nested" / "file" in seen
+
+
+@pytest.mark.asyncio
+async def test_polling_watcher(tmp_path):
+    (tmp_path / "existing").write_bytes(b"data")
+    fs = DefaultFilesystem()
+    watcher = PollingWatcher(DirectoryScanner(fs), 0.05)
+
+    def action():
+        (tmp_path / "existing").unlink()
+        (tmp_path / "added").write_bytes(b"data")
+
+    expected = {tmp_path / "existing", tmp_path / "added"}
+    seen = await watch_until(watcher, tmp_path, action, expected)
+
+    assert expected <= seen
+
+
+@pytest.mark.asyncio
+async def test_next_batch_waits_for_quiet():
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def produce():
+        for name in ("a", "b", "a"):
+            queue.put_nowait(Path(name))
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.2)
+        queue.put_nowait(Path("c"))
+
+    producer = asyncio.create_task(produce())
+    first = await next_batch(queue, 0.1)
+    second = await next_batch(queue, 0.1)
+    await producer
+
+    assert first == {Path("a"), Path("b")}
+    assert second == {Path("c")}
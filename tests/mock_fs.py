@@ -2,7 +2,7 @@ from collections import deque
 from pathlib import Path
 from typing import Mapping, Iterable, Deque, Set, Tuple
 
-from clutchless.external.filesystem import Filesystem, CopyError
+from clutchless.external.filesystem import Filesystem, CopyError, FileEntry
 
 
 def _get_paths(spec: Iterable) -> Tuple[Set[Path], Set[Path]]:
@@ -31,11 +31,12 @@ def _get_paths(spec: Iterable) -> Tuple[Set[Path], Set[Path]]:
 
 
 class MockFilesystem(Filesystem):
-    def __init__(self, spec: Iterable):
+    def __init__(self, spec: Iterable, sizes: Mapping[Path, int] = None):
         self.spec = spec
         files, directories = _get_paths(spec)
         self.files = files
         self.directories = directories
+        self.sizes = dict(sizes or {})
 
     def rename(self, path: Path, name: str):
         if self.exists(path):
@@ -98,6 +99,16 @@ class MockFilesystem(Filesystem):
             yield from matching_dirs
             yield from matching_files
 
+    def scan(self, path: Path) -> Iterable[FileEntry]:
+        for child in self.children(path):
+            yield self.stat(child)
+
+    def stat(self, path: Path) -> FileEntry:
+        if not self.exists(path):
+            raise FileNotFoundError(path)
+        size = self.sizes.get(path, 0)
+        return FileEntry(path, self.is_directory(path), self.is_file(path), size)
+
     def remove(self, path: Path):
         if not self.exists(path):
             raise FileNotFoundError(path)
@@ -121,3 +132,6 @@ class InfinitelyDeepFilesystem(MockFilesystem):
 
     def children(self, path: Path) -> Iterable[Path]:
         yield path.parent
+
+    def scan(self, path: Path) -> Iterable[FileEntry]:
+        yield FileEntry(path.parent, True, False)
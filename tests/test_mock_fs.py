@@ -2,7 +2,7 @@ from pathlib import Path
 
 import pytest
 
-from clutchless.external.filesystem import CopyError
+from clutchless.external.filesystem import CopyError, FileEntry
 from tests.mock_fs import MockFilesystem
 
 
@@ -13,6 +13,15 @@ def test_mock_fs():
     assert set(fs.children(Path("/"))) == {Path("/folder")}
 
 
+def test_mock_fs_scan():
+    fs = MockFilesystem({"folder": ["file", {"nested": "other"}]})
+
+    assert set(fs.scan(Path("/folder"))) == {
+        FileEntry(Path("/folder/file"), False, True),
+        FileEntry(Path("/folder/nested"), True, False),
+    }
+
+
 def test_mock_fs_iterable():
     files = ["file1", "file2", "file3"]
     fs = MockFilesystem(files)
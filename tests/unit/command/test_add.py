@@ -1,3 +1,4 @@
+import asyncio
 from pathlib import Path
 
 from pytest_mock import MockerFixture
@@ -7,6 +8,7 @@ from clutchless.command.add import (
     AddOutput,
     LinkingAddCommand,
     LinkingAddOutput,
+    StreamingAddCommand,
 )
 from clutchless.domain.torrent import MetainfoFile
 from clutchless.external.filesystem import Filesystem
@@ -16,8 +18,9 @@ from clutchless.external.metainfo import (
     TorrentData,
 )
 from clutchless.external.result import CommandResult
-from clutchless.external.transmission import TransmissionApi
-from clutchless.service.torrent import AddService, FindService
+from clutchless.external.transmission import TransmissionApi, AsyncTransmissionApi
+from clutchless.service.pipeline import AddPipeline
+from clutchless.service.torrent import AddService, FindService, AsyncAddService
 from tests.mock_fs import MockFilesystem
 
 
@@ -424,3 +427,63 @@ def test_linking_add_dry_run_display(mocker: MockerFixture, capsys):
         )
         + "\n"
     )
+
+
+def test_streaming_add_run(mocker: MockerFixture):
+    api = mocker.Mock(spec=TransmissionApi)
+    api.add_torrent.return_value = CommandResult()
+    api.add_torrent_with_files.return_value = CommandResult(id=1)
+    fs = mocker.Mock(spec=Filesystem)
+    linked = MetainfoFile({"info_hash": "a", "name": "a"}, Path("/a.torrent"))
+    added = MetainfoFile({"info_hash": "b", "name": "b"}, Path("/b.torrent"))
+    pipeline = mocker.Mock(spec=AddPipeline)
+
+    async def run(paths, consume):
+        consume(TorrentData(linked, Path("/data")))
+        consume(TorrentData(added))
+
+    pipeline.run.side_effect = run
+    command = StreamingAddCommand(pipeline, AddService(api), fs, {Path("/")})
+
+    output: LinkingAddOutput = command.run()
+
+    assert output.linked_torrents == {linked: Path("/data")}
+    assert output.added_torrents == [added]
+    fs.remove.assert_has_calls([mocker.call(linked.path), mocker.call(added.path)])
+
+
+def test_streaming_add_run_async(mocker: MockerFixture):
+    api = mocker.Mock(spec=AsyncTransmissionApi)
+
+    async def add_torrent_with_files(file, download_dir):
+        return CommandResult(id=1)
+
+    async def add_torrent(file):
+        return CommandResult(error="bad", success=False)
+
+    async def close():
+        pass
+
+    api.add_torrent_with_files.side_effect = add_torrent_with_files
+    api.add_torrent.side_effect = add_torrent
+    api.close.side_effect = close
+    fs = mocker.Mock(spec=Filesystem)
+    linked = MetainfoFile({"info_hash": "a", "name": "a"}, Path("/a.torrent"))
+    failed = MetainfoFile({"info_hash": "b", "name": "b"}, Path("/b.torrent"))
+    pipeline = mocker.Mock(spec=AddPipeline)
+
+    async def run_async(paths, consume, consumers):
+        await asyncio.gather(
+            consume(TorrentData(linked, Path("/data"))), consume(TorrentData(failed))
+        )
+
+    pipeline.run_async.side_effect = run_async
+    service = AsyncAddService(api)
+    command = StreamingAddCommand(pipeline, service, fs, {Path("/")}, consumers=2)
+
+    output: LinkingAddOutput = command.run()
+
+    assert output.linked_torrents == {linked: Path("/data")}
+    assert output.failed_torrents == {failed: "bad"}
+    fs.remove.assert_called_once_with(linked.path)
+    api.close.assert_called_once()
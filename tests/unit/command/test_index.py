@@ -0,0 +1,80 @@
+from pathlib import Path
+
+from pytest_mock import MockerFixture
+
+from clutchless.command.index import (
+    IndexBuildCommand,
+    IndexRefreshCommand,
+    IndexStatsCommand,
+)
+from clutchless.external.index import DataIndex, IndexStats, RefreshResult
+
+
+def test_index_build_run_output(mocker: MockerFixture, capsys):
+    data_index = mocker.Mock(spec=DataIndex)
+    data_index.build.return_value = 10
+    command = IndexBuildCommand(data_index, {Path("/data")})
+
+    output = command.run()
+    output.display()
+
+    data_index.build.assert_called_once_with({Path("/data")})
+    result = capsys.readouterr().out
+    assert result == "\n".join(["Indexed 10 entries below:", "/data"]) + "\n"
+
+
+def test_index_refresh_run_output(mocker: MockerFixture, capsys):
+    data_index = mocker.Mock(spec=DataIndex)
+    data_index.refresh.return_value = RefreshResult(5, 1, 3, 2)
+    command = IndexRefreshCommand(data_index)
+
+    output = command.run()
+    output.display()
+
+    result = capsys.readouterr().out
+    assert (
+        result
+        == "\n".join(
+            [
+                "Checked 5 directories and listed 1 again.",
+                "3 entries were added and 2 were removed.",
+            ]
+        )
+        + "\n"
+    )
+
+
+def test_index_stats_run_output(mocker: MockerFixture, capsys):
+    data_index = mocker.Mock(spec=DataIndex)
+    data_index.path = Path("/index.sqlite")
+    data_index.stats.return_value = IndexStats([Path("/data")], 2, 3, 100)
+    command = IndexStatsCommand(data_index)
+
+    output = command.run()
+    output.display()
+
+    result = capsys.readouterr().out
+    assert (
+        result
+        == "\n".join(
+            [
+                "Index at /index.sqlite contains:",
+                "/data",
+                "2 directories and 3 files (100 bytes)",
+            ]
+        )
+        + "\n"
+    )
+
+
+def test_index_stats_empty_output(mocker: MockerFixture, capsys):
+    data_index = mocker.Mock(spec=DataIndex)
+    data_index.path = Path("/index.sqlite")
+    data_index.stats.return_value = IndexStats([], 0, 0, 0)
+    command = IndexStatsCommand(data_index)
+
+    output = command.run()
+    output.display()
+
+    result = capsys.readouterr().out
+    assert result == "Index at /index.sqlite is empty.\n"
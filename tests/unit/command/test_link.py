@@ -14,6 +14,7 @@ def test_link_success(mocker: MockerFixture):
 
     link_service = mocker.Mock(spec=LinkService)
     link_service.get_incomplete_id_by_metainfo_file.return_value = {metainfo_file: 1}
+    link_service.change_locations.return_value = {}
     find_service = mocker.Mock(spec=FindService)
     find_service.find.return_value = {TorrentData(metainfo_file, location)}
     command = LinkCommand(link_service, find_service)
@@ -28,6 +29,7 @@ def test_link_no_matching_data(mocker: MockerFixture):
 
     link_service = mocker.Mock(spec=LinkService)
     link_service.get_incomplete_id_by_metainfo_file.return_value = {metainfo_file: 1}
+    link_service.change_locations.return_value = {}
     find_service = mocker.Mock(spec=FindService)
     find_service.find.return_value = {TorrentData(metainfo_file)}
     command = LinkCommand(link_service, find_service)
@@ -44,7 +46,7 @@ def test_link_failure(mocker: MockerFixture):
 
     link_service = mocker.Mock(spec=LinkService)
     link_service.get_incomplete_id_by_metainfo_file.return_value = {metainfo_file: 1}
-    link_service.change_location.side_effect = RuntimeError("something")
+    link_service.change_locations.return_value = {1: "something"}
     find_service = mocker.Mock(spec=FindService)
     torrent_data = TorrentData(metainfo_file, location)
     find_service.find.return_value = {torrent_data}
@@ -63,7 +65,7 @@ def test_link_run_failure_output(mocker: MockerFixture, capsys):
 
     link_service = mocker.Mock(spec=LinkService)
     link_service.get_incomplete_id_by_metainfo_file.return_value = {metainfo_file: 1}
-    link_service.change_location.side_effect = RuntimeError("something")
+    link_service.change_locations.return_value = {1: "something"}
     find_service = mocker.Mock(spec=FindService)
     torrent_data = TorrentData(metainfo_file, location)
     missing_torrent_data = TorrentData(metainfo_file)
@@ -94,7 +96,7 @@ def test_link_dry_run_failure_output(mocker: MockerFixture, capsys):
 
     link_service = mocker.Mock(spec=LinkService)
     link_service.get_incomplete_id_by_metainfo_file.return_value = {metainfo_file: 1}
-    link_service.change_location.side_effect = RuntimeError("something")
+    link_service.change_locations.return_value = {1: "something"}
     find_service = mocker.Mock(spec=FindService)
     torrent_data = TorrentData(metainfo_file, location)
     missing_torrent_data = TorrentData(metainfo_file)
@@ -125,6 +127,7 @@ def test_link_run_success_output(mocker: MockerFixture, capsys):
 
     link_service = mocker.Mock(spec=LinkService)
     link_service.get_incomplete_id_by_metainfo_file.return_value = {metainfo_file: 1}
+    link_service.change_locations.return_value = {}
     find_service = mocker.Mock(spec=FindService)
     find_service.find.return_value = {TorrentData(metainfo_file, location)}
     command = LinkCommand(link_service, find_service)
@@ -144,6 +147,7 @@ def test_link_dry_run_success_output(mocker: MockerFixture, capsys):
 
     link_service = mocker.Mock(spec=LinkService)
     link_service.get_incomplete_id_by_metainfo_file.return_value = {metainfo_file: 1}
+    link_service.change_locations.return_value = {}
     find_service = mocker.Mock(spec=FindService)
     find_service.find.return_value = {TorrentData(metainfo_file, location)}
     command = LinkCommand(link_service, find_service)
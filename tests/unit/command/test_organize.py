@@ -9,7 +9,7 @@ from clutchless.command.organize import (
     OrganizeAction,
     ListOrganizeCommand,
 )
-from clutchless.domain.torrent import MetainfoFile
+from clutchless.external.transmission import TorrentSummary
 from clutchless.service.torrent import OrganizeService
 
 
@@ -58,26 +58,29 @@ def test_organize_run_display(mocker: MockerFixture, capsys):
             ("HiWhatUk", ["http://hi.what.uk:2710/n0fbno312o3w4z/announce"]),
         ]
     )
-    service.get_announce_urls_by_torrent_id.return_value = {
-        1: {"http://afake.com/12gfdxj7j32356/announce"},
-        2: {"http://hi.what.uk:2710/n0fbno312o3w4z/announce"},
-    }
-    names_by_id = {
-        1: MetainfoFile(
-            {"info_hash": "aaa", "name": "some_name"}, Path("/some_other_path")
+    service.get_torrents.return_value = {
+        1: TorrentSummary(
+            "some_name",
+            Path("/some_other_path"),
+            Path("/first_torrent"),
+            frozenset({"http://afake.com/12gfdxj7j32356/announce"}),
         ),
-        2: MetainfoFile(
-            {"info_hash": "bbb", "name": "another_name"}, Path("/another_path")
+        2: TorrentSummary(
+            "another_name",
+            Path("/another_path"),
+            Path("/second_torrent"),
+            frozenset({"http://hi.what.uk:2710/n0fbno312o3w4z/announce"}),
         ),
     }
-    paths = [Path("/first_torrent"), Path("/second_torrent")]
-    service.get_metainfo_file.side_effect = lambda torrent_id: names_by_id[torrent_id]
-    service.get_torrent_location.side_effect = lambda torrent_id: paths[torrent_id - 1]
+    service.move_locations.return_value = {}
     command = OrganizeCommand("0=SomeFolder", Path("/some_path"), service)
 
     output = command.run()
     output.display()
 
+    service.move_locations.assert_called_once_with(
+        {Path("/some_path/SomeFolder"): {1}, Path("/some_path/HiWhatUk"): {2}}
+    )
     result = capsys.readouterr().out
     expected = (
         "\n".join(
@@ -100,21 +103,21 @@ def test_organize_run_display_failure(mocker: MockerFixture, capsys):
             ("HiWhatUk", ["http://hi.what.uk:2710/n0fbno312o3w4z/announce"]),
         ]
     )
-    service.get_announce_urls_by_torrent_id.return_value = {
-        1: {"http://afake.com/12gfdxj7j32356/announce"},
-        2: {"http://hi.what.uk:2710/n0fbno312o3w4z/announce"},
-    }
-    names_by_id = {
-        1: MetainfoFile(
-            {"info_hash": "aaa", "name": "some_name"}, Path("/some_other_path")
+    service.get_torrents.return_value = {
+        1: TorrentSummary(
+            "some_name",
+            Path("/some_other_path"),
+            Path("/first_torrent"),
+            frozenset({"http://afake.com/12gfdxj7j32356/announce"}),
         ),
-        2: MetainfoFile(
-            {"info_hash": "bbb", "name": "another_name"}, Path("/another_path")
+        2: TorrentSummary(
+            "another_name",
+            Path("/another_path"),
+            Path("/second_torrent"),
+            frozenset({"http://hi.what.uk:2710/n0fbno312o3w4z/announce"}),
         ),
     }
-    paths = [Path("/first_torrent"), Path("/second_torrent")]
-    service.get_metainfo_file.side_effect = lambda torrent_id: names_by_id[torrent_id]
-    service.get_torrent_location.side_effect = RuntimeError("random error")
+    service.move_locations.return_value = {1: "random error", 2: "random error"}
     command = OrganizeCommand("0=SomeFolder", Path("/some_path"), service)
 
     output = command.run()
@@ -142,21 +145,20 @@ def test_organize_dry_run_display(mocker: MockerFixture, capsys):
             ("HiWhatUk", ["http://hi.what.uk:2710/n0fbno312o3w4z/announce"]),
         ]
     )
-    service.get_announce_urls_by_torrent_id.return_value = {
-        1: {"http://afake.com/12gfdxj7j32356/announce"},
-        2: {"http://hi.what.uk:2710/n0fbno312o3w4z/announce"},
-    }
-    names_by_id = {
-        1: MetainfoFile(
-            {"info_hash": "aaa", "name": "some_name"}, Path("/some_other_path")
+    service.get_torrents.return_value = {
+        1: TorrentSummary(
+            "some_name",
+            Path("/some_other_path"),
+            Path("/first_torrent"),
+            frozenset({"http://afake.com/12gfdxj7j32356/announce"}),
         ),
-        2: MetainfoFile(
-            {"info_hash": "bbb", "name": "another_name"}, Path("/another_path")
+        2: TorrentSummary(
+            "another_name",
+            Path("/another_path"),
+            Path("/second_torrent"),
+            frozenset({"http://hi.what.uk:2710/n0fbno312o3w4z/announce"}),
         ),
     }
-    paths = [Path("/first_torrent"), Path("/second_torrent")]
-    service.get_metainfo_file.side_effect = lambda torrent_id: names_by_id[torrent_id]
-    service.get_torrent_location.side_effect = lambda torrent_id: paths[torrent_id - 1]
     command = OrganizeCommand("0=SomeFolder", Path("/some_path"), service)
 
     output = command.dry_run()
@@ -179,11 +181,7 @@ def test_organize_dry_run_display(mocker: MockerFixture, capsys):
 def test_organize_dry_run_empty_case(mocker: MockerFixture, capsys):
     service: OrganizeService = mocker.Mock(spec=OrganizeService)
     service.get_announce_urls_by_folder_name.return_value = OrderedDict()
-    service.get_announce_urls_by_torrent_id.return_value = {}
-    names_by_id = {}
-    paths = [Path("/first_torrent"), Path("/second_torrent")]
-    service.get_metainfo_file.side_effect = lambda torrent_id: names_by_id[torrent_id]
-    service.get_torrent_location.side_effect = lambda torrent_id: paths[torrent_id - 1]
+    service.get_torrents.return_value = {}
     command = OrganizeCommand("0=SomeFolder", Path("/some_path"), service)
 
     output = command.dry_run()
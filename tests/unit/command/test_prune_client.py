@@ -11,7 +11,7 @@ def test_prune_client_run(mocker: MockerFixture):
 
     command.run()
 
-    service.remove_torrent.assert_called_once_with(1)
+    service.remove_torrents.assert_called_once_with({1})
 
 
 def test_prune_client_run_output(mocker: MockerFixture, capsys):
@@ -35,7 +35,7 @@ def test_prune_client_dry_run(mocker: MockerFixture):
 
     command.dry_run()
 
-    service.remove_torrent.assert_not_called()
+    service.remove_torrents.assert_not_called()
 
 
 def test_prune_client_dry_run_output(mocker: MockerFixture, capsys):
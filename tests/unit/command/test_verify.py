@@ -0,0 +1,55 @@
+from pathlib import Path
+
+from clutchless.command.verify import VerifyCommand
+from clutchless.domain.torrent import MetainfoFile
+from clutchless.external.metainfo import TorrentData
+from clutchless.external.verify import (
+    PieceVerifier,
+    VerifyResult,
+    Sample,
+    SampleResult,
+)
+from clutchless.service.torrent import FindService
+
+
+def test_verify_run(mocker):
+    found_file = MetainfoFile({"name": "found", "info_hash": "a"})
+    missing_file = MetainfoFile({"name": "missing", "info_hash": "b"})
+    find_service = mocker.Mock(spec=FindService)
+    find_service.find.return_value = [
+        TorrentData(found_file, Path("/data"), "renamed"),
+        TorrentData(missing_file),
+    ]
+    result = VerifyResult(found_file, Path("/data"), "renamed", b"\x01", [])
+    verifier = mocker.Mock(spec=PieceVerifier)
+    verifier.verify.return_value = result
+
+    command = VerifyCommand(find_service, verifier, {found_file, missing_file})
+    output = command.run()
+
+    verifier.verify.assert_called_once_with(found_file, Path("/data"), "renamed")
+    assert output.results == [result]
+    assert output.missing == {missing_file}
+
+
+def test_verify_run_sampled(mocker):
+    good_file = MetainfoFile({"name": "good", "info_hash": "a"})
+    bad_file = MetainfoFile({"name": "bad", "info_hash": "b"})
+    find_service = mocker.Mock(spec=FindService)
+    find_service.find.return_value = [
+        TorrentData(good_file, Path("/data")),
+        TorrentData(bad_file, Path("/data")),
+    ]
+    good = SampleResult(good_file, Path("/data"), None, True, 2, 1, 8)
+    full = VerifyResult(bad_file, Path("/data"), None, b"\x00", [])
+    bad = SampleResult(bad_file, Path("/data"), None, False, 2, 1, 8, full)
+    verifier = mocker.Mock(spec=PieceVerifier)
+    verifier.sample.side_effect = lambda file, *args: good if file == good_file else bad
+    sample = Sample(count=1)
+
+    command = VerifyCommand(find_service, verifier, {good_file, bad_file}, sample)
+    output = command.run()
+
+    verifier.sample.assert_any_call(good_file, Path("/data"), None, sample)
+    assert output.sampled == [good]
+    assert output.results == [full]
@@ -0,0 +1,77 @@
+from pathlib import Path
+
+from clutchless.domain.signature import TreeSignatures
+from clutchless.domain.torrent import MetainfoFile
+
+
+def make_metainfo_file(name: str, sizes) -> MetainfoFile:
+    files = [{"path": list(Path(path).parts), "length": size} for (path, size) in sizes]
+    return MetainfoFile({"name": name, "info_hash": name, "info": {"files": files}})
+
+
+def test_signature_ignores_directory_name():
+    first = TreeSignatures()
+    first.add_file(Path("/data/first/a"), 1)
+    first.add_file(Path("/data/first/sub/b"), 2)
+    second = TreeSignatures()
+    second.add_file(Path("/other/second/sub/b"), 2)
+    second.add_file(Path("/other/second/a"), 1)
+
+    assert (
+        first.compute()[Path("/data/first")] == second.compute()[Path("/other/second")]
+    )
+
+
+def test_signature_depends_on_sizes_and_paths():
+    file = make_metainfo_file("name", [("a", 1), ("sub/b", 2)])
+
+    assert (
+        file.signature != make_metainfo_file("name", [("a", 1), ("sub/b", 3)]).signature
+    )
+    assert file.signature != make_metainfo_file("name", [("a", 1), ("b", 2)]).signature
+    assert (
+        file.signature
+        == make_metainfo_file("other", [("sub/b", 2), ("a", 1)]).signature
+    )
+
+
+def test_metainfo_signature_matches_data():
+    file = make_metainfo_file("name", [("a", 1), ("sub/b", 2)])
+    tree = TreeSignatures()
+    tree.add_file(Path("/data/renamed/a"), 1)
+    tree.add_file(Path("/data/renamed/sub/b"), 2)
+
+    signatures = tree.compute()
+
+    assert signatures[Path("/data/renamed")] == file.signature
+    assert Path("/data/renamed/sub") in signatures
+
+
+def test_single_file_has_no_signature():
+    file = MetainfoFile({"name": "name", "info": {"length": 10}})
+
+    assert file.signature is None
+
+
+def test_signatures_updated_after_changes():
+    tree = TreeSignatures()
+    tree.add_file(Path("/data/first/a"), 1)
+    tree.add_file(Path("/data/second/sub/b"), 2)
+    tree.add_file(Path("/data/second/c"), 3)
+    before = dict(tree.compute())
+
+    tree.remove_file(Path("/data/second/sub/b"))
+    tree.add_file(Path("/data/first/sub/b"), 2)
+    after = tree.compute()
+
+    fresh = TreeSignatures()
+    fresh.add_file(Path("/data/first/a"), 1)
+    fresh.add_file(Path("/data/first/sub/b"), 2)
+    fresh.add_file(Path("/data/second/c"), 3)
+    assert after == fresh.compute()
+    assert Path("/data/second/sub") not in after
+    assert after[Path("/data/first")] != before[Path("/data/first")]
+    assert tree.with_signature(after[Path("/data/second")]) == {Path("/data/second")}
+    assert list(tree.files_below(Path("/data/first/sub"))) == [
+        Path("/data/first/sub/b")
+    ]
@@ -34,6 +34,52 @@ def test_metainfo():
     assert file.files == files
 
 
+def test_metainfo_files_decoded_once():
+    class CountingInfo(dict):
+        lookups = 0
+
+        def get(self, key, default=None):
+            CountingInfo.lookups += 1
+            return super().get(key, default)
+
+    info = CountingInfo(files=[{"path": ["a"], "length": 1}])
+    file = MetainfoFile({"name": "test_name", "info": info})
+
+    first = list(file.needed_files(Path("/data")))
+    second = list(file.needed_files(Path("/data")))
+
+    assert first == second == [Path("/data/test_name/a")]
+    assert file.length == 1
+    assert CountingInfo.lookups == 1
+
+
+def test_metainfo_compact_files():
+    info = {
+        "files": [
+            {"path": ["".join("dir"), "a"], "length": 1},
+            {"path": ["".join("dir"), "b"], "length": 2},
+        ]
+    }
+    file = MetainfoFile({"name": "test_name", "info": info})
+
+    (first, _), (second, _) = file.columns
+
+    assert first[0] is second[0]
+    assert file.columns.lengths.tolist() == [1, 2]
+    assert file.files == [TorrentFile(Path("dir/a"), 1), TorrentFile(Path("dir/b"), 2)]
+    assert file.files is file.files
+
+
+def test_metainfo_loads_pieces_once(mocker: MockerFixture):
+    load_pieces = mocker.Mock(return_value=b"a" * 20 + b"b" * 20)
+    info = {"piece length": 16, "length": 32}
+    file = MetainfoFile({"name": "test_name", "info": info}, load_pieces=load_pieces)
+
+    assert file.piece_hash(1) == b"b" * 20
+    assert file.piece_hash(0) == b"a" * 20
+    load_pieces.assert_called_once_with()
+
+
 def test_metainfo_single_file():
     properties = {"info": {"length": 10}}
     file = MetainfoFile(properties)
@@ -85,3 +131,14 @@ def test_metainfo_str_repr():
     file = MetainfoFile({"name": "some_name"})
 
     assert str(file) == "some_name"
+
+
+def test_whole_pieces():
+    files = [{"path": ["a"], "length": 100}, {"path": ["b"], "length": 50}]
+    info = {"piece length": 32, "pieces": b"", "files": files}
+    file = MetainfoFile({"name": "name", "info": info})
+
+    assert list(file.spans()) == [(Path("name/a"), 0, 100), (Path("name/b"), 100, 50)]
+    assert file.whole_pieces(0, 100) == range(0, 3)
+    assert file.whole_pieces(100, 50) == range(4, 5)
+    assert file.piece_span(4) == (128, 150)
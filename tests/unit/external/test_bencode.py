@@ -0,0 +1,86 @@
+import pytest
+
+from clutchless.external.bencode import (
+    decode,
+    decode_metainfo,
+    BencodeError,
+    LazyDict,
+)
+
+
+def test_decode_values():
+    result = decode(b"d4:listli1ei-2e4:spame3:numi42e3:raw2:\xff\xfee")
+
+    assert result == {"list": [1, -2, "spam"], "num": 42, "raw": b"\xff\xfe"}
+
+
+def test_decode_keeps_raw_keys_as_views():
+    data = b"d6:pieces4:abcde"
+
+    result = decode(data)
+
+    assert isinstance(result["pieces"], memoryview)
+    assert result["pieces"].obj is data
+    assert result["pieces"] == b"abcd"
+
+
+def test_decode_metainfo_info_span():
+    info = b"d6:lengthi3e4:name1:xe"
+    data = b"d8:announce3:url4:info" + info + b"e"
+
+    result, encoded_info = decode_metainfo(data)
+
+    assert result == {"announce": "url", "info": {"length": 3, "name": "x"}}
+    assert bytes(encoded_info) == info
+
+
+def test_decode_metainfo_unsorted_keys():
+    # hashed as it is in the file, not as it would be re-encoded
+    info = b"d4:name1:x6:lengthi3ee"
+    data = b"d4:info" + info + b"e"
+
+    _, encoded_info = decode_metainfo(data)
+
+    assert bytes(encoded_info) == info
+
+
+@pytest.mark.parametrize(
+    "data",
+    [b"", b"d", b"d3:key", b"i12", b"ixe", b"5:abc", b"l", b"x", b"i1ei2e"],
+)
+def test_decode_invalid(data):
+    with pytest.raises(BencodeError):
+        decode(data)
+
+
+def test_decode_metainfo_lazy_keys():
+    data = b"d4:infod5:filesld6:lengthi3e4:pathl1:aeee4:name1:x6:pieces0:ee"
+
+    result, _ = decode_metainfo(data, lazy_keys=frozenset({"files"}))
+
+    info = result["info"]
+    assert isinstance(info, LazyDict)
+    assert info["name"] == "x"
+    assert info["files"] == [{"length": 3, "path": ["a"]}]
+
+
+def test_decode_metainfo_skip_keys():
+    data = b"d4:infod4:name1:x6:pieces4:abcdee"
+
+    result, encoded_info = decode_metainfo(data, skip_keys=frozenset({"pieces"}))
+
+    assert result == {"info": {"name": "x"}}
+    assert bytes(encoded_info) == data[7:-1]
+
+
+def test_decode_metainfo_lazy_keys_invalid():
+    with pytest.raises(BencodeError):
+        decode_metainfo(b"d4:infod5:filesl5:abce", lazy_keys=frozenset({"files"}))
+
+
+def test_lazy_dict_with_encoded():
+    info = LazyDict.with_encoded({"name": "x"}, {"files": b"ld6:lengthi3eee"})
+
+    assert info.encoded("files") == b"ld6:lengthi3eee"
+    assert info.encoded("name") is None
+    assert dict(info) == {"name": "x", "files": [{"length": 3}]}
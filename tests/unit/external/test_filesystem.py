@@ -1,4 +1,7 @@
 import asyncio
+import threading
+import time
+from collections import Counter
 from pathlib import Path
 from typing import Iterable, Sequence, Mapping
 
@@ -11,12 +14,19 @@ from clutchless.external.filesystem import (
     Filesystem,
     FileLocator,
     MultipleDirectoryFileLocator,
+    IndexedFileLocator,
+    DirectoryScanner,
+    FileEntry,
+    ScanRules,
 )
 from clutchless.external.metainfo import (
     TorrentDataLocator,
     DefaultTorrentDataReader,
     TorrentDataReader,
     CustomTorrentDataLocator,
+    IndexedTorrentDataLocator,
+    SizeMatchingTorrentDataLocator,
+    TorrentData,
 )
 from tests.mock_fs import MockFilesystem, InfinitelyDeepFilesystem
 
@@ -208,3 +218,340 @@ async def test_multiple_directory_filesystem():
         Path("/upper/testing/file2.torrent"),
         Path("/upper/testing/file4.torrent"),
     }
+
+
+@pytest.mark.asyncio
+async def test_indexed_locator_locate_file():
+    fs = MockFilesystem(
+        {
+            "upper": {"testing": {"file1", "file2.torrent", "file3", "file4.torrent"}},
+            "multi": ["file7", {"another": ["file5", {"level3": {"file8"}}]}],
+        }
+    )
+    locator = IndexedFileLocator([Path("/upper"), Path("/multi")], fs)
+
+    assert await locator.locate_file("file8") == Path("/multi/another/level3")
+    assert await locator.locate_file("file1") == Path("/upper/testing")
+    assert await locator.locate_file("missing") is None
+
+
+@pytest.mark.asyncio
+async def test_indexed_locator_locate_directory():
+    fs = MockFilesystem({"data": {"torrent_name": ["torrent_file1"]}})
+    locator = IndexedFileLocator([Path("/")], fs)
+
+    assert await locator.locate_directory("torrent_name") == Path("/data")
+    assert await locator.locate_directory("torrent_file1") is None
+
+
+@pytest.mark.asyncio
+async def test_indexed_locator_collect():
+    fs = MockFilesystem(
+        {"upper": {"testing": {"file1", "file2.torrent", "file3", "file4.torrent"}}}
+    )
+    locator = IndexedFileLocator([Path("/upper")], fs)
+
+    results = {path async for path in locator.collect(".torrent")}
+
+    assert results == {
+        Path("/upper/testing/file2.torrent"),
+        Path("/upper/testing/file4.torrent"),
+    }
+
+
+@pytest.mark.asyncio
+async def test_indexed_data_locator_walks_once(mocker: MockerFixture):
+    fs = MockFilesystem(
+        {
+            "data": {
+                "first": ["file1", "file2"],
+                "second": ["file1"],
+                "single": "single_file",
+            }
+        }
+    )
+    scan = mocker.spy(fs, "scan")
+    metainfo_files = [
+        MetainfoFile(
+            {
+                "name": name,
+                "info_hash": name,
+                "info": {"files": mock_info_files([Path("file1")])},
+            }
+        )
+        for name in ("first", "second", "missing")
+    ]
+    metainfo_files.append(
+        MetainfoFile(
+            {"name": "single_file", "info_hash": "single", "info": {"length": 5}}
+        )
+    )
+    data_locator = IndexedTorrentDataLocator(
+        IndexedFileLocator([Path("/data")], fs), DefaultTorrentDataReader(fs)
+    )
+
+    results = await asyncio.gather(
+        *(data_locator.find(file) for file in metainfo_files)
+    )
+
+    assert [result.location for result in results] == [
+        Path("/data"),
+        Path("/data"),
+        None,
+        Path("/data/single"),
+    ]
+    walked = [call.args[0] for call in scan.call_args_list]
+    assert len(walked) == len(set(walked))
+
+
+@pytest.mark.asyncio
+async def test_indexed_data_locator_verifies_candidates():
+    fs = MockFilesystem(
+        {
+            "a": {"torrent_name": ["other_file"]},
+            "b": {"torrent_name": ["torrent_file1"]},
+        }
+    )
+    metainfo_file = MetainfoFile(
+        {
+            "name": "torrent_name",
+            "info": {"files": mock_info_files([Path("torrent_file1")])},
+        }
+    )
+    data_locator = IndexedTorrentDataLocator(
+        IndexedFileLocator([Path("/")], fs), DefaultTorrentDataReader(fs)
+    )
+
+    result = await data_locator.find(metainfo_file)
+
+    assert result.location == Path("/b")
+
+
+@pytest.mark.asyncio
+async def test_indexed_data_locator_verifies_off_the_event_loop(mocker: MockerFixture):
+    fs = MockFilesystem({"data": ["single_file"]})
+    metainfo_file = MetainfoFile({"name": "single_file", "info": {"length": 0}})
+    reader = mocker.Mock(spec=TorrentDataReader)
+    threads = []
+
+    def verify(path, file, name=None):
+        threads.append(threading.current_thread())
+        return True
+
+    reader.verify.side_effect = verify
+    data_locator = IndexedTorrentDataLocator(
+        IndexedFileLocator([Path("/")], fs), reader
+    )
+
+    result = await data_locator.find(metainfo_file)
+
+    assert result.location == Path("/data")
+    assert threads != [threading.current_thread()]
+    assert len(threads) == 1
+
+
+@pytest.mark.asyncio
+async def test_size_matching_data_locator_single_file():
+    fs = MockFilesystem(
+        {"data": ["renamed.mkv", "other.mkv"]},
+        {Path("/data/renamed.mkv"): 100, Path("/data/other.mkv"): 50},
+    )
+    metainfo_file = MetainfoFile(
+        {"name": "original.mkv", "info_hash": "a", "info": {"length": 100}}
+    )
+    data_locator = SizeMatchingTorrentDataLocator(
+        IndexedFileLocator([Path("/")], fs, index_sizes=True),
+        DefaultTorrentDataReader(fs),
+    )
+
+    result = await data_locator.find(metainfo_file)
+
+    assert result == TorrentData(metainfo_file, Path("/data"), "renamed.mkv")
+
+
+@pytest.mark.asyncio
+async def test_size_matching_data_locator_multiple_file():
+    fs = MockFilesystem(
+        {
+            "data": {
+                "Renamed (2020)": ["file1", {"sub": ["file2"]}],
+                "decoy": ["file1", {"sub": ["file3"]}],
+            }
+        },
+        {
+            Path("/data/Renamed (2020)/file1"): 10,
+            Path("/data/Renamed (2020)/sub/file2"): 20,
+            Path("/data/decoy/file1"): 10,
+            Path("/data/decoy/sub/file3"): 20,
+        },
+    )
+    metainfo_file = MetainfoFile(
+        {
+            "name": "original",
+            "info_hash": "a",
+            "info": {
+                "files": [
+                    {"path": ["file1"], "length": 10},
+                    {"path": ["sub", "file2"], "length": 20},
+                ]
+            },
+        }
+    )
+    data_locator = SizeMatchingTorrentDataLocator(
+        IndexedFileLocator([Path("/")], fs, index_sizes=True),
+        DefaultTorrentDataReader(fs),
+    )
+
+    result = await data_locator.find(metainfo_file)
+
+    assert result == TorrentData(metainfo_file, Path("/data"), "Renamed (2020)")
+
+
+@pytest.mark.asyncio
+async def test_indexed_data_locator_matches_signature(mocker: MockerFixture):
+    fs = MockFilesystem(
+        {"data": {"torrent_name": ["file1", {"sub": ["file2"]}]}},
+        {
+            Path("/data/torrent_name/file1"): 10,
+            Path("/data/torrent_name/sub/file2"): 20,
+        },
+    )
+    metainfo_file = MetainfoFile(
+        {
+            "name": "torrent_name",
+            "info_hash": "a",
+            "info": {
+                "files": [
+                    {"path": ["file1"], "length": 10},
+                    {"path": ["sub", "file2"], "length": 20},
+                ]
+            },
+        }
+    )
+    reader = mocker.Mock(spec=TorrentDataReader)
+    data_locator = IndexedTorrentDataLocator(
+        IndexedFileLocator([Path("/")], fs), reader
+    )
+
+    result = await data_locator.find(metainfo_file)
+
+    assert result == TorrentData(metainfo_file, Path("/data"))
+    reader.verify.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_scanner_walk():
+    fs = MockFilesystem(
+        {"upper": {"testing": {"file1", "file2"}}, "multi": ["file7", {"another": []}]}
+    )
+    scanner = DirectoryScanner(fs)
+
+    results = {entry.path async for entry in scanner.walk([Path("/")])}
+
+    assert results == {
+        Path("/upper"),
+        Path("/upper/testing"),
+        Path("/upper/testing/file1"),
+        Path("/upper/testing/file2"),
+        Path("/multi"),
+        Path("/multi/file7"),
+        Path("/multi/another"),
+    }
+
+
+@pytest.mark.asyncio
+async def test_scanner_walk_skips_excluded_without_listing(mocker: MockerFixture):
+    fs = MockFilesystem(
+        {"data": {".zfs": {"snapshot": ["file1"]}, "keep": ["file2", "file3.tmp"]}}
+    )
+    scan = mocker.spy(fs, "scan")
+    scanner = DirectoryScanner(fs, rules=ScanRules(exclude=(".zfs", "*.tmp")))
+
+    results = {entry.path async for entry in scanner.walk([Path("/data")])}
+
+    assert results == {Path("/data/keep"), Path("/data/keep/file2")}
+    listed = {call.args[0] for call in scan.call_args_list}
+    assert listed == {Path("/data"), Path("/data/keep")}
+
+
+@pytest.mark.asyncio
+async def test_scanner_walk_max_depth():
+    fs = MockFilesystem({"data": {"one": {"two": {"three": ["file"]}}}})
+    scanner = DirectoryScanner(fs, rules=ScanRules(max_depth=1))
+
+    results = {entry.path async for entry in scanner.walk([Path("/data")])}
+
+    assert results == {Path("/data/one"), Path("/data/one/two")}
+
+
+class MountedFilesystem(MockFilesystem):
+    """Everything below /data/mount is on another device."""
+
+    def stat(self, path: Path) -> FileEntry:
+        entry = super().stat(path)
+        mount = Path("/data/mount")
+        device = 1 if path == mount or mount in path.parents else 0
+        return FileEntry(entry.path, entry.is_dir, entry.is_file, device=device)
+
+
+@pytest.mark.asyncio
+async def test_scanner_walk_one_file_system():
+    fs = MountedFilesystem({"data": {"local": ["file1"], "mount": ["file2"]}})
+    scanner = DirectoryScanner(fs, rules=ScanRules(one_file_system=True))
+
+    results = {entry.path async for entry in scanner.walk([Path("/data")])}
+
+    assert results == {
+        Path("/data/local"),
+        Path("/data/local/file1"),
+        Path("/data/mount"),
+    }
+
+
+class SlowDeviceFilesystem(MockFilesystem):
+    """Every top level directory is its own device, listing takes a while."""
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.lock = threading.Lock()
+        self.active: Counter = Counter()
+        self.most_active: Counter = Counter()
+        self.most_active_overall = 0
+
+    def _device(self, path: Path) -> int:
+        return hash(path.parts[1]) if len(path.parts) > 1 else 0
+
+    def stat(self, path: Path) -> FileEntry:
+        return FileEntry(path, True, False, device=self._device(path))
+
+    def scan(self, path: Path):
+        device = self._device(path)
+        with self.lock:
+            self.active[device] += 1
+            self.most_active[device] = max(
+                self.most_active[device], self.active[device]
+            )
+            self.most_active_overall = max(
+                self.most_active_overall, sum(self.active.values())
+            )
+        time.sleep(0.02)
+        with self.lock:
+            self.active[device] -= 1
+        return [
+            FileEntry(entry.path, entry.is_dir, entry.is_file, device=device)
+            for entry in super().scan(path)
+        ]
+
+
+@pytest.mark.asyncio
+async def test_scanner_limits_concurrency_per_device():
+    folders = [str(number) + "/" for number in range(6)]
+    fs = SlowDeviceFilesystem({"disk1": folders, "disk2": folders, "disk3": folders})
+    scanner = DirectoryScanner(fs, workers=8, per_device=2)
+    roots = [Path("/disk1"), Path("/disk2"), Path("/disk3")]
+
+    results = [entry async for entry in scanner.walk(roots)]
+
+    assert len(results) == 18
+    assert max(fs.most_active.values()) == 2
+    assert fs.most_active_overall > 2
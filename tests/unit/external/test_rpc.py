@@ -0,0 +1,245 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from clutchless.external.rpc import AsyncRpcClient, RpcError
+from clutchless.external.transmission import AsyncRpcApi
+
+
+class StandInServer:
+    """Answers RPC requests like Transmission, over kept-alive connections."""
+
+    SESSION_ID = "session-1"
+
+    def __init__(
+        self,
+        handle=None,
+        delay: float = 0,
+        close_after: int = 0,
+        reject_sessions: bool = False,
+        answers: int = None,
+    ):
+        self.handle = handle or (lambda request: {"result": "success"})
+        self.reject_sessions = reject_sessions
+        self.delay = delay
+        # close every connection after this many responses (0 to keep them open)
+        self.close_after = close_after
+        # requests answered in all, later ones are dropped with their connection
+        self.answers = answers
+        self.connections = 0
+        self.requests = []
+        self.session_ids = []
+        self.in_flight = 0
+        self.most_in_flight = 0
+        self.server = None
+
+    async def __aenter__(self) -> str:
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/transmission/rpc"
+
+    async def __aexit__(self, *args):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer):
+        self.connections += 1
+        responses = 0
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    return
+                lines = head.decode().split("\r\n")
+                headers = {
+                    name.lower(): value.strip()
+                    for (name, _, value) in (line.partition(":") for line in lines[1:])
+                }
+                body = await reader.readexactly(int(headers["content-length"]))
+                if self.answers is not None and len(self.requests) >= self.answers:
+                    return
+                session_id = headers.get("x-transmission-session-id")
+                self.session_ids.append(session_id)
+                if session_id != self.SESSION_ID or self.reject_sessions:
+                    self._respond(writer, 409, b"", self.SESSION_ID)
+                else:
+                    self.in_flight += 1
+                    self.most_in_flight = max(self.most_in_flight, self.in_flight)
+                    await asyncio.sleep(self.delay)
+                    self.in_flight -= 1
+                    request = json.loads(body)
+                    self.requests.append(request)
+                    content = json.dumps(self.handle(request)).encode()
+                    self._respond(writer, 200, content)
+                await writer.drain()
+                responses += 1
+                if responses == self.close_after:
+                    return
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _respond(writer, status: int, content: bytes, session_id: str = None):
+        lines = [f"HTTP/1.1 {status} OK", f"Content-Length: {len(content)}"]
+        if session_id is not None:
+            lines.append(f"X-Transmission-Session-Id: {session_id}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + content)
+
+
+@pytest.mark.asyncio
+async def test_session_id_negotiated_once():
+    server = StandInServer()
+    async with server as address:
+        client = AsyncRpcClient(address, connections=2)
+
+        first = await client.request("session-get")
+        second = await client.request("session-get")
+        await client.close()
+
+    assert first == second == {"result": "success"}
+    assert server.session_ids == [None, "session-1", "session-1"]
+    assert server.connections == 1
+
+
+@pytest.mark.asyncio
+async def test_requests_in_flight_at_once():
+    server = StandInServer(delay=0.05)
+    async with server as address:
+        client = AsyncRpcClient(address, connections=3)
+        client.session_id = StandInServer.SESSION_ID
+
+        await asyncio.gather(*(client.request("torrent-get") for _ in range(9)))
+        await client.close()
+
+    assert len(server.requests) == 9
+    assert server.most_in_flight == 3
+    assert server.connections == 3
+
+
+@pytest.mark.asyncio
+async def test_connection_closed_while_idle():
+    server = StandInServer(close_after=1)
+    async with server as address:
+        client = AsyncRpcClient(address, connections=1)
+        client.session_id = StandInServer.SESSION_ID
+
+        await client.request("torrent-get")
+        # let the client see the connection close
+        await asyncio.sleep(0.01)
+        result = await client.request("torrent-get")
+        await client.close()
+
+    assert result == {"result": "success"}
+    assert server.connections == 2
+
+
+@pytest.mark.asyncio
+async def test_session_id_rejected_again():
+    server = StandInServer(reject_sessions=True)
+    async with server as address:
+        client = AsyncRpcClient(address)
+
+        with pytest.raises(RpcError):
+            await client.request("session-get")
+        await client.close()
+
+    assert len(server.session_ids) == 2
+
+
+@pytest.mark.asyncio
+async def test_add_torrents():
+    def handle(request):
+        if request["arguments"]["filename"] == "/duplicate.torrent":
+            arguments = {"torrent-duplicate": {"id": 1}}
+        else:
+            arguments = {"torrent-added": {"id": 2}}
+        return {"result": "success", "arguments": arguments}
+
+    server = StandInServer(handle)
+    async with server as address:
+        api = AsyncRpcApi(AsyncRpcClient(address))
+
+        added = await api.add_torrent_with_files(Path("/new.torrent"), Path("/data"))
+        duplicate = await api.add_torrent(Path("/duplicate.torrent"))
+        await api.close()
+
+    assert added.id == 2
+    assert server.requests[0] == {
+        "method": "torrent-add",
+        "arguments": {
+            "filename": "/new.torrent",
+            "download-dir": "/data",
+            "paused": True,
+        },
+    }
+    assert not duplicate.success
+    assert duplicate.error == "duplicate torrent"
+
+
+@pytest.mark.asyncio
+async def test_dropped_request_retried_once():
+    server = StandInServer(answers=1)
+    async with server as address:
+        client = AsyncRpcClient(address, connections=1)
+        client.session_id = StandInServer.SESSION_ID
+
+        await client.request("torrent-get")
+        with pytest.raises(RpcError):
+            await client.request("torrent-get")
+        await client.close()
+
+    # the kept-alive connection and a single fresh one
+    assert server.connections == 2
+
+
+@pytest.mark.asyncio
+async def test_malformed_response():
+    async def serve(reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 3\r\n\r\nabc")
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(serve, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    client = AsyncRpcClient(f"http://127.0.0.1:{port}/transmission/rpc")
+    client.session_id = StandInServer.SESSION_ID
+
+    with pytest.raises(RpcError, match="malformed response"):
+        await client.request("torrent-get")
+    await client.close()
+    server.close()
+    await server.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_add_torrent_with_transmission_down():
+    server = await asyncio.start_server(lambda reader, writer: None, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    server.close()
+    await server.wait_closed()
+    api = AsyncRpcApi(AsyncRpcClient(f"http://127.0.0.1:{port}/transmission/rpc"))
+
+    result = await api.add_torrent(Path("/new.torrent"))
+    await api.close()
+
+    assert not result.success
+    assert result.error
+
+
+@pytest.mark.asyncio
+async def test_add_torrent_timed_out():
+    server = StandInServer(delay=0.3)
+    async with server as address:
+        client = AsyncRpcClient(address, timeout=0.05)
+        client.session_id = StandInServer.SESSION_ID
+        api = AsyncRpcApi(client)
+
+        result = await api.add_torrent(Path("/new.torrent"))
+        await api.close()
+
+    assert not result.success
+    assert result.error == "no response within 0.05 seconds"
@@ -0,0 +1,197 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+from clutch.schema.user.method.torrent.action import TorrentActionMethod
+from pytest_mock import MockerFixture
+
+from clutchless.external.transmission import ClutchApi, SNAPSHOT_FIELDS, TorrentSummary
+
+
+def make_torrent(torrent_id: int, **fields):
+    values = {
+        "id": torrent_id,
+        "name": f"torrent{torrent_id}",
+        "hash_string": f"hash{torrent_id}",
+        "torrent_file": f"/metainfo/{torrent_id}.torrent",
+        "percent_done": 1.0,
+        "error": 0,
+        "error_string": "",
+        "download_dir": "/data",
+    }
+    values.update(fields)
+    return SimpleNamespace(**values)
+
+
+def make_client(mocker: MockerFixture, torrents):
+    def accessor(fields, ids=None):
+        returned = [torrent for torrent in torrents if ids is None or torrent.id in ids]
+        return SimpleNamespace(
+            result="success", arguments=SimpleNamespace(torrents=returned)
+        )
+
+    client = mocker.Mock()
+    client.torrent.accessor.side_effect = accessor
+    return client
+
+
+def test_queries_share_one_snapshot(mocker: MockerFixture):
+    torrents = [
+        make_torrent(1),
+        make_torrent(2, error=3, error_string="No data found! Ensure..."),
+        make_torrent(3, error=2, error_string="tracker error"),
+    ]
+    client = make_client(mocker, torrents)
+    api = ClutchApi(client)
+
+    files = api.get_torrent_files_by_id().value
+    names = api.get_torrent_name_by_id({1, 2}).value
+    errors = api.get_errors_by_id({1, 2}).value
+    missing = api.get_torrent_names_by_id_with_missing_data().value
+
+    client.torrent.accessor.assert_called_once_with(fields=SNAPSHOT_FIELDS, ids=None)
+    assert files[3] == Path("/metainfo/3.torrent")
+    assert names == {1: "torrent1", 2: "torrent2"}
+    assert errors == {2: (3, "No data found! Ensure...")}
+    assert missing == {2: "torrent2"}
+
+
+def test_missing_data_error_starts_the_message(mocker: MockerFixture):
+    torrents = [
+        make_torrent(1, percent_done=0.5, error=3, error_string="No data found!"),
+        make_torrent(
+            2, percent_done=0.5, error=3, error_string="Local error: No data found!"
+        ),
+    ]
+    api = ClutchApi(make_client(mocker, torrents))
+
+    assert api.get_incomplete_ids().value == {1}
+    assert api.get_torrent_names_by_id_with_missing_data().value == {1: "torrent1"}
+
+
+def test_snapshot_grows_for_missing_fields(mocker: MockerFixture):
+    torrents = [make_torrent(1, trackers=[SimpleNamespace(announce="http://a")])]
+    client = make_client(mocker, torrents)
+    api = ClutchApi(client)
+
+    api.get_torrent_hashes_by_id()
+    urls = api.get_announce_urls().value
+    api.get_torrent_trackers()
+
+    assert client.torrent.accessor.call_count == 2
+    assert client.torrent.accessor.call_args[1]["fields"] == SNAPSHOT_FIELDS | {
+        "trackers"
+    }
+    assert urls == {"http://a"}
+
+
+def test_changed_torrents_fetched_again(mocker: MockerFixture):
+    torrents = [make_torrent(1), make_torrent(2)]
+    client = make_client(mocker, torrents)
+    api = ClutchApi(client)
+    assert api.get_torrent_location(1).value == Path("/data")
+
+    client.torrent.move.return_value = SimpleNamespace(result="success")
+    client.torrent.remove.return_value = SimpleNamespace(result="success")
+    api.change_torrent_location(1, Path("/new"))
+    torrents[0].download_dir = "/new"
+    api.remove_torrent_keeping_data(2)
+    del torrents[1]
+
+    assert api.get_torrent_location(1).value == Path("/new")
+    assert api.get_torrent_hashes_by_id().value == {1: "hash1"}
+    client.torrent.accessor.assert_called_with(fields=SNAPSHOT_FIELDS, ids={1, 2})
+    assert client.torrent.accessor.call_count == 2
+
+
+def test_failed_query(mocker: MockerFixture):
+    client = mocker.Mock()
+    client.torrent.accessor.return_value = SimpleNamespace(
+        result="error", arguments=None
+    )
+    api = ClutchApi(client)
+
+    result = api.get_errors_by_id({1})
+
+    assert not result.success
+    assert result.error == "error"
+
+
+def test_torrent_summaries(mocker: MockerFixture):
+    torrents = [
+        make_torrent(1, trackers=[SimpleNamespace(announce="http://a")]),
+        make_torrent(2, trackers=[]),
+    ]
+    client = make_client(mocker, torrents)
+    api = ClutchApi(client)
+
+    api.get_announce_urls()
+    summaries = api.get_torrent_summaries().value
+
+    client.torrent.accessor.assert_called_once()
+    assert summaries == {
+        1: TorrentSummary(
+            "torrent1",
+            Path("/metainfo/1.torrent"),
+            Path("/data"),
+            frozenset({"http://a"}),
+        ),
+        2: TorrentSummary("torrent2", Path("/metainfo/2.torrent"), Path("/data")),
+    }
+
+
+def test_move_many_torrents_at_once(mocker: MockerFixture):
+    torrents = [make_torrent(i, trackers=[]) for i in (1, 2, 3)]
+    client = make_client(mocker, torrents)
+    client.torrent.move.return_value = SimpleNamespace(result="success")
+    api = ClutchApi(client)
+    api.get_torrent_summaries()
+
+    result = api.move_torrents_location({1, 2}, Path("/new"))
+    for torrent in torrents[:2]:
+        torrent.download_dir = "/new"
+    summaries = api.get_torrent_summaries().value
+
+    assert result.success
+    client.torrent.move.assert_called_once_with(ids={1, 2}, location="/new", move=True)
+    assert client.torrent.accessor.call_args[1]["ids"] == {1, 2}
+    assert {i: s.location for (i, s) in summaries.items()} == {
+        1: Path("/new"),
+        2: Path("/new"),
+        3: Path("/data"),
+    }
+
+
+def test_bulk_requests_are_batched(mocker: MockerFixture):
+    client = mocker.Mock()
+    client.torrent.remove.side_effect = [
+        SimpleNamespace(result="success"),
+        SimpleNamespace(result="some error"),
+        SimpleNamespace(result="success"),
+    ]
+    api = ClutchApi(client, batch_size=2)
+
+    result = api.remove_torrents_keeping_data({5, 1, 4, 2, 3})
+
+    assert [c[0][0] for c in client.torrent.remove.call_args_list] == [
+        {1, 2},
+        {3, 4},
+        {5},
+    ]
+    assert not result.success
+    assert result.error == "some error"
+
+
+def test_bulk_actions(mocker: MockerFixture):
+    client = mocker.Mock()
+    client.torrent.action.return_value = SimpleNamespace(result="success")
+    api = ClutchApi(client)
+
+    assert api.verify_torrents({1, 2}).success
+    assert api.stop_torrents({3}).success
+    assert api.start_torrents({3}).success
+
+    assert client.torrent.action.call_args_list == [
+        mocker.call(TorrentActionMethod.VERIFY, {1, 2}),
+        mocker.call(TorrentActionMethod.STOP, {3}),
+        mocker.call(TorrentActionMethod.START, {3}),
+    ]
@@ -112,6 +112,7 @@ def test_collect_metainfo_files_with_timeout(mocker: MockerFixture):
         return MetainfoFile({"info_hash": str(path)})
 
     reader.from_path.side_effect = from_path
+    reader.from_paths.side_effect = lambda paths: [from_path(path) for path in paths]
 
     result = collect_metainfo_files(reader, fs, paths)
 
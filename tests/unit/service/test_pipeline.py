@@ -0,0 +1,94 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from clutchless.domain.torrent import MetainfoFile
+from clutchless.external.filesystem import DirectoryScanner
+from clutchless.external.metainfo import MetainfoIO, TorrentDataLocator, TorrentData
+from clutchless.service.pipeline import AddPipeline
+from tests.mock_fs import MockFilesystem
+
+
+def from_path(path: Path) -> MetainfoFile:
+    if path.name == "broken.torrent":
+        raise ValueError("invalid metainfo")
+    return MetainfoFile({"info_hash": str(path), "name": path.stem}, path)
+
+
+@pytest.fixture
+def reader(mocker: MockerFixture):
+    reader = mocker.Mock(spec=MetainfoIO)
+    reader.from_path.side_effect = from_path
+    reader.from_paths.side_effect = lambda paths: [from_path(path) for path in paths]
+    return reader
+
+
+@pytest.fixture
+def fs():
+    return MockFilesystem(
+        {
+            "metainfo": {"a.torrent", "b.torrent", "other", "broken.torrent"},
+            "data": {"a"},
+        }
+    )
+
+
+@pytest.mark.asyncio
+async def test_pipeline(mocker: MockerFixture, fs, reader):
+    locator = mocker.Mock(spec=TorrentDataLocator)
+
+    async def find(file: MetainfoFile) -> TorrentData:
+        if file.name == "a":
+            return TorrentData(file, Path("/data"))
+        return TorrentData(file)
+
+    locator.find.side_effect = find
+    pipeline = AddPipeline(fs, reader, DirectoryScanner(fs), locator, queue_size=1)
+    consumed = []
+
+    await pipeline.run([Path("/metainfo")], consumed.append)
+
+    assert sorted(consumed) == [
+        TorrentData(from_path(Path("/metainfo/a.torrent")), Path("/data")),
+        TorrentData(from_path(Path("/metainfo/b.torrent"))),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_without_locator(fs, reader):
+    pipeline = AddPipeline(fs, reader, DirectoryScanner(fs))
+    consumed = []
+
+    await pipeline.run([Path("/metainfo/a.torrent")], consumed.append)
+
+    assert consumed == [TorrentData(from_path(Path("/metainfo/a.torrent")))]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_raises_stage_error(fs, reader):
+    pipeline = AddPipeline(fs, reader, DirectoryScanner(fs))
+
+    with pytest.raises(ValueError):
+        await pipeline.run([Path("/missing")], lambda data: None)
+
+
+@pytest.mark.asyncio
+async def test_pipeline_consumers_at_once(fs, reader):
+    pipeline = AddPipeline(fs, reader, DirectoryScanner(fs))
+    consumed = []
+    started = asyncio.Event()
+
+    async def consume(data: TorrentData):
+        # only returns once the other consumer started as well
+        if started.is_set():
+            consumed.append(data)
+        else:
+            started.set()
+            await asyncio.sleep(0.01)
+            consumed.append(data)
+
+    await pipeline.run_async([Path("/metainfo")], consume, consumers=2)
+
+    assert len(consumed) == 2
@@ -1,6 +1,19 @@
 from collections import OrderedDict
+from pathlib import Path
 
-from clutchless.service.torrent import AnnounceUrl, OrganizeService
+from pytest_mock import MockerFixture
+
+from clutchless.domain.torrent import MetainfoFile
+from clutchless.external.result import CommandResult, QueryResult
+from clutchless.external.transmission import TransmissionApi, TorrentSummary
+from clutchless.external.metainfo import MetainfoIO, TorrentData
+from clutchless.service.torrent import (
+    AnnounceUrl,
+    OrganizeService,
+    AddService,
+    LinkService,
+    LinkDataService,
+)
 
 
 def test_formatted_hostname():
@@ -74,3 +87,163 @@ def test_get_groups_by_name():
         },
         "TestCom": {"http://domain.test.com/announce"},
     }
+
+
+def test_add_with_renamed_data(mocker: MockerFixture):
+    api = mocker.Mock(spec=TransmissionApi)
+    api.add_torrent_with_files.return_value = CommandResult(id=7)
+    api.rename_torrent_path.return_value = CommandResult()
+    file = MetainfoFile({"name": "original"}, Path("/torrents/original.torrent"))
+    service = AddService(api)
+
+    service.add_with_data(file, Path("/data"), "renamed")
+
+    api.rename_torrent_path.assert_called_once_with(7, "original", "renamed")
+    assert service.found == [file]
+    assert service.link == [Path("/data")]
+
+
+def test_add_with_renamed_data_rename_fails(mocker: MockerFixture):
+    api = mocker.Mock(spec=TransmissionApi)
+    api.add_torrent_with_files.return_value = CommandResult(id=7)
+    api.rename_torrent_path.return_value = CommandResult(error="bad", success=False)
+    file = MetainfoFile({"name": "original"}, Path("/torrents/original.torrent"))
+    service = AddService(api)
+
+    service.add_with_data(file, Path("/data"), "renamed")
+
+    assert service.fail == [file]
+    assert service.error == ["bad"]
+
+
+def test_move_locations_reads_back_locations(mocker: MockerFixture):
+    api = mocker.Mock(spec=TransmissionApi)
+    api.move_torrents_location.side_effect = [
+        CommandResult(),
+        CommandResult(error="bad", success=False),
+    ]
+
+    def summary(location: str) -> TorrentSummary:
+        return TorrentSummary("name", Path("/file.torrent"), Path(location))
+
+    api.get_torrent_summaries.return_value = QueryResult(
+        value={1: summary("/new/a"), 2: summary("/old"), 3: summary("/old")}
+    )
+    service = OrganizeService(api)
+
+    failures = service.move_locations({Path("/new/a"): {1, 2}, Path("/new/b"): {3, 4}})
+
+    api.move_torrents_location.assert_any_call({1, 2}, Path("/new/a"))
+    api.move_torrents_location.assert_any_call({3, 4}, Path("/new/b"))
+    assert failures == {
+        2: "location is still /old",
+        3: "failed to change torrent location: bad",
+        4: "torrent is gone from Transmission",
+    }
+
+
+def test_change_locations_in_bulk(mocker: MockerFixture):
+    data_service = mocker.Mock(spec=LinkDataService)
+    data_service.get_metainfo_raw_value.return_value = b"raw"
+    data_service.get_hash_with_torrent_id.side_effect = lambda i: f"hash{i}"
+    data_service.add_with_paths.side_effect = [11, RuntimeError("not added")]
+    service = LinkService(mocker.Mock(spec=MetainfoIO), data_service)
+    first = MetainfoFile({"name": "first"}, Path("/torrents/first.torrent"))
+    second = MetainfoFile({"name": "second"}, Path("/torrents/second.torrent"))
+
+    failures = service.change_locations(
+        {1: TorrentData(first, Path("/data")), 2: TorrentData(second, Path("/data"))}
+    )
+
+    data_service.remove_by_ids.assert_called_once_with({1, 2})
+    data_service.trigger_verify_by_ids.assert_called_once_with({11})
+    assert failures == {2: "not added"}
+
+
+def test_change_locations_removal_fails(mocker: MockerFixture):
+    data_service = mocker.Mock(spec=LinkDataService)
+    data_service.remove_by_ids.side_effect = RuntimeError("failed to remove")
+    data_service.get_torrent_ids.return_value = {1}
+    service = LinkService(mocker.Mock(spec=MetainfoIO), data_service)
+    file = MetainfoFile({"name": "first"}, Path("/torrents/first.torrent"))
+
+    failures = service.change_locations({1: TorrentData(file, Path("/data"))})
+
+    data_service.add_with_paths.assert_not_called()
+    assert failures == {1: "failed to remove"}
+
+
+def test_change_locations_second_batch_fails(mocker: MockerFixture):
+    data_service = mocker.Mock(spec=LinkDataService)
+    data_service.get_metainfo_raw_value.side_effect = lambda path: path.name.encode()
+    data_service.get_hash_with_torrent_id.side_effect = lambda i: f"hash{i}"
+    data_service.remove_by_ids.side_effect = [
+        None,
+        RuntimeError("failed to remove"),
+        None,
+    ]
+    data_service.get_torrent_ids.return_value = {2}
+    data_service.add_with_paths.side_effect = [11, 13]
+    service = LinkService(mocker.Mock(spec=MetainfoIO), data_service, batch_size=1)
+    files = {
+        i: MetainfoFile({"name": f"t{i}"}, Path(f"/torrents/t{i}.torrent"))
+        for i in (1, 2, 3)
+    }
+
+    failures = service.change_locations(
+        {i: TorrentData(file, Path("/data")) for (i, file) in files.items()}
+    )
+
+    assert failures == {2: "failed to remove"}
+    assert data_service.remove_by_ids.call_args_list == [
+        mocker.call({1}),
+        mocker.call({2}),
+        mocker.call({3}),
+    ]
+    assert data_service.add_with_paths.call_args_list == [
+        mocker.call(files[1].path, Path("/data")),
+        mocker.call(files[3].path, Path("/data")),
+    ]
+    assert data_service.trigger_verify_by_ids.call_args_list == [
+        mocker.call({11}),
+        mocker.call({13}),
+    ]
+
+
+def test_change_locations_adds_back_removed_when_batch_fails(mocker: MockerFixture):
+    data_service = mocker.Mock(spec=LinkDataService)
+    data_service.get_metainfo_raw_value.side_effect = lambda path: path.name.encode()
+    data_service.get_hash_with_torrent_id.side_effect = lambda i: f"hash{i}"
+    data_service.remove_by_ids.side_effect = RuntimeError("failed to remove")
+    # the first one was removed before the request failed
+    data_service.get_torrent_ids.return_value = {2}
+    data_service.add_with_paths.return_value = 11
+    service = LinkService(mocker.Mock(spec=MetainfoIO), data_service)
+    first = MetainfoFile({"name": "first"}, Path("/torrents/first.torrent"))
+    second = MetainfoFile({"name": "second"}, Path("/torrents/second.torrent"))
+
+    failures = service.change_locations(
+        {1: TorrentData(first, Path("/data")), 2: TorrentData(second, Path("/data"))}
+    )
+
+    assert failures == {2: "failed to remove"}
+    data_service.restore_metainfo.assert_called_once_with(b"first.torrent", first.path)
+    data_service.add_with_paths.assert_called_once_with(first.path, Path("/data"))
+    data_service.trigger_verify_by_ids.assert_called_once_with({11})
+
+
+def test_change_locations_renames_without_reading_metainfo(mocker: MockerFixture):
+    data_service = mocker.Mock(spec=LinkDataService)
+    data_service.get_metainfo_raw_value.return_value = b"raw"
+    data_service.add_with_paths.return_value = 11
+    reader = mocker.Mock(spec=MetainfoIO)
+    service = LinkService(reader, data_service)
+    file = MetainfoFile({"name": "first"}, Path("/torrents/first.torrent"))
+
+    failures = service.change_locations(
+        {1: TorrentData(file, Path("/data"), "renamed")}
+    )
+
+    assert failures == {}
+    data_service.rename.assert_called_once_with(11, "first", "renamed")
+    reader.from_path.assert_not_called()
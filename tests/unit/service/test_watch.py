@@ -0,0 +1,162 @@
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from clutchless.domain.torrent import MetainfoFile
+from clutchless.external.filesystem import IndexedFileLocator, DirectoryScanner
+from clutchless.external.metainfo import (
+    MetainfoIO,
+    IndexedTorrentDataLocator,
+    DefaultTorrentDataReader,
+    TorrentData,
+)
+from clutchless.external.result import CommandResult
+from clutchless.external.transmission import TransmissionApi
+from clutchless.service.torrent import AddService, LinkService
+from clutchless.service.watch import WatchService
+from tests.mock_fs import MockFilesystem
+
+
+def make_service(mocker: MockerFixture, fs: MockFilesystem, file: MetainfoFile):
+    reader = mocker.Mock(spec=MetainfoIO)
+    reader.from_path.return_value = file
+    reader.from_paths.side_effect = lambda paths: [file for _ in paths]
+    api = mocker.Mock(spec=TransmissionApi)
+    api.add_torrent_with_files.return_value = CommandResult(id=1)
+    link_service = mocker.Mock(spec=LinkService)
+    link_service.get_incomplete_id_by_metainfo_file.return_value = {}
+    file_locator = IndexedFileLocator([Path("/data")], fs, index_sizes=True)
+    data_locator = IndexedTorrentDataLocator(file_locator, DefaultTorrentDataReader(fs))
+    service = WatchService(
+        fs,
+        DirectoryScanner(fs),
+        reader,
+        file_locator,
+        data_locator,
+        AddService(api),
+        link_service,
+        [Path("/torrents")],
+    )
+    return service, api
+
+
+@pytest.mark.asyncio
+async def test_watch_adds_new_metainfo_with_data(mocker: MockerFixture):
+    fs = MockFilesystem({"torrents": ["new.torrent"], "data": ["single_file"]})
+    file = MetainfoFile(
+        {"name": "single_file", "info_hash": "a", "info": {"length": 0}},
+        Path("/torrents/new.torrent"),
+    )
+    service, api = make_service(mocker, fs, file)
+
+    batch = await service.handle({Path("/torrents/new.torrent")})
+
+    assert batch.linked == [TorrentData(file, Path("/data"))]
+    api.add_torrent_with_files.assert_called_once_with(
+        Path("/torrents/new.torrent"), Path("/data")
+    )
+
+
+@pytest.mark.asyncio
+async def test_watch_adds_pending_metainfo_when_data_arrives(mocker: MockerFixture):
+    fs = MockFilesystem({"torrents": ["new.torrent"], "data": []})
+    file = MetainfoFile(
+        {"name": "single_file", "info_hash": "a", "info": {"length": 0}},
+        Path("/torrents/new.torrent"),
+    )
+    service, api = make_service(mocker, fs, file)
+    await service.file_locator.index()
+
+    first = await service.handle({Path("/torrents/new.torrent")})
+    fs.touch(Path("/data/single_file"))
+    second = await service.handle({Path("/data/single_file")})
+
+    assert first.linked == []
+    assert service.pending == set()
+    assert second.linked == [TorrentData(file, Path("/data"))]
+
+
+@pytest.mark.asyncio
+async def test_watch_skips_unreadable_metainfo(mocker: MockerFixture):
+    fs = MockFilesystem({"torrents": ["new.torrent", "partial.torrent"], "data": []})
+    file = MetainfoFile(
+        {"name": "single_file", "info_hash": "a", "info": {"length": 0}},
+        Path("/torrents/new.torrent"),
+    )
+    service, _ = make_service(mocker, fs, file)
+    service.reader.from_paths.side_effect = ValueError("truncated")
+    service.reader.from_path.side_effect = [file, ValueError("truncated")]
+
+    files = await service.new_metainfo_files(
+        {Path("/torrents/new.torrent"), Path("/torrents/partial.torrent")}
+    )
+
+    assert files == {file}
+
+
+@pytest.mark.asyncio
+async def test_watch_links_found_data_together(mocker: MockerFixture):
+    fs = MockFilesystem({"data": ["first", "second"]})
+    first = MetainfoFile(
+        {"name": "first", "info_hash": "a", "info": {"length": 0}},
+        Path("/torrents/first.torrent"),
+    )
+    second = MetainfoFile(
+        {"name": "second", "info_hash": "b", "info": {"length": 0}},
+        Path("/torrents/second.torrent"),
+    )
+    service, _ = make_service(mocker, fs, first)
+    link_service = service.link_service
+    link_service.get_incomplete_id_by_metainfo_file.return_value = {
+        first: 1,
+        second: 2,
+    }
+    link_service.change_locations.return_value = {2: "failed to remove"}
+
+    batch = await service.handle({Path("/data/first"), Path("/data/second")})
+
+    link_service.change_locations.assert_called_once_with(
+        {
+            1: TorrentData(first, Path("/data")),
+            2: TorrentData(second, Path("/data")),
+        }
+    )
+    assert batch.linked == [TorrentData(first, Path("/data"))]
+    assert batch.failed == [(second, "failed to remove")]
+
+
+@pytest.mark.asyncio
+async def test_watch_forgets_removed_data(mocker: MockerFixture):
+    fs = MockFilesystem({"data": {"folder": ["file1", {"nested": ["file2"]}]}})
+    file = MetainfoFile({"name": "unused", "info_hash": "a", "info": {"length": 0}})
+    service, _ = make_service(mocker, fs, file)
+    locator = service.file_locator
+    await locator.index()
+
+    fs.remove(Path("/data/folder"))
+    await service.update_index({Path("/data/folder")})
+
+    assert await locator.locate_directory("folder") is None
+    assert await locator.locate_directory("nested") is None
+    assert await locator.locate_file("file2") is None
+
+
+@pytest.mark.asyncio
+async def test_watch_rescans_root(mocker: MockerFixture):
+    fs = MockFilesystem({"data": {"folder": ["file1"]}})
+    file = MetainfoFile({"name": "unused", "info_hash": "a", "info": {"length": 0}})
+    service, _ = make_service(mocker, fs, file)
+    locator = service.file_locator
+    await locator.index()
+
+    fs.remove(Path("/data/folder"))
+    fs.create_dir(Path("/data/renamed/file2"))
+    fs.touch(Path("/data/renamed/file2"))
+    # what's reported when inotify's queue overflows
+    await service.update_index({Path("/data")})
+
+    assert await locator.locate_directory("folder") is None
+    assert await locator.locate_file("file1") is None
+    assert await locator.locate_directory("renamed") == Path("/data")
+    assert await locator.locate_file("file2") == Path("/data/renamed")
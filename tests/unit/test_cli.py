@@ -0,0 +1,53 @@
+import pytest
+from pytest_mock import MockerFixture
+
+from clutchless.entrypoints.cli import Application
+from clutchless.external.filesystem import (
+    DefaultFilesystem,
+    DirectoryScanner,
+    SingleDirectoryFileLocator,
+)
+from clutchless.external.metainfo import MetainfoIO
+from clutchless.external.transmission import TransmissionApi
+
+
+def run(mocker: MockerFixture, command: str, *argv: str):
+    fs = DefaultFilesystem()
+    dependencies = {
+        "client": mocker.Mock(spec=TransmissionApi),
+        "fs": fs,
+        "metainfo_reader": mocker.Mock(spec=MetainfoIO),
+        "scanner": DirectoryScanner(fs),
+        "locator": SingleDirectoryFileLocator(fs),
+    }
+    Application({"<command>": command, "<args>": list(argv)}, dependencies).run()
+
+
+def test_invalid_verify(mocker: MockerFixture, tmp_path, capsys):
+    run(mocker, "link", "--verify", "foo", str(tmp_path))
+
+    assert capsys.readouterr().out.startswith("--verify: verification must be")
+
+
+@pytest.mark.parametrize(
+    "depth,message",
+    [("-1", "--max-depth can't be negative"), ("x", "--max-depth must be a number")],
+)
+def test_invalid_max_depth(mocker: MockerFixture, tmp_path, capsys, depth, message):
+    run(mocker, "link", "--max-depth", depth, str(tmp_path))
+
+    assert capsys.readouterr().out.startswith(message)
+
+
+@pytest.mark.parametrize(
+    "argv,message",
+    [
+        (["--sample", "abc"], "--sample: sample must be"),
+        (["--threads", "x"], "--threads must be a number"),
+        (["--threads", "0"], "--threads must be at least 1"),
+    ],
+)
+def test_invalid_verify_options(mocker: MockerFixture, tmp_path, capsys, argv, message):
+    run(mocker, "verify", *argv, str(tmp_path), "-d", str(tmp_path))
+
+    assert capsys.readouterr().out.startswith(message)
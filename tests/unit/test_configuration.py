@@ -0,0 +1,62 @@
+from pathlib import Path
+
+import pytest
+
+from clutchless.configuration import get_file_locator, watch_factory
+from clutchless.external.filesystem import (
+    DirectoryScanner,
+    ScanRules,
+    DefaultFilesystem,
+)
+from clutchless.external.metainfo import (
+    MetainfoIO,
+    IndexedTorrentDataLocator,
+    SizeMatchingTorrentDataLocator,
+    Verification,
+)
+from clutchless.external.transmission import TransmissionApi
+from tests.mock_fs import MockFilesystem
+
+
+def test_index_rejects_scan_rules(tmp_path):
+    fs = MockFilesystem({"data": []})
+    scanner = DirectoryScanner(fs, rules=ScanRules(exclude=(".zfs",)))
+
+    with pytest.raises(RuntimeError, match="--index can't be combined"):
+        get_file_locator(fs, {Path("/data")}, scanner, str(tmp_path / "index.sqlite"))
+
+
+def watch_service(mocker, *argv):
+    fs = DefaultFilesystem()
+    dependencies = {
+        "client": mocker.Mock(spec=TransmissionApi),
+        "fs": fs,
+        "metainfo_reader": mocker.Mock(spec=MetainfoIO),
+        "scanner": DirectoryScanner(fs),
+    }
+    (command, _) = watch_factory(["watch", *argv], dependencies)
+    return command.service
+
+
+def test_watch_matches_names_by_default(mocker, tmp_path):
+    service = watch_service(mocker, str(tmp_path), "-d", str(tmp_path))
+
+    assert type(service.data_locator) is IndexedTorrentDataLocator
+    assert not service.file_locator.index_sizes
+    assert service.data_locator.reader.verification == Verification.EXISTS
+
+
+def test_watch_match_size_and_verify(mocker, tmp_path):
+    service = watch_service(
+        mocker,
+        "--match-size",
+        "--verify",
+        "size",
+        str(tmp_path),
+        "-d",
+        str(tmp_path),
+    )
+
+    assert isinstance(service.data_locator, SizeMatchingTorrentDataLocator)
+    assert service.file_locator.index_sizes
+    assert service.data_locator.reader.verification == Verification.SIZE